@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Track run time and peak memory of pipeline stages with asv."""
+
+# pylint: disable=invalid-name,attribute-defined-outside-init
+
+
+import os
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+import src.aggregate_data as ad
+import src.trips as bt
+from benchmarks.bench_aggregation import last_mod
+from benchmarks.bench_trips_readers import (
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    nan_cols,
+)
+from benchmarks.synthetic_data import (
+    make_synthetic_stations_stats,
+    write_synthetic_month_trips_csv,
+)
+from src.process_trips import process_trips_data
+
+# Synthetic data is only generated once per size, and re-used across runs
+bench_data_dir = os.environ.get(
+    "BIKESHARE_BENCH_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".asv", "data"),
+)
+trips_sizes = [100_000, 1_000_000, 10_000_000]
+
+
+def get_trips_csv(num_trips: int) -> str:
+    """Get path to single month of synthetic trips, writing it if missing."""
+    fpath = os.path.join(
+        bench_data_dir, f"Bike share ridership 2021-01-{num_trips}.csv"
+    )
+    if not os.path.exists(fpath):
+        os.makedirs(bench_data_dir, exist_ok=True)
+        write_synthetic_month_trips_csv(f"{fpath}.tmp", 2021, 1, num_trips)
+        os.replace(f"{fpath}.tmp", fpath)
+    return fpath
+
+
+def get_cleaned_trips(num_trips: int) -> pd.DataFrame:
+    """Get cleaned synthetic trips, caching them to Parquet."""
+    fpath = os.path.join(bench_data_dir, f"trips_cleaned_{num_trips}.parquet")
+    if not os.path.exists(fpath):
+        bt.read_data(
+            get_trips_csv(num_trips),
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+        ).to_parquet(fpath, index=False)
+    return pd.read_parquet(fpath)
+
+
+class TripsStage:
+    """Pipeline stage run on single month of synthetic trips."""
+
+    params = trips_sizes
+    param_names = ["num_trips"]
+    timeout = 3600
+    number = 1
+    repeat = (1, 5, 60.0)
+
+
+class ReadData(TripsStage):
+    """Read and clean trips CSV."""
+
+    def setup(self, num_trips: int) -> None:
+        self.csv = get_trips_csv(num_trips)
+
+    def read_data(self) -> pd.DataFrame:
+        return bt.read_data(
+            self.csv, dtypes_dict_trips, date_cols, nan_cols, duplicated_cols
+        )
+
+    def time_read_data(self, num_trips: int) -> None:
+        self.read_data()
+
+    def peakmem_read_data(self, num_trips: int) -> None:
+        self.read_data()
+
+
+class ProcessTripsData(TripsStage):
+    """Add datetime attributes to cleaned trips."""
+
+    def setup(self, num_trips: int) -> None:
+        self.df = get_cleaned_trips(num_trips)
+
+    def time_process_trips_data(self, num_trips: int) -> None:
+        process_trips_data(self.df)
+
+    def peakmem_process_trips_data(self, num_trips: int) -> None:
+        process_trips_data(self.df)
+
+
+class MergeTripsNeighbourhoodStats(TripsStage):
+    """Merge processed trips with stations and neighbourhood stats."""
+
+    def setup(self, num_trips: int) -> None:
+        self.df = process_trips_data(get_cleaned_trips(num_trips))
+        self.df_stations_stats = make_synthetic_stations_stats()
+
+    def time_merge_trips_neighbourhood_stats(self, num_trips: int) -> None:
+        ad.merge_trips_neighbourhood_stats(self.df, self.df_stations_stats)
+
+    def peakmem_merge_trips_neighbourhood_stats(self, num_trips: int) -> None:
+        ad.merge_trips_neighbourhood_stats(self.df, self.df_stations_stats)
+
+
+class AggregateMergedData(TripsStage):
+    """Aggregate merged trips."""
+
+    def setup(self, num_trips: int) -> None:
+        self.df_merged = ad.merge_trips_neighbourhood_stats(
+            process_trips_data(get_cleaned_trips(num_trips)),
+            make_synthetic_stations_stats(),
+        )
+
+    def aggregate_merged_data(self) -> pd.DataFrame:
+        return ad.aggregate_merged_data(
+            self.df_merged, "trips.zip", True, "trips.csv", last_mod
+        )
+
+    def time_aggregate_merged_data(self, num_trips: int) -> None:
+        self.aggregate_merged_data()
+
+    def peakmem_aggregate_merged_data(self, num_trips: int) -> None:
+        self.aggregate_merged_data()
+
+
+class UpdateParquetFileData(TripsStage):
+    """Replace outdated zip file's aggregated trips in Parquet file."""
+
+    def setup(self, num_trips: int) -> None:
+        df_merged = ad.merge_trips_neighbourhood_stats(
+            process_trips_data(get_cleaned_trips(num_trips)),
+            make_synthetic_stations_stats(),
+        )
+        self.df_agg = ad.aggregate_merged_data(
+            df_merged, "trips.zip", True, "trips.csv", last_mod
+        )
+        self.tmp_dir = TemporaryDirectory()
+        self.raw_data_filepath = os.path.join(self.tmp_dir.name, "raw.gzip")
+        self.updated_data_filepath = os.path.join(
+            self.tmp_dir.name, "updated.gzip"
+        )
+        # Current file holds aggregates of an older zip file and of the
+        # (outdated) zip file being updated
+        pd.concat(
+            [self.df_agg.assign(zip_file="older.zip"), self.df_agg],
+            ignore_index=True,
+        ).to_parquet(self.raw_data_filepath, index=False)
+
+    def teardown(self, num_trips: int) -> None:
+        self.tmp_dir.cleanup()
+
+    def time_update_parquet_file_data(self, num_trips: int) -> None:
+        ad.update_parquet_file_data(
+            self.df_agg, self.raw_data_filepath, self.updated_data_filepath
+        )
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare aggregation engines for single month of merged trips data."""
+
+# pylint: disable=invalid-name
+
+
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict
+
+import pandas as pd
+
+import src.aggregate_data as ad
+import src.trips as bt
+from benchmarks.bench_trips_readers import (
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    nan_cols,
+)
+from benchmarks.synthetic_data import (
+    make_synthetic_month_trips,
+    make_synthetic_stations_stats,
+    run_benchmark_cli,
+)
+from src.process_trips import process_trips_data
+
+last_mod = pd.Timestamp("2022-01-01", tz="America/Toronto").as_unit("ns")
+
+
+def get_merged_trips(
+    num_trips: int, compact: bool, year: int = 2021
+) -> pd.DataFrame:
+    """Get single month of synthetic trips merged with station stats."""
+    with TemporaryDirectory() as data_dir:
+        csv_filepath = os.path.join(data_dir, f"{year}-01.csv")
+        make_synthetic_month_trips(year, 1, num_trips).to_csv(
+            csv_filepath, index=False, encoding="cp1252"
+        )
+        df = bt.get_single_ridership_data_file(
+            csv_filepath,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            False,
+            compact=compact,
+        )
+    df = process_trips_data(df, False, compact=compact)
+    return ad.merge_trips_neighbourhood_stats(
+        df, make_synthetic_stations_stats(), False, compact=compact
+    )
+
+
+def aggregate(data_merged: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """Aggregate merged trips from single synthetic CSV file."""
+    return ad.aggregate_merged_data(
+        data_merged, "trips.zip", True, "trips.csv", last_mod, **kwargs
+    )
+
+
+def groupby_agg(data_merged: pd.DataFrame, engine: str) -> pd.DataFrame:
+    """Only group and aggregate merged trips, without validating them."""
+    if engine == "numpy":
+        return ad.groupby_agg_numpy(data_merged, ad.agg_keys, ad.agg_funcs)
+    return data_merged.groupby(ad.agg_keys, as_index=False, observed=True).agg(
+        ad.agg_funcs
+    )
+
+
+def run_benchmark(num_trips: int) -> pd.DataFrame:
+    """Time aggregation engines and check their outputs are identical."""
+    timings = []
+    for compact in [False, True]:
+        data_merged = get_merged_trips(num_trips, compact)
+        dfs_agg: Dict[str, pd.DataFrame] = {}
+        for engine in ["pandas", "numpy"]:
+            start = perf_counter()
+            dfs_agg[engine] = aggregate(
+                data_merged, compact=compact, engine=engine
+            )
+            duration = perf_counter() - start
+            start = perf_counter()
+            groupby_agg(data_merged, engine)
+            groupby_duration = perf_counter() - start
+            timings.append(
+                {
+                    "engine": engine,
+                    "compact": compact,
+                    "seconds": duration,
+                    "groupby_seconds": groupby_duration,
+                    "groupby_trips_per_sec": (
+                        len(data_merged) / groupby_duration
+                    ),
+                }
+            )
+        pd.testing.assert_frame_equal(dfs_agg["pandas"], dfs_agg["numpy"])
+    return pd.DataFrame.from_records(timings).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-trips": {
+                "type": int,
+                "default": 1_000_000,
+                "help": "number of synthetic trips in the month",
+            },
+        },
+    )
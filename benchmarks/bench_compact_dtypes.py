@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare memory used by default and compact trips dtypes."""
+
+# pylint: disable=invalid-name
+
+
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+import src.trips as bt
+from benchmarks.bench_trips_readers import (
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    nan_cols,
+)
+from benchmarks.synthetic_data import (
+    run_benchmark_cli,
+    write_synthetic_trips_csvs,
+)
+from src.process_trips import process_trips_data
+from src.utils import get_memory_report
+
+
+def run_benchmark(trips_per_month: int, year: int = 2021) -> pd.DataFrame:
+    """Get memory report for single month of processed synthetic trips."""
+    with TemporaryDirectory() as data_dir:
+        csv_filepath = write_synthetic_trips_csvs(
+            data_dir, year, trips_per_month
+        )[0]
+        dfs = [
+            process_trips_data(
+                bt.get_single_ridership_data_file(
+                    csv_filepath,
+                    dtypes_dict_trips,
+                    date_cols,
+                    nan_cols,
+                    duplicated_cols,
+                    False,
+                    compact=compact,
+                ),
+                False,
+                compact=compact,
+            )
+            for compact in [False, True]
+        ]
+    return get_memory_report(*dfs)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--trips-per-month": {
+                "type": int,
+                "default": 250_000,
+                "help": "number of synthetic trips in the month",
+            },
+        },
+        index=True,
+    )
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare per-row eval and regex parsing of POI coordinates."""
+
+# pylint: disable=invalid-name
+
+
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import city_bounds, run_benchmark_cli
+from v1.src.city_pub_data import extract_coordinates
+
+
+def make_poi_geometries(num_rows: int, seed: int = 42) -> pd.Series:
+    """Get geometry strings like those in the points of interest file."""
+    rng = np.random.default_rng(seed)
+    lons = rng.uniform(city_bounds[0], city_bounds[2], num_rows)
+    lats = rng.uniform(city_bounds[1], city_bounds[3], num_rows)
+    return pd.Series(
+        [
+            f"{{'type': 'Point', 'coordinates': ({lon}, {lat})}}"
+            for lon, lat in zip(lons, lats)
+        ]
+    )
+
+
+def extract_coordinates_eval(geometry: pd.Series) -> pd.DataFrame:
+    """Get longitude and latitude by evaluating each geometry string."""
+    return pd.DataFrame(
+        geometry.apply(eval).apply(lambda g: g["coordinates"]).tolist(),
+        columns=["lon", "lat"],
+    )
+
+
+def run_benchmark(num_rows: int, poi_file: Optional[str]) -> pd.DataFrame:
+    """Time both parsers and check they get identical coordinates."""
+    if poi_file:
+        geometry = pd.read_csv(poi_file, usecols=["geometry"])["geometry"]
+    else:
+        geometry = make_poi_geometries(num_rows)
+    dfs, timings = {}, []
+    for name, func in [
+        ("apply_eval", extract_coordinates_eval),
+        ("str_extract", extract_coordinates),
+    ]:
+        start = perf_counter()
+        dfs[name] = func(geometry)
+        timings.append(
+            {
+                "method": name,
+                "num_rows": len(geometry),
+                "seconds": perf_counter() - start,
+            }
+        )
+    pd.testing.assert_frame_equal(dfs["apply_eval"], dfs["str_extract"])
+    return pd.DataFrame.from_records(timings).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-rows": {
+                "type": int,
+                "default": 100_000,
+                "help": "number of synthetic geometry strings",
+            },
+            "--poi-file": {
+                "type": str,
+                "default": None,
+                "help": "local points of interest CSV, used instead",
+            },
+        },
+    )
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare datetime attribute extraction with pandas and NumPy."""
+
+# pylint: disable=invalid-name
+
+
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import add_speedup, run_benchmark_cli
+from src.process_trips import add_datepart
+
+
+def add_datepart_dt_accessor(df: pd.DataFrame) -> pd.DataFrame:
+    """Add datetime attributes with the pandas .dt accessor."""
+    df["START_year"] = df["START_TIME"].dt.year
+    df["START_month"] = df["START_TIME"].dt.month
+    df["START_weekday"] = (
+        df["START_TIME"].dt.day_name().astype(pd.StringDtype())
+    )
+    df["START_hour"] = df["START_TIME"].dt.hour
+    return df
+
+
+def make_start_times(num_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Get random trip start times within 2021-2022."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2021-01-01").value
+    end = pd.Timestamp("2023-01-01").value
+    # Round to the minute, like the raw ridership data
+    ns = rng.integers(start, end, num_rows) // 60_000_000_000 * 60_000_000_000
+    return pd.DataFrame({"START_TIME": pd.to_datetime(ns)})
+
+
+def run_benchmark(num_rows: int) -> pd.DataFrame:
+    """Time datetime attribute extraction and check results are identical."""
+    df = make_start_times(num_rows)
+    funcs = {
+        "dt_accessor": add_datepart_dt_accessor,
+        "numpy": add_datepart,
+        "numpy_compact": lambda df: add_datepart(df, compact=True),
+    }
+    dfs, timings = {}, []
+    for name, func in funcs.items():
+        start = perf_counter()
+        dfs[name] = func(df.copy())
+        timings.append({"method": name, "seconds": perf_counter() - start})
+    expected = dfs["dt_accessor"]
+    for name, df_datepart in dfs.items():
+        for c in ["START_year", "START_month", "START_hour"]:
+            assert (df_datepart[c] == expected[c]).all(), (name, c)
+        assert (
+            df_datepart["START_weekday"].astype(pd.StringDtype())
+            == expected["START_weekday"]
+        ).all(), name
+    return add_speedup(pd.DataFrame.from_records(timings)).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-rows": {
+                "type": int,
+                "default": 5_000_000,
+                "help": "number of synthetic trip start times",
+            },
+        },
+    )
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare spatial join and vectorized neighbourhood lookup of points."""
+
+# pylint: disable=invalid-name
+
+
+from time import perf_counter
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+import src.city_neighbourhoods as cn
+from benchmarks.synthetic_data import (
+    city_bounds,
+    make_synthetic_neighbourhoods,
+    run_benchmark_cli,
+)
+
+
+def make_points(num_points: int, seed: int = 42) -> pd.DataFrame:
+    """Get random point locations within the city bounding box."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "point_id": np.arange(num_points),
+            "lat": rng.uniform(city_bounds[1], city_bounds[3], num_points),
+            "lon": rng.uniform(city_bounds[0], city_bounds[2], num_points),
+        }
+    )
+
+
+def run_benchmark(nums_points: List[int]) -> pd.DataFrame:
+    """Time both lookups and check they find the same neighbourhoods."""
+    gdf = make_synthetic_neighbourhoods()
+    timings = []
+    for num_points in nums_points:
+        df = make_points(num_points)
+
+        start = perf_counter()
+        df_sjoin = cn.get_data_with_neighbourhood(
+            gdf, df, "lat", "lon", "point_id"
+        )
+        sjoin_duration = perf_counter() - start
+
+        start = perf_counter()
+        neighbourhood_index = cn.get_neighbourhood_index(gdf)
+        codes = cn.get_neighbourhood_codes(
+            neighbourhood_index, df["lon"].to_numpy(), df["lat"].to_numpy()
+        )
+        codes_duration = perf_counter() - start
+
+        assert (codes >= 0).sum() == len(df_sjoin)
+        assert (
+            neighbourhood_index["area_names"][codes[codes >= 0]]
+            == df_sjoin.sort_values("point_id")["AREA_NAME"].to_numpy()
+        ).all()
+        timings.append(
+            {
+                "num_points": num_points,
+                "sjoin_seconds": sjoin_duration,
+                "contains_xy_seconds": codes_duration,
+                "speedup": sjoin_duration / codes_duration,
+            }
+        )
+    return pd.DataFrame.from_records(timings).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-points": {
+                "type": int,
+                "nargs": "+",
+                "dest": "nums_points",
+                "default": [10_000, 100_000, 1_000_000],
+                "help": "numbers of points to look up",
+            },
+        },
+    )
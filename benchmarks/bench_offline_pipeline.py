@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Time getting the pipeline data from recorded responses, offline."""
+
+# pylint: disable=invalid-name
+
+
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.synthetic_data import run_benchmark_cli
+from benchmarks.synthetic_fixtures import (
+    about_params,
+    neigh_boundary_params,
+    trips_params,
+    url,
+    write_synthetic_fixtures,
+)
+from src.http_client import get_session
+from src.http_fixtures import mount_fixtures
+from src.supplementary_data import get_supplementary_datasets
+from src.trips import get_data_zip_file_download_status, get_file_urls
+
+stations_cols_wanted = [
+    "station_id",
+    "name",
+    "physical_configuration",
+    "lat",
+    "lon",
+    "altitude",
+    "address",
+    "capacity",
+    "physicalkey",
+    "transitcard",
+    "creditcard",
+    "phone",
+]
+neigh_cols_to_show = [
+    "AREA_ID",
+    "AREA_SHORT_CODE",
+    "AREA_LONG_CODE",
+    "AREA_NAME",
+    "Shape__Area",
+    "AREA_LATITUDE",
+    "AREA_LONGITUDE",
+    "geometry",
+]
+
+
+def get_pipeline_data(years: List[int]) -> Dict[str, float]:
+    """Time each step getting the pipeline data over HTTP."""
+    durations = {}
+    start = perf_counter()
+    df_urls = get_file_urls(url, trips_params, years)
+    durations["get_file_urls"] = perf_counter() - start
+    start = perf_counter()
+    get_data_zip_file_download_status(df_urls, os.path.join("data", "raw"))
+    durations["get_data_zip_file_download_status"] = perf_counter() - start
+    start = perf_counter()
+    get_supplementary_datasets(
+        url,
+        about_params,
+        stations_cols_wanted,
+        neigh_boundary_params,
+        neigh_cols_to_show,
+    )
+    durations["get_supplementary_datasets"] = perf_counter() - start
+    return durations
+
+
+def run_benchmark(
+    years: List[int],
+    trips_per_month: int,
+    latency: float,
+    bandwidth: Optional[float],
+) -> pd.DataFrame:
+    """Get pipeline data twice, with an empty and a filled HTTP cache."""
+    timings = []
+    with TemporaryDirectory() as fixtures_dir, TemporaryDirectory() as wd:
+        write_synthetic_fixtures(fixtures_dir, years, trips_per_month)
+        mount_fixtures(get_session(), fixtures_dir, latency, bandwidth)
+        # Write downloads and HTTP cache to a scratch working directory
+        cwd = os.getcwd()
+        os.chdir(wd)
+        os.makedirs(os.path.join("data", "raw"))
+        try:
+            for run in ["cold", "warm"]:
+                for step, duration in get_pipeline_data(years).items():
+                    timings.append(
+                        {"run": run, "step": step, "seconds": duration}
+                    )
+        finally:
+            os.chdir(cwd)
+    return pd.DataFrame.from_records(timings).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--years": {
+                "type": int,
+                "nargs": "+",
+                "default": [2021],
+                "help": "years of synthetic trips",
+            },
+            "--trips-per-month": {
+                "type": int,
+                "default": 10_000,
+                "help": "number of synthetic trips per month",
+            },
+            "--latency": {
+                "type": float,
+                "default": 0.05,
+                "help": "seconds before each response",
+            },
+            "--bandwidth": {
+                "type": float,
+                "default": None,
+                "help": "response bytes per second (default: unlimited)",
+            },
+        },
+    )
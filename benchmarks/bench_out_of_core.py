@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare in-memory and chunked aggregation of trips files."""
+
+# pylint: disable=invalid-name
+
+
+import os
+import tracemalloc
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+import src.aggregate_data as ad
+import src.trips as bt
+from benchmarks.bench_aggregation import last_mod
+from benchmarks.bench_trips_readers import (
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    nan_cols,
+)
+from benchmarks.synthetic_data import (
+    make_synthetic_month_trips,
+    make_synthetic_stations_stats,
+    run_benchmark_cli,
+)
+from src.process_trips import process_trips_data
+
+
+def write_synthetic_csvs(
+    data_dir: str, num_files: int, trips_per_file: int
+) -> List[str]:
+    """Write monthly synthetic trips CSV files."""
+    csvs = []
+    for k in range(num_files):
+        fpath = os.path.join(
+            data_dir, f"Bike share ridership 2021-{k:02d}.csv"
+        )
+        make_synthetic_month_trips(
+            2021, k % 12 + 1, trips_per_file, first_trip_id=k * trips_per_file
+        ).to_csv(fpath, index=False, encoding="cp1252")
+        csvs.append(fpath)
+    return csvs
+
+
+def aggregate_in_memory(csvs: List[str], station_index: Dict) -> pd.DataFrame:
+    """Aggregate each trips file after loading all its trips."""
+    dfs_agg = []
+    for fpath in csvs:
+        df = bt.get_single_ridership_data_file(
+            fpath, dtypes_dict_trips, date_cols, nan_cols, duplicated_cols
+        )
+        df = ad.add_station_keys(process_trips_data(df), station_index)
+        dfs_agg.append(
+            ad.aggregate_keyed_trips_data(
+                df,
+                station_index,
+                "trips.zip",
+                True,
+                os.path.basename(fpath),
+                last_mod,
+                preaggregate=True,
+            )
+        )
+    return pd.concat(dfs_agg, ignore_index=True)
+
+
+def aggregate_in_chunks(csvs: List[str], station_index: Dict) -> pd.DataFrame:
+    """Aggregate each trips file one chunk of trips at a time."""
+    return ad.aggregate_trips_files_in_chunks(
+        {fpath: ("trips.zip", True, last_mod) for fpath in csvs},
+        station_index,
+        dtypes_dict_trips,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+    )
+
+
+def trace(func: Callable, *args) -> Tuple[pd.DataFrame, float, float]:
+    """Get output, run time and peak traced memory (MB) of a function."""
+    tracemalloc.start()
+    start = perf_counter()
+    out = func(*args)
+    duration = perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, duration, peak_bytes / 1e6
+
+
+def run_benchmark(num_files: int, trips_per_file: int) -> pd.DataFrame:
+    """Trace both methods and check their outputs are identical."""
+    station_index = ad.get_station_index(make_synthetic_stations_stats())
+    timings, dfs_agg = [], {}
+    with TemporaryDirectory() as data_dir:
+        csvs = write_synthetic_csvs(data_dir, num_files, trips_per_file)
+        for name, func in [
+            ("in_memory", aggregate_in_memory),
+            ("in_chunks", aggregate_in_chunks),
+        ]:
+            dfs_agg[name], duration, peak_mb = trace(func, csvs, station_index)
+            timings.append(
+                {
+                    "method": name,
+                    "seconds": duration,
+                    "peak_memory_mb": peak_mb,
+                }
+            )
+    pd.testing.assert_frame_equal(*dfs_agg.values())
+    return pd.DataFrame.from_records(timings).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-files": {
+                "type": int,
+                "default": 3,
+                "help": "number of trips files",
+            },
+            "--trips-per-file": {
+                "type": int,
+                "default": 1_000_000,
+                "help": "number of synthetic trips per file",
+            },
+        },
+    )
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare aggregating wide merged trips with pre-aggregating stations."""
+
+# pylint: disable=invalid-name
+
+
+import os
+import tracemalloc
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict
+
+import pandas as pd
+
+import src.aggregate_data as ad
+import src.trips as bt
+from benchmarks.bench_aggregation import last_mod
+from benchmarks.bench_trips_readers import (
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    nan_cols,
+)
+from benchmarks.synthetic_data import (
+    make_synthetic_month_trips,
+    make_synthetic_stations_stats,
+    run_benchmark_cli,
+)
+from src.process_trips import process_trips_data
+
+
+def get_keyed_trips(
+    num_trips: int, station_index: Dict, compact: bool, year: int = 2021
+) -> pd.DataFrame:
+    """Get single month of synthetic trips with station keys."""
+    with TemporaryDirectory() as data_dir:
+        csv_filepath = os.path.join(data_dir, f"{year}-01.csv")
+        make_synthetic_month_trips(year, 1, num_trips).to_csv(
+            csv_filepath, index=False, encoding="cp1252"
+        )
+        df = bt.get_single_ridership_data_file(
+            csv_filepath,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            False,
+            compact=compact,
+        )
+    df = process_trips_data(df, False, compact=compact)
+    return ad.add_station_keys(df, station_index, False)
+
+
+def run_benchmark(num_trips: int) -> pd.DataFrame:
+    """Time and trace memory of both modes and check outputs are identical."""
+    station_index = ad.get_station_index(make_synthetic_stations_stats())
+    timings = []
+    for compact in [False, True]:
+        df_keyed = get_keyed_trips(num_trips, station_index, compact)
+        for engine in ["pandas", "numpy"]:
+            dfs_agg = {}
+            for preaggregate in [False, True]:
+                tracemalloc.start()
+                start = perf_counter()
+                dfs_agg[preaggregate] = ad.aggregate_keyed_trips_data(
+                    df_keyed,
+                    station_index,
+                    "trips.zip",
+                    True,
+                    "trips.csv",
+                    last_mod,
+                    compact=compact,
+                    engine=engine,
+                    preaggregate=preaggregate,
+                )
+                duration = perf_counter() - start
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                timings.append(
+                    {
+                        "compact": compact,
+                        "engine": engine,
+                        "preaggregate": preaggregate,
+                        "seconds": duration,
+                        "peak_memory_mb": peak_bytes / 1e6,
+                    }
+                )
+            pd.testing.assert_frame_equal(dfs_agg[False], dfs_agg[True])
+    return pd.DataFrame.from_records(timings).round(3)
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-trips": {
+                "type": int,
+                "default": 1_000_000,
+                "help": "number of synthetic trips in the month",
+            },
+        },
+    )
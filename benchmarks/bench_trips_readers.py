@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare CSV reader engines for single year of trips data."""
+
+# pylint: disable=invalid-name
+
+
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Optional
+
+import pandas as pd
+
+import src.trips as bt
+from benchmarks.synthetic_data import (
+    add_speedup,
+    run_benchmark_cli,
+    write_synthetic_trips_csvs,
+)
+
+dtypes_dict_trips = {
+    "Trip Id": pd.Int64Dtype(),
+    "Trip Duration": pd.Int64Dtype(),
+    "Start Station Id": pd.Int64Dtype(),
+    "Start Station Name": pd.StringDtype(),
+    "User Type": pd.StringDtype(),
+}
+date_cols = ["Start Time", "End Time"]
+nan_cols = ["START_STATION_ID", "START_STATION_NAME"]
+duplicated_cols = ["TRIP_ID", "START_TIME"]
+
+
+def read_all_files(csvs: List[str], engine: str) -> List[pd.DataFrame]:
+    """Read and clean all monthly trips files with a CSV reader engine."""
+    return [
+        bt.read_data(
+            f,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            engine=engine,
+        )
+        for f in csvs
+    ]
+
+
+def run_benchmark(
+    trips_per_month: int,
+    year: int = 2021,
+    engines: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Time each CSV reader engine on single year of synthetic trips."""
+    engines = engines or ["pandas", "pyarrow"]
+    timings = []
+    with TemporaryDirectory() as data_dir:
+        csvs = write_synthetic_trips_csvs(data_dir, year, trips_per_month)
+        dfs_by_engine = {}
+        for engine in engines:
+            start = perf_counter()
+            dfs_by_engine[engine] = read_all_files(csvs, engine)
+            duration = perf_counter() - start
+            timings.append(
+                dict(
+                    engine=engine,
+                    num_files=len(csvs),
+                    num_rows=sum(len(df) for df in dfs_by_engine[engine]),
+                    total_mb=sum(os.path.getsize(f) for f in csvs) / 1e6,
+                    duration_s=duration,
+                )
+            )
+    # Both engines must produce identical frames
+    for dfs in dfs_by_engine.values():
+        for df, df_ref in zip(dfs, dfs_by_engine[engines[0]]):
+            pd.testing.assert_frame_equal(df, df_ref)
+    return add_speedup(pd.DataFrame.from_records(timings), "duration_s")
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--trips-per-month": {
+                "type": int,
+                "default": 250_000,
+                "help": "number of synthetic trips in each monthly CSV file",
+            },
+        },
+    )
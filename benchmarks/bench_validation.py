@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compare run time of pandera validation across validation modes."""
+
+# pylint: disable=invalid-name
+
+
+import pandas as pd
+
+import src.utils as ut
+from benchmarks.bench_aggregation import aggregate, get_merged_trips
+from benchmarks.synthetic_data import run_benchmark_cli
+
+
+def run_benchmark(num_trips: int) -> pd.DataFrame:
+    """Get validation run time per stage, in each validation mode.
+
+    Stages are not timed when validation is off.
+    """
+    reports = []
+    for mode in ut.validation_modes:
+        ut.set_validation_mode(mode)
+        ut.validation_timings.clear()
+        aggregate(get_merged_trips(num_trips, False))
+        if mode != "off":
+            reports.append(ut.get_validation_report())
+    ut.set_validation_mode("full")
+    return pd.concat(reports).sort_index()
+
+
+if __name__ == "__main__":
+    run_benchmark_cli(
+        run_benchmark,
+        {
+            "--num-trips": {
+                "type": int,
+                "default": 1_000_000,
+                "help": "number of synthetic trips",
+            },
+        },
+        index=True,
+    )
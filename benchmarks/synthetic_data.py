@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Generate synthetic bikeshare trips and stations data."""
+
+# pylint: disable=invalid-name
+
+
+import argparse
+import json
+import os
+from typing import Callable, Dict, List
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import box
+
+# Bounding box (lon/lat) of the city, to place synthetic neighbourhoods in
+city_bounds = (-79.64, 43.58, -79.11, 43.86)
+
+raw_trips_header = [
+    "Trip Id",
+    "Trip  Duration",
+    "Start Station Id",
+    "Start Time",
+    "Start Station Name",
+    "End Station Id",
+    "End Time",
+    "End Station Name",
+    "Bike Id",
+    "User Type",
+]
+
+
+def get_synthetic_station_names(num_stations: int) -> List[str]:
+    """Get names of synthetic bikeshare stations."""
+    return [f"Station St / Synthetic Ave {k:04d}" for k in range(num_stations)]
+
+
+def make_synthetic_stations_feed(
+    num_stations: int = 600, seed: int = 42
+) -> List[Dict]:
+    """Create stations like those in the stations information JSON feed."""
+    rng = np.random.default_rng(seed)
+    names = get_synthetic_station_names(num_stations)
+    lons = rng.uniform(city_bounds[0], city_bounds[2], num_stations)
+    lats = rng.uniform(city_bounds[1], city_bounds[3], num_stations)
+    rental_methods = ["KEY", "TRANSITCARD", "CREDITCARD", "PHONE"]
+    return [
+        {
+            "station_id": str(7000 + k),
+            "name": name,
+            "physical_configuration": str(
+                rng.choice(["REGULAR", "ELECTRICBIKESTATION"])
+            ),
+            "lat": float(lats[k]),
+            "lon": float(lons[k]),
+            "altitude": 0.0,
+            "address": name,
+            "post_code": None,
+            "capacity": int(rng.integers(11, 47)),
+            "is_charging_station": bool(rng.random() < 0.05),
+            # Some stations do not accept phones, which are listed last
+            "rental_methods": rental_methods[: 4 - int(rng.random() < 0.1)],
+            "groups": [],
+            "obcn": f"647{k:07d}",
+            "nearby_distance": 500.0,
+            "cross_street": None,
+        }
+        for k, name in enumerate(names)
+    ]
+
+
+def make_synthetic_stations_stats(
+    num_stations: int = 600, num_neighbourhoods: int = 140, seed: int = 42
+) -> gpd.GeoDataFrame:
+    """Create stations with neighbourhood stats, to be joined to trips."""
+    rng = np.random.default_rng(seed)
+    neighbourhoods = rng.integers(0, num_neighbourhoods, num_stations)
+    # Neighbourhoods are unit squares along a line of longitude
+    neigh_geometries = [box(k, 0, k + 1, 1) for k in range(num_neighbourhoods)]
+    neigh_colleges_univs = rng.poisson(0.2, num_neighbourhoods)
+    return gpd.GeoDataFrame(
+        {
+            "AREA_NAME": pd.array(
+                [f"Synthetic Neighbourhood {k:03d}" for k in neighbourhoods],
+                dtype=pd.StringDtype(),
+            ),
+            "STATION_ID": 7000 + np.arange(num_stations),
+            "NAME": pd.array(
+                get_synthetic_station_names(num_stations),
+                dtype=pd.StringDtype(),
+            ),
+            "PHYSICAL_CONFIGURATION": pd.array(
+                rng.choice(["REGULAR", "ELECTRICBIKESTATION"], num_stations),
+                dtype=pd.StringDtype(),
+            ),
+            "CAPACITY": rng.integers(11, 47, num_stations),
+            "PHYSICALKEY": rng.integers(0, 2, num_stations),
+            "TRANSITCARD": rng.integers(0, 2, num_stations),
+            "CREDITCARD": np.ones(num_stations, dtype=int),
+            "PHONE": rng.integers(0, 2, num_stations),
+            "NEIGH_SHAPE_AREA": rng.uniform(1e6, 1e7, num_neighbourhoods)[
+                neighbourhoods
+            ],
+            "GEOMETRY": [neigh_geometries[k] for k in neighbourhoods],
+            "NEIGH_COLLEGES_UNIVS": neigh_colleges_univs[neighbourhoods],
+        },
+        geometry="GEOMETRY",
+        crs="EPSG:4326",
+    )
+
+
+def make_synthetic_neighbourhoods(
+    num_neighbourhoods: int = 140, seed: int = 42
+) -> gpd.GeoDataFrame:
+    """Create neighbourhood boundaries that tile the city bounding box."""
+    rng = np.random.default_rng(seed)
+    city_box = box(*city_bounds)
+    seeds = shapely.points(
+        rng.uniform(city_bounds[0], city_bounds[2], num_neighbourhoods),
+        rng.uniform(city_bounds[1], city_bounds[3], num_neighbourhoods),
+    )
+    cells = shapely.get_parts(
+        shapely.voronoi_polygons(
+            shapely.multipoints(seeds), extend_to=city_box
+        )
+    )
+    # Densify edges to roughly match the vertex count of real boundaries
+    geometries = shapely.segmentize(
+        shapely.intersection(cells, city_box), 0.0005
+    )
+    gdf = gpd.GeoDataFrame(
+        {
+            "AREA_NAME": pd.array(
+                [
+                    f"Synthetic Neighbourhood {k:03d}"
+                    for k in range(len(cells))
+                ],
+                dtype=pd.StringDtype(),
+            ),
+            "geometry": geometries,
+        },
+        crs="EPSG:4326",
+    )
+    gdf["Shape__Area"] = gdf["geometry"].to_crs(epsg=3857).area
+    return gdf
+
+
+def make_synthetic_month_trips(
+    year: int,
+    month: int,
+    num_trips: int,
+    num_stations: int = 600,
+    first_trip_id: int = 10_000_000,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """Create single month of trips data with raw CSV column names."""
+    rng = np.random.default_rng(seed + 100 * year + month)
+    month_start = pd.Timestamp(year=year, month=month, day=1)
+    month_secs = pd.Timedelta(days=month_start.days_in_month).total_seconds()
+    start_times = month_start + pd.to_timedelta(
+        np.sort(rng.integers(0, month_secs, num_trips)), unit="s"
+    )
+    durations = rng.gamma(2.0, 600.0, num_trips).astype(int) + 60
+    end_times = start_times + pd.to_timedelta(durations, unit="s")
+    names = np.array(get_synthetic_station_names(num_stations))
+    start_stations = rng.integers(0, num_stations, num_trips)
+    end_stations = rng.integers(0, num_stations, num_trips)
+    df = pd.DataFrame(
+        {
+            "Trip Id": np.arange(num_trips) + first_trip_id,
+            "Trip  Duration": durations,
+            "Start Station Id": (7000 + start_stations).astype(float),
+            "Start Time": start_times.strftime("%m/%d/%Y %H:%M"),
+            "Start Station Name": names[start_stations],
+            "End Station Id": (7000 + end_stations).astype(float),
+            "End Time": end_times.strftime("%m/%d/%Y %H:%M"),
+            "End Station Name": names[end_stations],
+            "Bike Id": rng.integers(1, 6_000, num_trips),
+            "User Type": rng.choice(
+                ["Annual Member", "Casual Member"], num_trips, p=[0.6, 0.4]
+            ),
+        }
+    )[raw_trips_header]
+    # Missing start stations, as found in the raw data
+    missing = rng.random(num_trips) < 0.001
+    df.loc[missing, "Start Station Id"] = np.nan
+    return df
+
+
+def write_synthetic_month_trips_csv(
+    fpath: str,
+    year: int,
+    month: int,
+    num_trips: int,
+    num_stations: int = 600,
+    first_trip_id: int = 10_000_000,
+    seed: int = 42,
+    trips_per_chunk: int = 1_000_000,
+) -> str:
+    """Write single month of synthetic trips, in chunks of trips."""
+    for k, chunk_start in enumerate(range(0, num_trips, trips_per_chunk)):
+        make_synthetic_month_trips(
+            year,
+            month,
+            min(trips_per_chunk, num_trips - chunk_start),
+            num_stations,
+            first_trip_id + chunk_start,
+            seed + k,
+        ).to_csv(
+            fpath,
+            index=False,
+            encoding="cp1252",
+            mode="w" if k == 0 else "a",
+            header=k == 0,
+        )
+    return fpath
+
+
+def write_synthetic_trips_csvs(
+    data_dir: str,
+    year: int,
+    trips_per_month: int,
+    num_stations: int = 600,
+    seed: int = 42,
+) -> List[str]:
+    """Write single year of synthetic monthly trips CSV files."""
+    csvs = []
+    for month in range(1, 13):
+        df = make_synthetic_month_trips(
+            year,
+            month,
+            trips_per_month,
+            num_stations,
+            10_000_000 + month * trips_per_month,
+            seed,
+        )
+        fpath = os.path.join(
+            data_dir, f"Bike share ridership {year}-{month:02d}.csv"
+        )
+        df.to_csv(fpath, index=False, encoding="cp1252")
+        csvs.append(fpath)
+    return csvs
+
+
+def write_synthetic_stations_feed(
+    fpath: str, num_stations: int = 600, seed: int = 42
+) -> str:
+    """Write synthetic stations in the stations information feed format."""
+    with open(fpath, "w") as f:
+        json.dump(
+            {
+                "data": {
+                    "stations": make_synthetic_stations_feed(
+                        num_stations, seed
+                    )
+                }
+            },
+            f,
+        )
+    return fpath
+
+
+def add_speedup(
+    df_timings: pd.DataFrame, seconds_col: str = "seconds"
+) -> pd.DataFrame:
+    """Add speedup of each method over the first (baseline) method."""
+    return df_timings.assign(
+        speedup=df_timings[seconds_col].iloc[0] / df_timings[seconds_col]
+    )
+
+
+def run_benchmark_cli(
+    run_benchmark: Callable[..., pd.DataFrame],
+    arguments: Dict[str, Dict],
+    index: bool = False,
+) -> None:
+    """Run a benchmark with command-line arguments and print its timings.
+
+    Each argument is named by its flag, whose destination must match a
+    parameter of run_benchmark, and takes the add_argument options.
+    """
+    parser = argparse.ArgumentParser()
+    for flag, options in arguments.items():
+        parser.add_argument(flag, **options)
+    args = parser.parse_args()
+    print(run_benchmark(**vars(args)).to_string(index=index))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default="data/synthetic",
+        help="directory in which to write synthetic data",
+    )
+    parser.add_argument(
+        "--year", type=int, default=2021, help="year of synthetic trips"
+    )
+    parser.add_argument(
+        "--trips-per-month",
+        type=int,
+        default=100_000,
+        help="number of synthetic trips per month",
+    )
+    parser.add_argument(
+        "--num-stations",
+        type=int,
+        default=600,
+        help="number of synthetic bikeshare stations",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    for month in range(1, 13):
+        print(
+            write_synthetic_month_trips_csv(
+                os.path.join(
+                    args.data_dir,
+                    f"Bike share ridership {args.year}-{month:02d}.csv",
+                ),
+                args.year,
+                month,
+                args.trips_per_month,
+                args.num_stations,
+                10_000_000 + month * args.trips_per_month,
+            )
+        )
+    print(
+        write_synthetic_stations_feed(
+            os.path.join(args.data_dir, "station_information.json"),
+            args.num_stations,
+        )
+    )
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Record synthetic Open Data Portal and GBFS responses, to run offline."""
+
+# pylint: disable=invalid-name
+
+
+import argparse
+import json
+import os
+import tempfile
+import zipfile
+from typing import Dict, List
+
+from benchmarks.synthetic_data import (
+    make_synthetic_neighbourhoods,
+    make_synthetic_stations_feed,
+    write_synthetic_month_trips_csv,
+)
+from src.http_fixtures import record_fixture
+
+url = (
+    "https://ckan0.cf.opendata.inter.prod-toronto.ca/api/3/action/package_show"
+)
+trips_params = {"id": "7e876c24-177c-4605-9cef-e50dd74c617f"}
+neigh_boundary_params = {"id": "4def3f65-2a65-4a4f-83c4-b2a4aed72d46"}
+about_params = {"id": "2b44db0d-eea9-442d-b038-79335368ad5a"}
+gbfs_url = "https://tor.publicbikesystem.net/ckan_api/gbfs/v1/gbfs.json"
+file_store_url = "https://ckan0.cf.opendata.inter.prod-toronto.ca/dataset"
+last_modified = "2022-01-20T14:00:00.000000"
+
+
+def get_package(params: Dict, resources: List[Dict]) -> bytes:
+    """Get package_show response body listing resources of a package."""
+    return json.dumps(
+        {
+            "success": True,
+            "result": {"id": params["id"], "resources": resources},
+        }
+    ).encode()
+
+
+def get_resource(
+    package_id: str, name: str, fmt: str, resource_url: str
+) -> Dict:
+    """Get metadata of a single package resource."""
+    return {
+        "id": f"{package_id}-{name}",
+        "name": name,
+        "format": fmt,
+        "state": "active",
+        "url": resource_url,
+        "last_modified": last_modified,
+    }
+
+
+def write_trips_fixtures(
+    fixtures_dir: str,
+    years: List[int],
+    trips_per_month: int,
+    num_stations: int = 600,
+    seed: int = 42,
+) -> None:
+    """Record bikeshare ridership package with zipped monthly trips files."""
+    resources = []
+    first_trip_id = 10_000_000
+    for year in years:
+        name = f"bikeshare-ridership-{year}"
+        zip_url = f"{file_store_url}/{trips_params['id']}/{name}.zip"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_filepath = os.path.join(tmp_dir, f"{name}.zip")
+            with zipfile.ZipFile(zip_filepath, "w", zipfile.ZIP_DEFLATED) as z:
+                for month in range(1, 13):
+                    fname = f"Bike share ridership {year}-{month:02d}.csv"
+                    write_synthetic_month_trips_csv(
+                        os.path.join(tmp_dir, fname),
+                        year,
+                        month,
+                        trips_per_month,
+                        num_stations,
+                        first_trip_id,
+                        seed,
+                    )
+                    first_trip_id += trips_per_month
+                    z.write(os.path.join(tmp_dir, fname), fname)
+            with open(zip_filepath, "rb") as f:
+                record_fixture(
+                    fixtures_dir,
+                    zip_url,
+                    f.read(),
+                    headers={"Content-Type": "application/zip"},
+                    filename=f"{name}.zip",
+                )
+        resources.append(
+            get_resource(trips_params["id"], name, "ZIP", zip_url)
+        )
+    record_fixture(
+        fixtures_dir,
+        url,
+        get_package(trips_params, resources),
+        trips_params,
+        {"Content-Type": "application/json"},
+        "package_trips.json",
+    )
+
+
+def write_stations_fixtures(
+    fixtures_dir: str, num_stations: int = 600, seed: int = 42
+) -> None:
+    """Record stations package, GBFS discovery and station_information."""
+    feeds_url = os.path.dirname(gbfs_url)
+    feeds = [
+        {"name": name, "url": f"{feeds_url}/en/{name}"}
+        for name in [
+            "system_information",
+            "station_status",
+            "station_information",
+            "system_pricing_plans",
+            "system_regions",
+        ]
+    ]
+    json_header = {"Content-Type": "application/json"}
+    record_fixture(
+        fixtures_dir,
+        url,
+        get_package(
+            about_params,
+            [get_resource(about_params["id"], "gbfs", "JSON", gbfs_url)],
+        ),
+        about_params,
+        json_header,
+        "package_stations.json",
+    )
+    record_fixture(
+        fixtures_dir,
+        gbfs_url,
+        json.dumps({"data": {"en": {"feeds": feeds}}}).encode(),
+        headers=json_header,
+        filename="gbfs.json",
+    )
+    record_fixture(
+        fixtures_dir,
+        feeds[2]["url"],
+        json.dumps(
+            {
+                "data": {
+                    "stations": make_synthetic_stations_feed(
+                        num_stations, seed
+                    )
+                }
+            }
+        ).encode(),
+        headers=json_header,
+        filename="station_information.json",
+    )
+
+
+def write_neighbourhood_fixtures(
+    fixtures_dir: str, num_neighbourhoods: int = 140, seed: int = 42
+) -> None:
+    """Record neighbourhoods package and its boundaries GeoJSON."""
+    geojson_url = (
+        f"{file_store_url}/{neigh_boundary_params['id']}/"
+        "neighbourhoods-4326.geojson"
+    )
+    gdf = make_synthetic_neighbourhoods(num_neighbourhoods, seed).drop(
+        columns=["Shape__Area"]
+    )
+    # Ids beyond 32 bits, so every GeoJSON reader loads them as int64
+    gdf.insert(0, "AREA_ID", range(2**32, 2**32 + len(gdf)))
+    gdf.insert(1, "AREA_SHORT_CODE", [f"{k:03d}" for k in range(len(gdf))])
+    gdf.insert(2, "AREA_LONG_CODE", gdf["AREA_SHORT_CODE"])
+    record_fixture(
+        fixtures_dir,
+        url,
+        get_package(
+            neigh_boundary_params,
+            [
+                get_resource(
+                    neigh_boundary_params["id"],
+                    "neighbourhoods-4326",
+                    "GeoJSON",
+                    geojson_url,
+                )
+            ],
+        ),
+        neigh_boundary_params,
+        {"Content-Type": "application/json"},
+        "package_neighbourhoods.json",
+    )
+    record_fixture(
+        fixtures_dir,
+        geojson_url,
+        gdf.to_json().encode(),
+        headers={"Content-Type": "application/geo+json"},
+        filename="neighbourhoods-4326.geojson",
+    )
+
+
+def write_synthetic_fixtures(
+    fixtures_dir: str,
+    years: List[int],
+    trips_per_month: int = 100_000,
+    num_stations: int = 600,
+    seed: int = 42,
+) -> str:
+    """Record all responses needed to get the pipeline data offline."""
+    write_trips_fixtures(
+        fixtures_dir, years, trips_per_month, num_stations, seed
+    )
+    write_stations_fixtures(fixtures_dir, num_stations, seed)
+    write_neighbourhood_fixtures(fixtures_dir, seed=seed)
+    return fixtures_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--fixtures-dir",
+        type=str,
+        default="data/fixtures",
+        help="directory in which to record fixtures",
+    )
+    parser.add_argument(
+        "--years",
+        type=int,
+        nargs="+",
+        default=[2021],
+        help="years of synthetic trips",
+    )
+    parser.add_argument(
+        "--trips-per-month",
+        type=int,
+        default=100_000,
+        help="number of synthetic trips per month",
+    )
+    parser.add_argument(
+        "--num-stations",
+        type=int,
+        default=600,
+        help="number of synthetic bikeshare stations",
+    )
+    args = parser.parse_args()
+
+    print(
+        write_synthetic_fixtures(
+            args.fixtures_dir,
+            args.years,
+            args.trips_per_month,
+            args.num_stations,
+        )
+    )
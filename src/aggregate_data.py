@@ -7,13 +7,36 @@
 # pylint: disable=invalid-name,dangerous-default-value
 
 
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import pandera as pa
+from pyarrow import dataset as pa_ds
 
 from src.city_pub_data import gdf_schema
-from src.process_trips import trips_schema_processed_v2
-from src.utils import log_prefect, save_data_to_parquet_file
+from src.process_trips import (
+    add_datepart,
+    compact_datepart_dtypes,
+    trips_schema_processed_v2,
+    trips_schema_processed_v2_compact,
+)
+from src.trips import (
+    compact_trips_dtypes,
+    read_data_chunks,
+    to_compact_dtypes,
+)
+from src.utils import (
+    check_io,
+    format_timestamp_utc,
+    get_freshness_metadata,
+    log_prefect,
+    profile_stage,
+    save_data_to_parquet_file,
+)
 
 stations_schema_merged = pa.DataFrameSchema(
     columns={
@@ -108,6 +131,28 @@ merge_trips_neighbourhood_schema = pa.DataFrameSchema(
     },
     index=pa.Index(pa.Int),
 )
+compact_merged_dtypes = {
+    **compact_trips_dtypes,
+    **compact_datepart_dtypes,
+    "AREA_NAME": "category",
+    "PHYSICAL_CONFIGURATION": "category",
+}
+merge_trips_neighbourhood_schema_compact = (
+    merge_trips_neighbourhood_schema.update_columns(
+        {
+            "TRIP__DURATION": {"dtype": pa.Int32},
+            "START_STATION_ID": {"dtype": pd.Int32Dtype()},
+            "START_STATION_NAME": {"dtype": pa.Category},
+            "USER_TYPE": {"dtype": pa.Category},
+            "START_year": {"dtype": pa.Int16},
+            "START_month": {"dtype": pa.Int8},
+            "START_weekday": {"dtype": pa.Category},
+            "START_hour": {"dtype": pa.Int8},
+            "AREA_NAME": {"dtype": pa.Category},
+            "PHYSICAL_CONFIGURATION": {"dtype": pa.Category},
+        }
+    )
+)
 agg_schema = pa.DataFrameSchema(
     columns={
         "AREA_NAME": pa.Column(pd.StringDtype()),
@@ -142,9 +187,55 @@ agg_schema = pa.DataFrameSchema(
     },
     index=pa.Index(pa.Int),
 )
+# Dtypes of aggregated data columns, where they differ from the aggregations
+agg_dtypes = {
+    "AREA_NAME": pd.StringDtype(),
+    "USER_TYPE": pd.StringDtype(),
+    "START_year": pd.Int64Dtype(),
+    "START_month": "int64",
+    "START_weekday": pd.StringDtype(),
+    "START_hour": "int64",
+    "TRIP_DURATION": pd.Int64Dtype(),
+    "csv_file": pd.StringDtype(),
+    "zip_file": pd.StringDtype(),
+    "downloaded_file": pd.BooleanDtype(),
+}
+agg_keys = [
+    "AREA_NAME",
+    "USER_TYPE",
+    "START_year",
+    "START_month",
+    "START_weekday",
+    "START_hour",
+]
+agg_funcs = {
+    "TRIP__DURATION": "sum",
+    "START_STATION_NAME": "nunique",
+    "START_TIME": "count",
+    "CAPACITY": "sum",
+    "PHYSICALKEY": "sum",
+    "TRANSITCARD": "sum",
+    "CREDITCARD": "sum",
+    "PHONE": "sum",
+    "NEIGH_COLLEGES_UNIVS": "sum",
+    # "GEOMETRY": "first",
+}
+# Partial aggregations of trips per group and station, which can be summed
+# across chunks of trips. Stations' names are kept to count distinct names
+partial_agg_keys = agg_keys[1:] + ["STATION_KEY", "START_STATION_NAME"]
+partial_agg_funcs = {"TRIP__DURATION": "sum", "START_TIME": "count"}
+# Station attributes summed over trips
+station_attrs_summed = [
+    "CAPACITY",
+    "PHYSICALKEY",
+    "TRANSITCARD",
+    "CREDITCARD",
+    "PHONE",
+    "NEIGH_COLLEGES_UNIVS",
+]
 
 
-@pa.check_io(
+@check_io(
     df=stations_schema_merged,
     df_neighbourhood_stats=neigh_stats_schema_v2,
     out=stations_new_schema_v2,
@@ -175,7 +266,7 @@ def combine_stations_metadata_neighbourhood_v2(
     return df_merged
 
 
-@pa.check_io(
+@check_io(
     gdf=gdf_schema,
     df_coll_univ_new=coll_univ_schema_new,
     out=neigh_stats_schema_v2,
@@ -220,7 +311,152 @@ def combine_neigh_stats_v2(
     return df_neigh_stats
 
 
-@pa.check_io(
+def get_station_index(
+    df_stations_stats: pd.DataFrame,
+    name_aliases: Optional[Dict[str, int]] = None,
+) -> Dict:
+    """Build integer station keys for bikeshare stations, once per update.
+
+    Station keys are row positions in the station dimension. Trips are
+    mapped to keys by their START_STATION_ID using the index of station IDs
+    and, if their ID is unknown, by their START_STATION_NAME using the
+    table of station names and optional aliases (eg. old names of renamed
+    stations).
+    """
+    dimension = (
+        df_stations_stats.reset_index(drop=True)
+        .astype(
+            {
+                "STATION_ID": pd.Int64Dtype(),
+                "CAPACITY": pd.Int64Dtype(),
+                "PHYSICALKEY": pd.Int64Dtype(),
+                "TRANSITCARD": pd.Int64Dtype(),
+                "CREDITCARD": pd.Int64Dtype(),
+                "PHONE": pd.Int64Dtype(),
+                "NEIGH_COLLEGES_UNIVS": pd.Int64Dtype(),
+            }
+        )
+        .rename_axis("STATION_KEY")
+    )
+    # Hashed index of station IDs, since IDs can be large and sparse. The
+    # last station listed with an ID takes precedence
+    is_last_of_id = ~dimension["STATION_ID"].duplicated(keep="last")
+    station_index = {
+        "dimension": dimension,
+        "station_ids": pd.Index(
+            dimension.loc[is_last_of_id, "STATION_ID"].to_numpy(dtype="int64")
+        ),
+        "id_keys": dimension.index[is_last_of_id].to_numpy(dtype="int32"),
+    }
+    aliases = pd.Series(name_aliases or {}, dtype="int64")
+    alias_table = pd.Series(
+        np.concatenate(
+            [
+                dimension.index.to_numpy(dtype="int32"),
+                get_station_keys_by_id(aliases.to_numpy(), station_index),
+            ]
+        ),
+        index=np.concatenate(
+            [
+                dimension["NAME"].to_numpy(dtype=object),
+                aliases.index.to_numpy(dtype=object),
+            ]
+        ),
+    )
+    alias_table = alias_table[alias_table >= 0]
+    # Station names in the metadata take precedence over aliases
+    alias_table = alias_table[~alias_table.index.duplicated(keep="first")]
+    station_index["alias_names"] = pd.Index(alias_table.index.astype(str))
+    station_index["alias_keys"] = alias_table.to_numpy(dtype="int32")
+    return station_index
+
+
+def get_station_keys_by_id(ids: np.ndarray, station_index: Dict) -> np.ndarray:
+    """Look up station keys of station IDs, or -1 if an ID is unknown."""
+    positions = station_index["station_ids"].get_indexer(ids)
+    keys = np.full(len(ids), -1, dtype="int32")
+    found = positions >= 0
+    keys[found] = station_index["id_keys"][positions[found]]
+    return keys
+
+
+def get_station_keys(
+    df_trips: pd.DataFrame, station_index: Dict
+) -> np.ndarray:
+    """Look up station keys of trips, or -1 if no station is found."""
+    keys = get_station_keys_by_id(
+        df_trips["START_STATION_ID"].to_numpy(dtype="int64", na_value=-1),
+        station_index,
+    )
+    # Fall back to station names for trips with unknown station IDs
+    no_key = keys < 0
+    if no_key.any():
+        codes = pd.Categorical(
+            df_trips["START_STATION_NAME"].to_numpy()[no_key],
+            categories=station_index["alias_names"],
+        ).codes
+        found = codes >= 0
+        keys[np.flatnonzero(no_key)[found]] = station_index["alias_keys"][
+            codes[found]
+        ]
+    return keys
+
+
+@profile_stage
+def add_station_keys(
+    df_trips: pd.DataFrame, station_index: Dict, use_prefect: bool = False
+) -> pd.DataFrame:
+    """Add integer station keys to trips, dropping trips with no station."""
+    log_prefect("Adding station keys to trips...", True, use_prefect)
+    keys = get_station_keys(df_trips, station_index)
+    matched = keys >= 0
+    if not matched.all():
+        unmatched_names = (
+            df_trips.loc[~matched, "START_STATION_NAME"]
+            .astype(str)
+            .value_counts()
+            .head(5)
+            .index.tolist()
+        )
+        log_prefect(
+            f"Dropped {(~matched).sum():,} of {len(keys):,} trips with no "
+            f"matching station, eg. {unmatched_names}",
+            True,
+            use_prefect,
+        )
+        df_trips, keys = df_trips[matched], keys[matched]
+    df_trips = df_trips.assign(STATION_KEY=keys)
+    log_prefect("Done adding station keys.", False, use_prefect)
+    return df_trips
+
+
+def attach_station_dimension(
+    df_trips_keyed: pd.DataFrame, station_index: Dict, compact: bool = False
+) -> pd.DataFrame:
+    """Attach station and neighbourhood attributes to keyed trips."""
+    dimension = station_index["dimension"].drop(columns=["NAME"])
+    if compact:
+        dimension = to_compact_dtypes(dimension, compact_merged_dtypes)
+    keys = df_trips_keyed["STATION_KEY"].to_numpy()
+    df_merged = pd.concat(
+        [
+            df_trips_keyed,
+            dimension.take(keys).set_axis(df_trips_keyed.index),
+        ],
+        axis=1,
+    )
+    del df_merged["STATION_KEY"]
+    df_merged.index = pd.RangeIndex(len(df_merged))
+    return df_merged
+
+
+@profile_stage
+@check_io(
+    compact_schemas={
+        "df_trips": trips_schema_processed_v2_compact,
+        "df_stations_stats": stations_new_schema_v2,
+        "out": merge_trips_neighbourhood_schema_compact,
+    },
     df_trips=trips_schema_processed_v2,
     df_stations_stats=stations_new_schema_v2,
     out=merge_trips_neighbourhood_schema,
@@ -229,68 +465,177 @@ def merge_trips_neighbourhood_stats(
     df_trips: pd.DataFrame,
     df_stations_stats: pd.DataFrame,
     use_prefect: bool = False,
+    compact: bool = False,
+    station_index: Optional[Dict] = None,
 ) -> pd.DataFrame:
     """Merge bikeshare trips and aggregated neighbourhood statistics data."""
     log_prefect(
         "Merging ridership and neighbourhood stats data...", True, use_prefect
     )
-    df_merged = df_trips.merge(
-        df_stations_stats.rename(columns={"NAME": "START_STATION_NAME"}),
-        on="START_STATION_NAME",
-        how="inner",
-    ).astype(
-        {
-            "STATION_ID": pd.Int64Dtype(),
-            "CAPACITY": pd.Int64Dtype(),
-            "PHYSICALKEY": pd.Int64Dtype(),
-            "TRANSITCARD": pd.Int64Dtype(),
-            "CREDITCARD": pd.Int64Dtype(),
-            "PHONE": pd.Int64Dtype(),
-            "NEIGH_COLLEGES_UNIVS": pd.Int64Dtype(),
-        }
+    if station_index is None:
+        station_index = get_station_index(df_stations_stats)
+    df_merged = attach_station_dimension(
+        add_station_keys(df_trips, station_index, use_prefect),
+        station_index,
+        compact,
     )
     log_prefect("Done merging.", False, use_prefect)
     return df_merged
 
 
-@pa.check_io(data_merged=merge_trips_neighbourhood_schema, out=agg_schema)
-def aggregate_merged_data(
-    data_merged: pd.DataFrame,
+def factorize_sorted(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Get integer codes of values and the sorted values they point to.
+
+    Small ranges of integers are offset instead of hashed, so their codes
+    may also point to values that are not found.
+    """
+    if pd.api.types.is_integer_dtype(values) and not (
+        pd.api.types.is_extension_array_dtype(values) or values.empty
+    ):
+        codes = values.to_numpy(dtype="int64")
+        min_value, max_value = codes.min(), codes.max()
+        if max_value - min_value < len(codes):
+            return codes - min_value, pd.Index(
+                np.arange(min_value, max_value + 1).astype(values.dtype)
+            )
+    return pd.factorize(values, sort=True)
+
+
+def is_first_of_run(sorted_values: np.ndarray) -> np.ndarray:
+    """Get whether each sorted value differs from the value before it."""
+    is_first = np.ones(len(sorted_values), dtype=bool)
+    is_first[1:] = sorted_values[1:] != sorted_values[:-1]
+    return is_first
+
+
+def get_distinct_ids(
+    ids: np.ndarray, num_ids: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get sorted distinct IDs in range(num_ids), and positions of IDs in it.
+
+    If the range of IDs is not much larger than the number of IDs, then mark
+    the observed IDs in the range, which is faster than sorting the IDs.
+    """
+    if num_ids <= max(2**22, 4 * len(ids)):
+        is_observed = np.zeros(num_ids, dtype=bool)
+        is_observed[ids] = True
+        positions = np.cumsum(is_observed) - 1
+        return np.flatnonzero(is_observed), positions[ids]
+    order = np.argsort(ids, kind="stable")
+    is_first = is_first_of_run(ids[order])
+    positions = np.empty(len(ids), dtype="int64")
+    positions[order] = np.cumsum(is_first) - 1
+    return ids[order][is_first], positions
+
+
+def get_group_ids(
+    data: pd.DataFrame, keys: List[str]
+) -> Tuple[np.ndarray, pd.DataFrame, np.ndarray]:
+    """Encode key columns into one dense integer group ID per row.
+
+    Group IDs are numbered in the sort order of the keys, like
+    pandas.DataFrame.groupby, and only observed combinations of keys get
+    an ID. Also returns the keys of each group and whether each row has
+    all keys (rows with missing keys get an ID of -1).
+    """
+    group_ids = np.zeros(len(data), dtype="int64")
+    has_keys = np.ones(len(data), dtype=bool)
+    keys_uniques = []
+    for key in keys:
+        codes, key_uniques = factorize_sorted(data[key])
+        group_ids = group_ids * len(key_uniques) + codes
+        has_keys &= codes >= 0
+        keys_uniques.append(key_uniques)
+    num_ids = int(np.prod([len(u) for u in keys_uniques], dtype="int64"))
+    observed, group_ids[has_keys] = get_distinct_ids(
+        group_ids[has_keys], num_ids
+    )
+    group_ids[~has_keys] = -1
+    df_keys = {}
+    for key, key_uniques in zip(keys[::-1], keys_uniques[::-1]):
+        observed, codes = np.divmod(observed, len(key_uniques))
+        df_keys[key] = key_uniques.take(codes)
+    df_keys = pd.DataFrame({key: df_keys[key] for key in keys})
+    return group_ids, df_keys, has_keys
+
+
+def groupby_agg_numpy(
+    data: pd.DataFrame, keys: List[str], funcs: Dict[str, str]
+) -> pd.DataFrame:
+    """Group by keys and get sums, counts or number of unique values."""
+    group_ids, data_agg, has_keys = get_group_ids(data, keys)
+    # Like pandas.DataFrame.groupby, exclude rows with missing keys
+    if not has_keys.all():
+        data, group_ids = data[has_keys], group_ids[has_keys]
+    num_groups = len(data_agg)
+    for col, func in funcs.items():
+        values = data[col]
+        if func == "sum":
+            # Sums of integers are exact in float64 below 2**53
+            sums = np.bincount(
+                group_ids,
+                weights=values.to_numpy(dtype="float64", na_value=0),
+                minlength=num_groups,
+            ).astype("int64")
+            is_nullable = pd.api.types.is_extension_array_dtype(values)
+            data_agg[col] = (
+                pd.array(sums, pd.Int64Dtype()) if is_nullable else sums
+            )
+        elif func == "count":
+            data_agg[col] = np.bincount(
+                group_ids[values.notna().to_numpy()], minlength=num_groups
+            )
+        elif func == "nunique":
+            codes, uniques = pd.factorize(values)
+            # Count distinct (group, value) pairs after sorting them
+            pairs = np.sort(
+                group_ids[codes >= 0] * len(uniques) + codes[codes >= 0]
+            )
+            data_agg[col] = np.bincount(
+                pairs[is_first_of_run(pairs)] // max(len(uniques), 1),
+                minlength=num_groups,
+            )
+        else:
+            raise ValueError(f"Unsupported aggregation: {func}")
+    return data_agg
+
+
+def groupby_agg(
+    data: pd.DataFrame,
+    keys: List[str],
+    funcs: Dict[str, str],
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """Group by keys and aggregate, with pandas or NumPy."""
+    if engine == "numpy":
+        return groupby_agg_numpy(data, keys, funcs)
+    if engine == "pandas":
+        return data.groupby(
+            keys,
+            as_index=False,
+            # Only keep combinations of categories found in the data
+            observed=True,
+        ).agg(funcs)
+    raise ValueError(f"Unsupported aggregation engine: {engine}")
+
+
+def get_empty_agg_data() -> pd.DataFrame:
+    """Get aggregated data without rows, with the aggregated data dtypes."""
+    return pd.DataFrame(
+        {c: pd.Series(dtype=dt.type) for c, dt in agg_schema.dtypes.items()}
+    ).astype(agg_dtypes)
+
+
+def format_agg_data(
+    data_agg: pd.DataFrame,
     zip_file: str,
     downloaded_file: bool,
     csv_file: str,
     last_mod: pd.Timestamp,
-    use_prefect: bool = False,
 ) -> pd.DataFrame:
-    """Aggregated merged ridership and station metadata."""
-    log_prefect("Aggregating merged data...", True, use_prefect)
-    data_agg = (
-        data_merged.groupby(
-            [
-                "AREA_NAME",
-                "USER_TYPE",
-                "START_year",
-                "START_month",
-                "START_weekday",
-                "START_hour",
-            ],
-            as_index=False,
-        )
-        .agg(
-            {
-                "TRIP__DURATION": "sum",
-                "START_STATION_NAME": "nunique",
-                "START_TIME": "count",
-                "CAPACITY": "sum",
-                "PHYSICALKEY": "sum",
-                "TRANSITCARD": "sum",
-                "CREDITCARD": "sum",
-                "PHONE": "sum",
-                "NEIGH_COLLEGES_UNIVS": "sum",
-                # "GEOMETRY": "first",
-            }
-        )
-        .rename(
+    """Rename aggregations, add source file details and set dtypes."""
+    return (
+        data_agg.rename(
             columns={
                 "TRIP__DURATION": "TRIP_DURATION",
                 "START_STATION_NAME": "NUM_STATIONS",
@@ -306,24 +651,255 @@ def aggregate_merged_data(
         .assign(csv_file=csv_file)
         .assign(downloaded_file=downloaded_file)
         .assign(last_modified_timestamp=last_mod)
-        .astype(
-            {
-                "AREA_NAME": pd.StringDtype(),
-                "USER_TYPE": pd.StringDtype(),
-                "START_year": pd.Int64Dtype(),
-                "START_weekday": pd.StringDtype(),
-                "TRIP_DURATION": pd.Int64Dtype(),
-                "csv_file": pd.StringDtype(),
-                "zip_file": pd.StringDtype(),
-                "downloaded_file": pd.BooleanDtype(),
-            }
+        .astype(agg_dtypes)
+        # Groups sort by the order of dateparts, which differs between
+        # compact (categorical) and standard dtypes
+        .sort_values(agg_keys, ignore_index=True)
+    )
+
+
+@profile_stage
+@check_io(
+    compact_schemas={
+        "data_merged": merge_trips_neighbourhood_schema_compact,
+        "out": agg_schema,
+    },
+    data_merged=merge_trips_neighbourhood_schema,
+    out=agg_schema,
+)
+def aggregate_merged_data(
+    data_merged: pd.DataFrame,
+    zip_file: str,
+    downloaded_file: bool,
+    csv_file: str,
+    last_mod: pd.Timestamp,
+    use_prefect: bool = False,
+    compact: bool = False,
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """Aggregated merged ridership and station metadata."""
+    log_prefect("Aggregating merged data...", True, use_prefect)
+    data_agg = format_agg_data(
+        groupby_agg(data_merged, agg_keys, agg_funcs, engine),
+        zip_file,
+        downloaded_file,
+        csv_file,
+        last_mod,
+    )
+    log_prefect("Done aggregating.", False, use_prefect)
+    return data_agg
+
+
+def add_station_attrs(
+    data_station_agg: pd.DataFrame, station_index: Dict, compact: bool = False
+) -> pd.DataFrame:
+    """Add station attributes, multiplied by trips per group and station.
+
+    Summing a station attribute over each trip from a station is the same
+    as multiplying it by the number of trips from the station, so station
+    attributes are only attached to one row per group and station.
+    """
+    dimension = station_index["dimension"]
+    if compact:
+        dimension = to_compact_dtypes(dimension, compact_merged_dtypes)
+    station_attrs = dimension[["AREA_NAME"] + station_attrs_summed].take(
+        data_station_agg["STATION_KEY"].to_numpy()
+    )
+    station_attrs.index = data_station_agg.index
+    station_attrs[station_attrs_summed] = station_attrs[
+        station_attrs_summed
+    ].mul(data_station_agg["START_TIME"], axis=0)
+    return pd.concat([data_station_agg, station_attrs], axis=1)
+
+
+def aggregate_station_aggs(
+    data_station_agg: pd.DataFrame,
+    station_index: Dict,
+    zip_file: str,
+    downloaded_file: bool,
+    csv_file: str,
+    last_mod: pd.Timestamp,
+    compact: bool = False,
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """Aggregate trips per group and station up to neighbourhoods."""
+    return format_agg_data(
+        groupby_agg(
+            add_station_attrs(data_station_agg, station_index, compact),
+            agg_keys,
+            # Sum counts of trips per station
+            {**agg_funcs, "START_TIME": "sum"},
+            engine,
+        ),
+        zip_file,
+        downloaded_file,
+        csv_file,
+        last_mod,
+    )
+
+
+def merge_partial_aggs(
+    partial_aggs: List[pd.DataFrame], engine: str = "pandas"
+) -> pd.DataFrame:
+    """Combine partial aggregations of trips per group and station."""
+    return groupby_agg(
+        pd.concat(partial_aggs, ignore_index=True),
+        partial_agg_keys,
+        {"TRIP__DURATION": "sum", "START_TIME": "sum"},
+        engine,
+    )
+
+
+@profile_stage
+@check_io(out=agg_schema)
+def aggregate_keyed_trips_data(
+    df_trips_keyed: pd.DataFrame,
+    station_index: Dict,
+    zip_file: str,
+    downloaded_file: bool,
+    csv_file: str,
+    last_mod: pd.Timestamp,
+    use_prefect: bool = False,
+    compact: bool = False,
+    engine: str = "pandas",
+    preaggregate: bool = False,
+) -> pd.DataFrame:
+    """Aggregate trips with station keys, attaching station attributes."""
+    if not preaggregate:
+        return aggregate_merged_data(
+            attach_station_dimension(df_trips_keyed, station_index, compact),
+            zip_file,
+            downloaded_file,
+            csv_file,
+            last_mod,
+            use_prefect,
+            compact=compact,
+            engine=engine,
         )
+    log_prefect("Aggregating trips per station...", True, use_prefect)
+    data_agg = aggregate_station_aggs(
+        groupby_agg(
+            df_trips_keyed, partial_agg_keys, partial_agg_funcs, engine
+        ),
+        station_index,
+        zip_file,
+        downloaded_file,
+        csv_file,
+        last_mod,
+        compact,
+        engine,
     )
     log_prefect("Done aggregating.", False, use_prefect)
     return data_agg
 
 
-@pa.check_io(data=agg_schema)
+@profile_stage
+@check_io(out=agg_schema)
+def aggregate_trips_file_in_chunks(
+    fpath: str,
+    station_index: Dict,
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    nan_cols: List[str],
+    duplicated_cols: List[str],
+    zip_file: str,
+    downloaded_file: bool,
+    last_mod: pd.Timestamp,
+    use_prefect: bool = False,
+    chunksize: int = 250_000,
+    max_partial_aggs: int = 8,
+    engine: str = "numpy",
+) -> pd.DataFrame:
+    """Aggregate single trips file without loading all its trips at once.
+
+    Each chunk of trips is reduced to trips per group and station, and
+    these partial aggregations are merged whenever max_partial_aggs of them
+    are held in memory, so memory use is bounded by the chunk size and the
+    number of groups and stations, rather than by the number of trips.
+    """
+    log_prefect(f"Aggregating {fpath} in chunks...", True, use_prefect)
+    partial_aggs = []
+    for chunk in read_data_chunks(
+        fpath,
+        dtypes_dict,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+        chunksize,
+        use_prefect,
+    ):
+        # Compact dateparts have the same dtypes in all chunks
+        chunk = add_station_keys(
+            add_datepart(chunk, use_prefect, compact=True),
+            station_index,
+            use_prefect,
+        )
+        partial_aggs.append(
+            groupby_agg(chunk, partial_agg_keys, partial_agg_funcs, engine)
+        )
+        if len(partial_aggs) >= max_partial_aggs:
+            partial_aggs = [merge_partial_aggs(partial_aggs, engine)]
+    if not partial_aggs:
+        # File without trips
+        log_prefect("Done aggregating.", False, use_prefect)
+        return get_empty_agg_data()
+    data_agg = aggregate_station_aggs(
+        merge_partial_aggs(partial_aggs, engine),
+        station_index,
+        zip_file,
+        downloaded_file,
+        os.path.basename(fpath),
+        last_mod,
+        engine=engine,
+    )
+    log_prefect("Done aggregating.", False, use_prefect)
+    return data_agg
+
+
+def aggregate_trips_files_in_chunks(
+    files_last_modified: Dict[str, Tuple[str, bool, pd.Timestamp]],
+    station_index: Dict,
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    nan_cols: List[str],
+    duplicated_cols: List[str],
+    use_prefect: bool = False,
+    chunksize: int = 250_000,
+    engine: str = "numpy",
+) -> pd.DataFrame:
+    """Aggregate many trips files (eg. several years), one chunk at a time.
+
+    files_last_modified maps each trips file to its zip file, whether the
+    zip file was downloaded and its last modification time on the portal.
+    """
+    return pd.concat(
+        [
+            aggregate_trips_file_in_chunks(
+                fpath,
+                station_index,
+                dtypes_dict,
+                date_cols,
+                nan_cols,
+                duplicated_cols,
+                zip_file,
+                downloaded_file,
+                last_mod,
+                use_prefect,
+                chunksize,
+                engine=engine,
+            )
+            for fpath, (
+                zip_file,
+                downloaded_file,
+                last_mod,
+            ) in files_last_modified.items()
+        ],
+        ignore_index=True,
+    )
+
+
+@profile_stage
+@check_io(data=agg_schema)
 def update_parquet_file_data(
     data: pd.DataFrame, raw_data_filepath: str, updated_data_filepath: str
 ) -> None:
@@ -344,4 +920,111 @@ def update_parquet_file_data(
         [df_parquet_non_updated, data], ignore_index=True
     )
     # Export updated contents to parquet file
-    save_data_to_parquet_file(df_parquet_updated, updated_data_filepath)
+    save_data_to_parquet_file(
+        df_parquet_updated,
+        updated_data_filepath,
+        get_freshness_metadata(df_parquet_updated),
+    )
+
+
+def get_agg_partition_filepath(
+    store_dir: str, zip_file: str, csv_file: str
+) -> str:
+    """Get path to the aggregated data partition of a monthly CSV."""
+    return os.path.join(
+        store_dir,
+        os.path.splitext(zip_file)[0],
+        f"{os.path.splitext(csv_file)[0]}.parquet.gzip",
+    )
+
+
+def read_agg_manifest(store_dir: str) -> Dict[str, Dict]:
+    """Load manifest of partitions in the aggregated data store."""
+    manifest_filepath = os.path.join(store_dir, "_manifest.json")
+    if not os.path.exists(manifest_filepath):
+        return {}
+    with open(manifest_filepath) as f:
+        return json.load(f)
+
+
+def write_agg_manifest(store_dir: str, manifest: Dict[str, Dict]) -> None:
+    """Export manifest of partitions in the aggregated data store."""
+    manifest_filepath = os.path.join(store_dir, "_manifest.json")
+    with open(f"{manifest_filepath}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{manifest_filepath}.tmp", manifest_filepath)
+
+
+@check_io(data=agg_schema)
+def update_partitioned_parquet_data(
+    data: pd.DataFrame, store_dir: str, use_prefect: bool = False
+) -> List[str]:
+    """Update outdated zip/CSV partitions of the aggregated data store."""
+    log_prefect("Updating aggregated data partitions...", True, use_prefect)
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = read_agg_manifest(store_dir)
+    updated_filepaths = []
+    for (zip_file, csv_file), df in data.groupby(
+        ["zip_file", "csv_file"], sort=True
+    ):
+        last_mod = df["last_modified_timestamp"].max()
+        key = f"{zip_file}/{csv_file}"
+        partition = manifest.get(key)
+        if partition and pd.Timestamp(
+            partition["last_modified_timestamp"]
+        ) >= pd.Timestamp(last_mod):
+            continue
+        filepath = get_agg_partition_filepath(store_dir, zip_file, csv_file)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        save_data_to_parquet_file(df.reset_index(drop=True), filepath)
+        manifest[key] = dict(
+            zip_file=zip_file,
+            csv_file=csv_file,
+            filepath=os.path.relpath(filepath, store_dir),
+            num_rows=len(df),
+            last_modified_timestamp=format_timestamp_utc(last_mod),
+        )
+        updated_filepaths.append(filepath)
+    # Drop partitions that are no longer part of an updated zip file
+    zips_last_mod = data.groupby("zip_file")["last_modified_timestamp"].max()
+    for key, partition in list(manifest.items()):
+        zip_last_mod = zips_last_mod.get(partition["zip_file"], pd.NaT)
+        if pd.notna(zip_last_mod) and pd.Timestamp(
+            partition["last_modified_timestamp"]
+        ) < pd.Timestamp(zip_last_mod):
+            filepath = os.path.join(store_dir, partition["filepath"])
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            del manifest[key]
+    write_agg_manifest(store_dir, manifest)
+    log_prefect(
+        f"Done updating {len(updated_filepaths)} partitions.",
+        False,
+        use_prefect,
+    )
+    return updated_filepaths
+
+
+def get_partitioned_parquet_dataset(
+    store_dir: str, zip_files: Optional[List[str]] = None
+) -> pa_ds.Dataset:
+    """Get lazily-read dataset over partitions of aggregated data store."""
+    manifest = read_agg_manifest(store_dir)
+    filepaths = [
+        os.path.join(store_dir, partition["filepath"])
+        for _, partition in sorted(manifest.items())
+        if not zip_files or partition["zip_file"] in zip_files
+    ]
+    return pa_ds.dataset(filepaths, format="parquet")
+
+
+@check_io(out=agg_schema)
+def load_partitioned_parquet_data(
+    store_dir: str, zip_files: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Combine partitions of aggregated data store into single DataFrame."""
+    dataset = get_partitioned_parquet_dataset(store_dir, zip_files)
+    if not dataset.files:
+        # New or empty store, without any partitions to read the schema from
+        return get_empty_agg_data()
+    return dataset.to_table().to_pandas()
@@ -8,12 +8,20 @@
 # pylint: disable=logging-fstring-interpolation
 
 
+import hashlib
+import os
+from typing import Dict, Optional
+
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import prefect
+import shapely
 
 from src.utils import log_prefect
 
+neighbourhood_cache_keys = ["point_id", "lat", "lon", "boundary_version"]
+
 
 def get_neighbourhood_containing_point(
     gdf: gpd.GeoDataFrame,
@@ -41,6 +49,127 @@ def get_neighbourhood_containing_point(
     return polygons_contains
 
 
+def get_boundary_version(gdf: gpd.GeoDataFrame) -> str:
+    """Get hash of neighbourhood names and boundaries."""
+    hasher = hashlib.sha256()
+    hasher.update("\n".join(gdf["AREA_NAME"].astype(str)).encode())
+    for geometry_wkb in shapely.to_wkb(gdf["geometry"].values):
+        hasher.update(geometry_wkb)
+    return hasher.hexdigest()[:16]
+
+
+def get_neighbourhood_index(gdf: gpd.GeoDataFrame) -> Dict:
+    """Index prepared neighbourhood boundaries, to look up points in bulk."""
+    polygons = np.asarray(gdf["geometry"].values, dtype=object)
+    shapely.prepare(polygons)
+    return {
+        "tree": shapely.STRtree(polygons),
+        "polygons": polygons,
+        "area_names": gdf["AREA_NAME"].astype(pd.StringDtype()).to_numpy(),
+        "boundary_version": get_boundary_version(gdf),
+    }
+
+
+def get_neighbourhood_codes(
+    neighbourhood_index: Dict, lons: np.ndarray, lats: np.ndarray
+) -> np.ndarray:
+    """Get position of first neighbourhood containing each point, or -1."""
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    # tree only filters on bounding boxes, so candidates are tested exactly
+    point_idx, polygon_idx = neighbourhood_index["tree"].query(
+        shapely.points(lons, lats)
+    )
+    is_inside = shapely.contains_xy(
+        neighbourhood_index["polygons"][polygon_idx],
+        lons[point_idx],
+        lats[point_idx],
+    )
+    num_polygons = len(neighbourhood_index["polygons"])
+    codes = np.full(len(lons), num_polygons, dtype=np.int64)
+    np.minimum.at(codes, point_idx[is_inside], polygon_idx[is_inside])
+    codes[codes == num_polygons] = -1
+    return codes
+
+
+def read_neighbourhood_cache(
+    cache_filepath: str, boundary_version: str
+) -> pd.DataFrame:
+    """Load cached neighbourhood names for current neighbourhood boundaries."""
+    if not os.path.exists(cache_filepath):
+        return pd.DataFrame()
+    df_cache = pd.read_parquet(cache_filepath)
+    return df_cache[df_cache["boundary_version"] == boundary_version]
+
+
+def get_cached_neighbourhoods(
+    gdf: gpd.GeoDataFrame,
+    df: pd.DataFrame,
+    lat: str,
+    lon: str,
+    col_to_join: str,
+    cache_filepath: str,
+    use_prefect: bool = False,
+) -> pd.DataFrame:
+    """Get neighbourhood name of points, only looking up new or moved ones."""
+    log_prefect("Extracting cached neighbourhood name...", True, use_prefect)
+    neighbourhood_index = get_neighbourhood_index(gdf)
+    boundary_version = neighbourhood_index["boundary_version"]
+    df_points = (
+        df[[col_to_join, lat, lon]]
+        .drop_duplicates()
+        .set_axis(neighbourhood_cache_keys[:-1], axis=1)
+        .assign(boundary_version=boundary_version)
+    )
+    df_cache = read_neighbourhood_cache(cache_filepath, boundary_version)
+    if df_cache.empty:
+        df_points["AREA_NAME"] = pd.Series(
+            pd.NA, index=df_points.index, dtype=pd.StringDtype()
+        )
+        is_new = np.ones(len(df_points), dtype=bool)
+    else:
+        df_points = df_points.merge(
+            df_cache, on=neighbourhood_cache_keys, how="left", indicator=True
+        )
+        is_new = (df_points.pop("_merge") == "left_only").to_numpy()
+    if is_new.any():
+        codes = get_neighbourhood_codes(
+            neighbourhood_index,
+            df_points.loc[is_new, "lon"].to_numpy(dtype=float),
+            df_points.loc[is_new, "lat"].to_numpy(dtype=float),
+        )
+        df_points.loc[is_new, "AREA_NAME"] = np.where(
+            codes >= 0, neighbourhood_index["area_names"][codes], pd.NA
+        )
+        os.makedirs(os.path.dirname(cache_filepath) or ".", exist_ok=True)
+        pd.concat([df_cache, df_points[is_new]], ignore_index=True).to_parquet(
+            cache_filepath, index=False
+        )
+    loop_str = (
+        f"Looked up {is_new.sum()} new or moved points, "
+        f"{(~is_new).sum()} from cache"
+    )
+    if use_prefect:
+        logger = prefect.utilities.logging.get_logger()
+        logger.info(loop_str)
+    else:
+        print(loop_str)
+    df_check = (
+        df_points.dropna(subset=["AREA_NAME"])
+        .drop_duplicates(subset=["point_id"])
+        .rename(columns={"point_id": col_to_join})[[col_to_join, "AREA_NAME"]]
+        .merge(
+            gdf[["AREA_NAME", "Shape__Area"]].drop_duplicates(
+                subset=["AREA_NAME"]
+            ),
+            on="AREA_NAME",
+            how="inner",
+        )
+    )
+    log_prefect("Done.", False, use_prefect)
+    return df_check
+
+
 def get_data_with_neighbourhood(
     gdf: gpd.GeoDataFrame,
     df: pd.DataFrame,
@@ -49,16 +178,22 @@ def get_data_with_neighbourhood(
     col_to_join: str,
     crs: int = 4326,
     use_prefect: bool = False,
+    cache_filepath: Optional[str] = None,
 ) -> gpd.GeoDataFrame:
     """Add city neighourhood name to bikeshare data."""
     log_prefect("Adding neighbourhood to trips data...", True, use_prefect)
-    cols_to_keep = [col_to_join, "AREA_NAME", "geometry", "Shape__Area"]
-    df_check = get_neighbourhood_containing_point(gdf, df, lat, lon, crs)[
-        cols_to_keep
-    ]
-    df = df.merge(
-        df_check.drop(columns=["geometry"]), on=col_to_join, how="left"
-    ).drop(columns=["geometry"])
+    if cache_filepath:
+        df_check = get_cached_neighbourhoods(
+            gdf, df, lat, lon, col_to_join, cache_filepath, use_prefect
+        )
+    else:
+        cols_to_keep = [col_to_join, "AREA_NAME", "geometry", "Shape__Area"]
+        df_check = get_neighbourhood_containing_point(gdf, df, lat, lon, crs)[
+            cols_to_keep
+        ].drop(columns=["geometry"])
+    df = df.merge(df_check, on=col_to_join, how="left").drop(
+        columns=["geometry"], errors="ignore"
+    )
     df = df.dropna(subset=["AREA_NAME"])
     num_dropped_rows = len(df[["AREA_NAME"]].isna().sum())
     loop_str = f"Dropped {num_dropped_rows} rows with a missing AREA_NAME"
@@ -7,14 +7,17 @@
 # pylint: disable=invalid-name
 
 
-from typing import Dict, List
+import json
+import os
+from io import BytesIO
+from typing import Dict, List, Optional
 
 import geopandas as gpd
 import pandas as pd
 import pandera as pa
-import requests
 
-from src.utils import log_prefect
+from src.http_client import get_json, get_with_cache
+from src.utils import check_io, log_prefect
 
 ch_essentials_schema = pa.DataFrameSchema(
     columns={
@@ -112,24 +115,59 @@ def get_lat_long(row):
     return row["coordinates"]
 
 
-@pa.check_output(gdf_schema)
-def get_neighbourhood_boundary_land_area_data(
-    url: str, params: Dict, cols_to_keep: List[str], use_prefect: bool = False
-) -> pd.DataFrame:
-    """Get citywide neighbourhood boundaries."""
-    log_prefect("Getting neighbourhood boundaries...", True, use_prefect)
-    package = requests.get(url, params=params).json()
-    files = package["result"]["resources"]
-    n_url = [f["url"] for f in files if f["url"].endswith("4326.geojson")][0]
-    gdf = gpd.read_file(n_url)
-    # print(gdf.head(2))
-    gdf["centroid"] = (
-        gdf["geometry"].to_crs(epsg=3395).centroid.to_crs(epsg=4326)
+def get_resource_version(resource: Dict) -> str:
+    """Get version of an Open Data Portal resource from its metadata."""
+    return (
+        f"{resource.get('id')}:"
+        f"{resource.get('last_modified') or resource.get('created')}"
+    )
+
+
+def get_boundaries_cache_version(cache_filepath: str) -> Optional[str]:
+    """Get resource version stored alongside cached neighbourhood data."""
+    sidecar_filepath = f"{cache_filepath}.json"
+    if not (
+        os.path.exists(cache_filepath) and os.path.exists(sidecar_filepath)
+    ):
+        return None
+    with open(sidecar_filepath) as f:
+        return json.load(f).get("version")
+
+
+def write_boundaries_cache_file(
+    gdf: gpd.GeoDataFrame,
+    cache_filepath: str,
+    version: str,
+    simplify_tolerance: float,
+) -> None:
+    """Export neighbourhood boundaries to GeoParquet, with version sidecar."""
+    os.makedirs(os.path.dirname(cache_filepath) or ".", exist_ok=True)
+    gdf.to_parquet(cache_filepath, index=False)
+    with open(f"{cache_filepath}.json", "w") as f:
+        json.dump(
+            {"version": version, "simplify_tolerance": simplify_tolerance}, f
+        )
+
+
+def with_display_geometry(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Replace neighbourhood boundaries by their simplified version."""
+    return gdf.drop(columns=["geometry_display"]).set_geometry(
+        gpd.GeoSeries(gdf["geometry_display"], crs=gdf.crs).values
     )
-    gdf["AREA_LATITUDE"] = gdf["centroid"].y
-    gdf["AREA_LONGITUDE"] = gdf["centroid"].x
+
+
+def add_boundary_attributes(
+    gdf: gpd.GeoDataFrame, simplify_tolerance: float = 0.0001
+) -> gpd.GeoDataFrame:
+    """Add centroid, area and simplified boundary of each neighbourhood."""
+    centroid = gdf["geometry"].to_crs(epsg=3395).centroid.to_crs(epsg=4326)
+    gdf["AREA_LATITUDE"] = centroid.y
+    gdf["AREA_LONGITUDE"] = centroid.x
     gdf["Shape__Area"] = gdf["geometry"].to_crs(epsg=3857).area
-    gdf = gdf.astype(
+    gdf["geometry_display"] = gdf["geometry"].simplify(
+        simplify_tolerance, preserve_topology=True
+    )
+    return gdf.astype(
         {
             "AREA_SHORT_CODE": pd.StringDtype(),
             "AREA_LONG_CODE": pd.StringDtype(),
@@ -137,12 +175,42 @@ def get_neighbourhood_boundary_land_area_data(
             "AREA_LATITUDE": float,
             "AREA_LONGITUDE": float,
         }
-    )[cols_to_keep]
+    )
+
+
+@check_io(out=gdf_schema)
+def get_neighbourhood_boundary_land_area_data(
+    url: str,
+    params: Dict,
+    cols_to_keep: List[str],
+    use_prefect: bool = False,
+    cache_filepath: Optional[str] = None,
+    simplify_tolerance: float = 0.0001,
+) -> pd.DataFrame:
+    """Get citywide neighbourhood boundaries."""
+    log_prefect("Getting neighbourhood boundaries...", True, use_prefect)
+    package = get_json(url, params)
+    files = package["result"]["resources"]
+    resource = [f for f in files if f["url"].endswith("4326.geojson")][0]
+    version = get_resource_version(resource)
+    if cache_filepath and (
+        get_boundaries_cache_version(cache_filepath) == version
+    ):
+        log_prefect("Loading cached boundaries...", True, use_prefect)
+        gdf = gpd.read_parquet(cache_filepath)
+    else:
+        gdf = gpd.read_file(BytesIO(get_with_cache(resource["url"])))
+        gdf = add_boundary_attributes(gdf, simplify_tolerance)
+        if cache_filepath:
+            write_boundaries_cache_file(
+                gdf, cache_filepath, version, simplify_tolerance
+            )
+    gdf = gdf[cols_to_keep]
     log_prefect("Done.", False, use_prefect)
     return gdf
 
 
-@pa.check_output(coll_univ_schema)
+@check_io(out=coll_univ_schema)
 def get_coll_univ_locations(use_prefect: bool = False) -> pd.DataFrame:
     """Get college and university locations within city boundaries."""
     log_prefect("Getting college and univ locations...", True, use_prefect)
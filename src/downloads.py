@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Download data files from the city's Open Data portal."""
+
+# pylint: disable=invalid-name
+
+
+import os
+import re
+from functools import partial
+from typing import List, Optional
+
+import requests
+
+from src.http_client import get_session
+from src.utils import log_prefect, run_concurrently
+
+
+def get_expected_file_size(r: requests.Response, offset: int) -> Optional[int]:
+    """Get full size of file being downloaded, from response headers."""
+    content_range = re.search(r"/(\d+)$", r.headers.get("Content-Range", ""))
+    if content_range:
+        return int(content_range.group(1))
+    if "Content-Length" in r.headers:
+        return int(r.headers["Content-Length"]) + offset
+    return None
+
+
+def get_validator(r: requests.Response) -> Optional[str]:
+    """Get strong ETag, or else Last-Modified, to send in If-Range."""
+    etag = r.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return r.headers.get("Last-Modified")
+
+
+def remove_partial_file(part_filepath: str) -> None:
+    """Delete partial file and the validator of its contents."""
+    for fpath in [part_filepath, f"{part_filepath}.validator"]:
+        if os.path.exists(fpath):
+            os.remove(fpath)
+
+
+def stream_to_file(
+    url: str,
+    part_filepath: str,
+    chunk_size: int,
+    timeout: float,
+    session: Optional[requests.Session],
+) -> Optional[int]:
+    """Stream response body to file, resuming from end of partial file.
+
+    Partial files are only resumed if the upstream file has not changed
+    since, as checked by the server against the validator (If-Range) saved
+    when the partial file was started.
+    """
+    validator_filepath = f"{part_filepath}.validator"
+    validator = None
+    if os.path.exists(validator_filepath):
+        with open(validator_filepath) as f:
+            validator = f.read()
+    offset = (
+        os.path.getsize(part_filepath)
+        if validator and os.path.exists(part_filepath)
+        else 0
+    )
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    with (session or get_session()).get(
+        url, headers=headers, stream=True, timeout=timeout
+    ) as r:
+        if r.status_code == 416:
+            # Only the size in Content-Range (not Content-Length, which is
+            # that of the error body) shows the partial file is complete
+            content_range = re.match(
+                r"bytes \*/(\d+)$", r.headers.get("Content-Range", "")
+            )
+            if content_range and int(content_range.group(1)) == offset:
+                return offset
+            remove_partial_file(part_filepath)
+            return stream_to_file(
+                url, part_filepath, chunk_size, timeout, session
+            )
+        r.raise_for_status()
+        if not offset or r.status_code != 206:
+            # New download, or the server ignored the byte range since the
+            # upstream file changed, so start from scratch
+            offset = 0
+            remove_partial_file(part_filepath)
+            validator = get_validator(r)
+            if validator:
+                with open(validator_filepath, "w") as f:
+                    f.write(validator)
+        expected_size = get_expected_file_size(r, offset)
+        with open(part_filepath, "ab" if offset else "wb") as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+    return expected_size
+
+
+def download_file(
+    url: str,
+    filepath: str,
+    chunk_size: int = 1024 * 1024,
+    timeout: float = 60,
+    num_retries: int = 3,
+    session: Optional[requests.Session] = None,
+    use_prefect: bool = False,
+) -> str:
+    """Download file to disk in chunks, resuming partial downloads."""
+    log_prefect(f"Downloading {url}...", True, use_prefect)
+    part_filepath = f"{filepath}.part"
+    for attempt in range(num_retries + 1):
+        try:
+            expected_size = stream_to_file(
+                url, part_filepath, chunk_size, timeout, session
+            )
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.Timeout,
+        ):
+            if attempt == num_retries:
+                raise
+            continue
+        actual_size = os.path.getsize(part_filepath)
+        if expected_size is None or actual_size == expected_size:
+            break
+        if actual_size > expected_size:
+            # Contents can not be resumed, so discard them
+            remove_partial_file(part_filepath)
+    else:
+        raise IOError(
+            f"Could not download all {expected_size:,} bytes from {url}"
+        )
+    os.replace(part_filepath, filepath)
+    remove_partial_file(part_filepath)
+    log_prefect("Done.", False, use_prefect)
+    return filepath
+
+
+def download_files(
+    urls: List[str],
+    filepaths: List[str],
+    max_workers: int = 4,
+    session: Optional[requests.Session] = None,
+    use_prefect: bool = False,
+) -> List[str]:
+    """Download multiple files concurrently."""
+    if not urls:
+        return []
+    log_prefect(f"Downloading {len(urls)} files...", True, use_prefect)
+    download = partial(download_file, session=session, use_prefect=use_prefect)
+    # Downloads are not timed out, since each one retries on its own
+    downloaded = run_concurrently(
+        {
+            fpath: (download, (url, fpath))
+            for url, fpath in zip(urls, filepaths)
+        },
+        default_timeout=None,
+        max_workers=max_workers,
+    )
+    log_prefect("Done.", False, use_prefect)
+    return [downloaded[fpath] for fpath in filepaths]
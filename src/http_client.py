@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Shared HTTP session with retries and on-disk response cache."""
+
+# pylint: disable=invalid-name
+
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.http_fixtures import mount_fixtures
+
+http_cache_dir = os.path.join("data", "raw", "http_cache")
+# Directory of recorded responses to answer all requests from, instead of
+# the live endpoints (see src.http_fixtures)
+http_fixtures_dir = os.environ.get("BIKESHARE_HTTP_FIXTURES_DIR")
+
+
+@lru_cache(maxsize=None)
+def get_session(
+    num_retries: int = 3, backoff_factor: float = 0.5, pool_maxsize: int = 10
+) -> requests.Session:
+    """Get shared session with pooled connections and retries."""
+    session = requests.Session()
+    retries = Retry(
+        total=num_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET"],
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if http_fixtures_dir:
+        bandwidth = os.environ.get("BIKESHARE_HTTP_FIXTURES_BANDWIDTH")
+        mount_fixtures(
+            session,
+            http_fixtures_dir,
+            float(os.environ.get("BIKESHARE_HTTP_FIXTURES_LATENCY", 0)),
+            float(bandwidth) if bandwidth else None,
+        )
+    return session
+
+
+def get_cache_filepath(
+    url: str, params: Optional[Dict], cache_dir: str
+) -> str:
+    """Get path to cached response body for a URL and query parameters."""
+    key = json.dumps([url, params or {}], sort_keys=True)
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+
+def get_with_cache(
+    url: str,
+    params: Optional[Dict] = None,
+    cache_dir: Optional[str] = http_cache_dir,
+    timeout: float = 60,
+) -> bytes:
+    """Get response body, re-using cached body if it was not modified."""
+    if not cache_dir:
+        r = get_session().get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.content
+    body_filepath = get_cache_filepath(url, params, cache_dir)
+    headers_filepath = f"{body_filepath}.json"
+    cached_headers = {}
+    if os.path.exists(body_filepath) and os.path.exists(headers_filepath):
+        with open(headers_filepath) as f:
+            cached_headers = json.load(f)
+    request_headers = {}
+    if cached_headers.get("ETag"):
+        request_headers["If-None-Match"] = cached_headers["ETag"]
+    if cached_headers.get("Last-Modified"):
+        request_headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+    r = get_session().get(
+        url, params=params, headers=request_headers, timeout=timeout
+    )
+    if r.status_code == 304:
+        with open(body_filepath, "rb") as f:
+            return f.read()
+    r.raise_for_status()
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(body_filepath, "wb") as f:
+        f.write(r.content)
+    with open(headers_filepath, "w") as f:
+        json.dump(
+            {
+                "url": url,
+                "params": params,
+                **{
+                    k: r.headers[k]
+                    for k in ["ETag", "Last-Modified"]
+                    if k in r.headers
+                },
+            },
+            f,
+        )
+    return r.content
+
+
+def get_json(
+    url: str,
+    params: Optional[Dict] = None,
+    cache_dir: Optional[str] = http_cache_dir,
+    timeout: float = 60,
+) -> Dict:
+    """Get JSON response, re-using cached response if it was not modified."""
+    return json.loads(get_with_cache(url, params, cache_dir, timeout))
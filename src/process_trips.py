@@ -7,11 +7,18 @@
 # pylint: disable=invalid-name
 
 
+from typing import Dict
+
+import numpy as np
 import pandas as pd
 import pandera as pa
 
-from src.trips import raw_trips_schema
-from src.utils import log_prefect
+from src.trips import (
+    raw_trips_schema,
+    raw_trips_schema_compact,
+    to_compact_dtypes,
+)
+from src.utils import check_io, log_prefect, profile_stage
 
 datetime_attrs_dtypes_v2 = {
     f"{trip_point}_{date_attr}": pa.Column(pa.Int)
@@ -41,30 +48,93 @@ trips_schema_processed_v2 = pa.DataFrameSchema(
     columns=trips_schema_processed_v2,
     index=pa.Index(pa.Int),
 )
+# Weekday codes (Monday=0) index into these names, which are only needed for
+# display (unlike calendar.day_name, these do not depend on the locale)
+weekday_names = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+weekday_dtype = pd.CategoricalDtype(weekday_names, ordered=True)
+ns_per_hour = 3_600 * 10**9
+ns_per_day = 24 * ns_per_hour
+compact_datepart_dtypes = {
+    "START_year": "int16",
+    "START_month": "int8",
+    "START_weekday": weekday_dtype,
+    "START_hour": "int8",
+}
+trips_schema_processed_v2_compact = trips_schema_processed_v2.update_columns(
+    {
+        "TRIP__DURATION": {"dtype": pa.Int32},
+        "START_STATION_ID": {"dtype": pd.Int32Dtype()},
+        "START_STATION_NAME": {"dtype": pa.Category},
+        "USER_TYPE": {"dtype": pa.Category},
+        "START_year": {"dtype": pa.Int16},
+        "START_month": {"dtype": pa.Int8},
+        "START_weekday": {"dtype": pa.Category},
+        "START_hour": {"dtype": pa.Int8},
+    }
+)
 
 
-def add_datepart(df: pd.DataFrame, use_prefect: bool = False) -> pd.DataFrame:
+def get_datepart_arrays(times: pd.Series) -> Dict[str, np.ndarray]:
+    """Get year, month, weekday code and hour from timestamps with NumPy."""
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    values = times.to_numpy(dtype="datetime64[ns]")
+    ns = values.view("int64")
+    months = values.astype("datetime64[M]").view("int64")
+    return {
+        "year": months // 12 + 1970,
+        "month": months % 12 + 1,
+        # 1970-01-01 (day 0) was a Thursday (code 3)
+        "weekday": (ns // ns_per_day + 3) % 7,
+        "hour": ns // ns_per_hour % 24,
+    }
+
+
+@profile_stage
+def add_datepart(
+    df: pd.DataFrame, use_prefect: bool = False, compact: bool = False
+) -> pd.DataFrame:
     """Add datetime attributes."""
     log_prefect("Adding datetime attributes...", True, use_prefect)
     # Extract datetime attributes
     for trip_point in ["START"]:
-        df[f"{trip_point}_year"] = df[f"{trip_point}_TIME"].dt.year
-        df[f"{trip_point}_month"] = df[f"{trip_point}_TIME"].dt.month
-        # df[f"{trip_point}_day"] = df[f"{trip_point}_TIME"].dt.day
-        df[f"{trip_point}_weekday"] = df[f"{trip_point}_TIME"].dt.day_name()
-        df[f"{trip_point}_hour"] = df[f"{trip_point}_TIME"].dt.hour
-        # df[f"{trip_point}_minute"] = df[f"{trip_point}_TIME"].dt.minute
-    df["START_weekday"] = df["START_weekday"].astype(pd.StringDtype())
+        dateparts = get_datepart_arrays(df[f"{trip_point}_TIME"])
+        df[f"{trip_point}_year"] = dateparts["year"]
+        df[f"{trip_point}_month"] = dateparts["month"]
+        df[f"{trip_point}_weekday"] = pd.Categorical.from_codes(
+            dateparts["weekday"], dtype=weekday_dtype
+        )
+        df[f"{trip_point}_hour"] = dateparts["hour"]
+    if compact:
+        df = to_compact_dtypes(df, compact_datepart_dtypes)
+    else:
+        # Only map the 7 weekday names, instead of formatting each timestamp
+        df["START_weekday"] = df["START_weekday"].astype(pd.StringDtype())
     log_prefect("Done adding datetime attributes.", False, use_prefect)
     return df
 
 
-@pa.check_io(df=raw_trips_schema, out=trips_schema_processed_v2)
+@check_io(
+    compact_schemas={
+        "df": raw_trips_schema_compact,
+        "out": trips_schema_processed_v2_compact,
+    },
+    df=raw_trips_schema,
+    out=trips_schema_processed_v2,
+)
 def process_trips_data(
-    df: pd.DataFrame, use_prefect: bool = False
+    df: pd.DataFrame, use_prefect: bool = False, compact: bool = False
 ) -> pd.DataFrame:
     """Process raw ridership data."""
     log_prefect("Processing data...", True, use_prefect)
-    df = add_datepart(df)
+    df = add_datepart(df, compact=compact)
     log_prefect("Done.", False, use_prefect)
     return df
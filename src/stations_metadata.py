@@ -11,9 +11,9 @@ from typing import Dict, List
 
 import pandas as pd
 import pandera as pa
-import requests
 
-from src.utils import log_prefect
+from src.http_client import get_json
+from src.utils import check_io, log_prefect
 
 raw_stations_schema = pa.DataFrameSchema(
     columns={
@@ -54,19 +54,19 @@ stations_schema = pa.DataFrameSchema(
 )
 
 
-@pa.check_output(raw_stations_schema)
+@check_io(out=raw_stations_schema)
 def get_stations_metadata(
     stations_url: str, stations_params: Dict, use_prefect: bool = False
 ) -> pd.DataFrame:
     """Get bikeshare stations metadata from JSON feed."""
     log_prefect("Retrieving stations metadata...", True, use_prefect)
-    package = requests.get(stations_url, params=stations_params).json()
+    package = get_json(stations_url, stations_params)
     resources = package["result"]["resources"]
     df_about = pd.DataFrame.from_records(resources)
-    r = requests.get(df_about["url"].tolist()[0]).json()
+    r = get_json(df_about["url"].tolist()[0])
     url_stations = r["data"]["en"]["feeds"][2]["url"]
     df_stations = pd.DataFrame.from_records(
-        requests.get(url_stations).json()["data"]["stations"]
+        get_json(url_stations)["data"]["stations"]
     )
     df_stations = df_stations.astype(
         {
@@ -84,7 +84,7 @@ def get_stations_metadata(
     return df_stations
 
 
-@pa.check_io(data=raw_stations_schema, out=stations_schema)
+@check_io(data=raw_stations_schema, out=stations_schema)
 def transform_metadata(
     data: pd.DataFrame,
     stations_cols_wanted: List[str],
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Retrieve supplementary datasets concurrently."""
+
+# pylint: disable=invalid-name
+
+
+from typing import Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import pandas as pd
+
+from src.city_pub_data import (
+    get_coll_univ_locations,
+    get_neighbourhood_boundary_land_area_data,
+)
+from src.stations_metadata import get_stations_metadata, transform_metadata
+from src.utils import log_prefect, run_concurrently
+
+
+def get_transformed_stations_metadata(
+    url: str,
+    about_params: Dict,
+    stations_cols_wanted: List[str],
+    use_prefect: bool = False,
+) -> pd.DataFrame:
+    """Get and transform bikeshare stations metadata."""
+    df_stations = get_stations_metadata(url, about_params, use_prefect)
+    return transform_metadata(df_stations, stations_cols_wanted, use_prefect)
+
+
+def get_supplementary_datasets(
+    url: str,
+    about_params: Dict,
+    stations_cols_wanted: List[str],
+    neigh_boundary_params: Dict,
+    neigh_cols_to_show: List[str],
+    timeouts: Optional[Dict[str, float]] = None,
+    use_prefect: bool = False,
+    boundaries_cache_filepath: Optional[str] = None,
+) -> Tuple[pd.DataFrame, gpd.GeoDataFrame, pd.DataFrame]:
+    """Get stations, neighbourhood and college/univ. data concurrently."""
+    log_prefect("Getting supplementary datasets...", True, use_prefect)
+    datasets = run_concurrently(
+        {
+            "stations": (
+                get_transformed_stations_metadata,
+                (url, about_params, stations_cols_wanted, use_prefect),
+            ),
+            "neighbourhoods": (
+                get_neighbourhood_boundary_land_area_data,
+                (
+                    url,
+                    neigh_boundary_params,
+                    neigh_cols_to_show,
+                    use_prefect,
+                    boundaries_cache_filepath,
+                ),
+            ),
+            "colleges_univs": (get_coll_univ_locations, (use_prefect,)),
+        },
+        timeouts,
+    )
+    log_prefect("Done.", False, use_prefect)
+    return (
+        datasets["stations"],
+        datasets["neighbourhoods"],
+        datasets["colleges_univs"],
+    )
@@ -7,17 +7,34 @@
 # pylint: disable=invalid-name
 
 
+import csv
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from glob import glob
-from typing import Dict, List
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
 from zipfile import ZipFile
 
+import numpy as np
 import pandas as pd
 import pandera as pa
-import requests
+import pyarrow
+from pyarrow import csv as pa_csv
+from pyarrow import parquet as pq
 
-from src.utils import log_prefect
+from src.downloads import download_file, download_files
+from src.http_client import get_json
+from src.utils import (
+    add_stage_profiles,
+    check_io,
+    format_timestamp_utc,
+    get_zip_files_last_modified,
+    log_prefect,
+    profile_stage,
+    run_with_stage_profiles,
+)
 
 trips_schema = pa.DataFrameSchema(
     columns={
@@ -95,6 +112,42 @@ raw_trips_schema = pa.DataFrameSchema(
     },
     index=pa.Index(pa.Int),
 )
+# Compact representation of trips, with categorical station names and user
+# types and narrower integers
+compact_trips_dtypes = {
+    "TRIP__DURATION": "int32",
+    "START_STATION_ID": pd.Int32Dtype(),
+    "START_STATION_NAME": "category",
+    "USER_TYPE": "category",
+}
+raw_trips_schema_compact = raw_trips_schema.update_columns(
+    {
+        "TRIP__DURATION": {"dtype": pa.Int32},
+        "START_STATION_ID": {"dtype": pd.Int32Dtype()},
+        "START_STATION_NAME": {"dtype": pa.Category},
+        "USER_TYPE": {"dtype": pa.Category},
+    }
+)
+trips_cols_wanted = list(raw_trips_schema.columns)
+# Canonical names of ridership columns whose raw headers vary across years
+trips_column_aliases = {
+    "TRIP_DURATION": "TRIP__DURATION",
+    "TRIP_DURATION_SECONDS": "TRIP__DURATION",
+    "TRIP_START_TIME": "START_TIME",
+    "TRIP_STOP_TIME": "END_TIME",
+    "FROM_STATION_ID": "START_STATION_ID",
+    "FROM_STATION_NAME": "START_STATION_NAME",
+    "TO_STATION_ID": "END_STATION_ID",
+    "TO_STATION_NAME": "END_STATION_NAME",
+}
+# Approximate ratio of in-memory size of a loaded month of trips to the
+# size of its CSV file, used to cap the number of parallel readers
+csv_memory_multiplier = 3
+trips_timestamp_formats = [
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    pa_csv.ISO8601,
+]
 
 
 def get_local_csv_list(
@@ -108,11 +161,73 @@ def get_local_csv_list(
     return csvs
 
 
+def get_zip_csv_list(
+    raw_data_dir: str, years_wanted: List[int], use_prefect: bool = False
+) -> List[str]:
+    """Getting list of CSV data files inside local zip files."""
+    log_prefect("Getting list of zipped CSV data files...", True, use_prefect)
+    csvs = []
+    for zip_filepath in sorted(glob(f"{raw_data_dir}/*.zip")):
+        with ZipFile(zip_filepath, "r") as zipObj:
+            csvs += [
+                os.path.join(zip_filepath, m)
+                for m in zipObj.namelist()
+                if m.lower().endswith(".csv")
+                and any(str(y) in os.path.basename(m) for y in years_wanted)
+            ]
+    log_prefect("Done.", False, use_prefect)
+    return sorted(csvs)
+
+
+def split_zip_member_path(fpath: str) -> Tuple[Optional[str], str]:
+    """Split path to file inside a zip file into zip file and member."""
+    zip_member = re.match(r"(.+\.zip)[/\\](.+)$", fpath, flags=re.IGNORECASE)
+    if zip_member and os.path.isfile(zip_member.group(1)):
+        return zip_member.group(1), zip_member.group(2)
+    return None, fpath
+
+
+@contextmanager
+def open_trips_file(fpath: str) -> Iterator[Union[str, IO[bytes]]]:
+    """Open CSV file, streaming it out of its zip file if needed."""
+    zip_filepath, member = split_zip_member_path(fpath)
+    if not zip_filepath:
+        yield fpath
+        return
+    with ZipFile(zip_filepath, "r") as zipObj:
+        with zipObj.open(member) as f:
+            yield f
+
+
+def get_trips_file_size(fpath: str) -> int:
+    """Get uncompressed size of CSV file, which may be inside a zip file."""
+    zip_filepath, member = split_zip_member_path(fpath)
+    if not zip_filepath:
+        return os.path.getsize(fpath)
+    with ZipFile(zip_filepath, "r") as zipObj:
+        return zipObj.getinfo(member).file_size
+
+
+def is_zip_file_outdated(
+    file_name: str,
+    last_modified_timestamp: pd.Timestamp,
+    zip_files_last_modified: Dict[str, pd.Timestamp],
+) -> bool:
+    """Check if local data from a zip file is older than upstream file."""
+    parquet_file_modified_time = zip_files_last_modified.get(file_name, pd.NaT)
+    return (
+        pd.isna(parquet_file_modified_time)
+        or parquet_file_modified_time < last_modified_timestamp
+    )
+
+
 def get_ridership_data(
     raw_data_dir: str,
     url: str,
     last_modified_timestamp: pd.Timestamp,
     use_prefect: bool = False,
+    zip_files_last_modified: Optional[Dict[str, pd.Timestamp]] = None,
+    extract_files: bool = False,
 ) -> Dict[str, str]:
     """Download bikeshare trips data."""
     # Split URL to get the file name
@@ -121,40 +236,30 @@ def get_ridership_data(
     zip_filepath = os.path.join(raw_data_dir, file_name)
     destination_dir = os.path.abspath(os.path.join(zip_filepath, os.pardir))
 
-    # Check if previously downloaded contents are up-to-dte
-    parquet_data_filepath = os.path.join(raw_data_dir, "agg_data.parquet.gzip")
+    # Check if previously downloaded contents are up-to-dte, using only the
+    # freshness metadata of the zip file (without loading the data)
+    parquet_data_filepath = os.path.join(raw_data_dir, "agg_data")
     has_parquet = os.path.exists(parquet_data_filepath)
-    if has_parquet:
-        parquet_file_modified_time = (
-            pd.read_parquet(parquet_data_filepath)
-            .iloc[0]
-            .loc["last_modified_timestamp"]
+    if zip_files_last_modified is None:
+        zip_files_last_modified = get_zip_files_last_modified(
+            parquet_data_filepath
         )
-        # print(last_modified_timestamp, parquet_file_modified_time)
-        parquet_file_outdated_check = (
-            os.path.exists(zip_filepath)
-            and parquet_file_modified_time < last_modified_timestamp
-        )
-    else:
-        parquet_file_modified_time = pd.NaT
-        parquet_file_outdated_check = True
+    parquet_file_modified_time = zip_files_last_modified.get(file_name, pd.NaT)
+    parquet_file_outdated_check = is_zip_file_outdated(
+        file_name, last_modified_timestamp, zip_files_last_modified
+    )
 
     if not has_parquet or parquet_file_outdated_check:
         log_prefect(
             f"Downloading raw data file {file_name}...", True, use_prefect
         )
-        # print(zip_filepath, destination_dir, dest_filepath, existing_file)
 
         if not os.path.exists(zip_filepath):
-            r = requests.get(url)
-
-            # Writing the file to the local file system
-            with open(zip_filepath, "wb") as output_file:
-                output_file.write(r.content)
+            # Stream the file to the local file system
+            download_file(url, zip_filepath, use_prefect=use_prefect)
 
         csv_files = glob(f"{raw_data_dir}/*{year}-*.csv")
-        # print(csv_files)
-        if not csv_files:
+        if extract_files and not csv_files:
             with ZipFile(zip_filepath, "r") as zipObj:
                 # Extract all the contents of zip file
                 zipObj.extractall(destination_dir)
@@ -186,7 +291,7 @@ def get_ridership_data(
     return status_dict
 
 
-@pa.check_output(urls_schema)
+@check_io(out=urls_schema)
 def get_file_urls(
     main_dataset_url: str,
     dataset_params: Dict,
@@ -195,7 +300,7 @@ def get_file_urls(
 ) -> pd.DataFrame:
     """Get list of ridership file URLs."""
     log_prefect("Retrieving data URLs...", True, use_prefect)
-    package = requests.get(main_dataset_url, params=dataset_params).json()
+    package = get_json(main_dataset_url, dataset_params)
     resources = package["result"]["resources"]
     df = (
         pd.DataFrame.from_records(resources)[
@@ -218,21 +323,57 @@ def get_file_urls(
     return df_filtered
 
 
-@pa.check_output(get_data_status_schema)
+@check_io(out=get_data_status_schema)
 def get_data_zip_file_download_status(
-    data_all_urls: pd.DataFrame, raw_data_dir: str, use_prefect: bool = False
+    data_all_urls: pd.DataFrame,
+    raw_data_dir: str,
+    use_prefect: bool = False,
+    max_workers: int = 4,
+    extract_files: bool = False,
 ) -> pd.DataFrame:
     """Check whether ."""
     log_prefect(
         "Getting trips data and and modified status...", True, use_prefect
     )
+    zip_files_last_modified = get_zip_files_last_modified(
+        os.path.join(raw_data_dir, "agg_data")
+    )
+    data_all_urls = data_all_urls.assign(
+        last_modified_opendata=data_all_urls[
+            "last_modified_opendata"
+        ].dt.tz_localize("America/Toronto"),
+        zip_filepath=[
+            os.path.join(raw_data_dir, os.path.basename(url))
+            for url in data_all_urls["url"]
+        ],
+    )
+    # Download all outdated zip files concurrently
+    to_download = data_all_urls.loc[
+        [
+            is_zip_file_outdated(
+                os.path.basename(row["url"]),
+                row["last_modified_opendata"],
+                zip_files_last_modified,
+            )
+            and not os.path.exists(row["zip_filepath"])
+            for _, row in data_all_urls.iterrows()
+        ]
+    ]
+    download_files(
+        to_download["url"].tolist(),
+        to_download["zip_filepath"].tolist(),
+        max_workers,
+        use_prefect=use_prefect,
+    )
     status_dicts = []
     for _, row in data_all_urls.iterrows():
         status_dict = get_ridership_data(
             raw_data_dir,
             row["url"],
-            row["last_modified_opendata"].tz_localize("America/Toronto"),
+            row["last_modified_opendata"],
             use_prefect,
+            zip_files_last_modified,
+            extract_files,
         )
         status_dicts.append(status_dict)
     data_status = pd.DataFrame.from_records(status_dicts).astype(
@@ -250,6 +391,151 @@ def get_data_zip_file_download_status(
     return data_status
 
 
+def to_compact_dtypes(
+    df: pd.DataFrame, dtypes: Dict = compact_trips_dtypes
+) -> pd.DataFrame:
+    """Convert trips columns to compact dtypes, where present."""
+    return df.astype({c: dtype for c, dtype in dtypes.items() if c in df})
+
+
+def normalize_column_name(col: str) -> str:
+    """Convert raw ridership CSV header to canonical upper-case name."""
+    # Words may be separated by any whitespace or underscores
+    words = re.sub(r"[^A-Za-z0-9\s_]+", "", col).replace("_", " ").split()
+    name = "_".join(words).upper()
+    return trips_column_aliases.get(name, name)
+
+
+def sniff_trips_header(fpath: str) -> List[str]:
+    """Get raw column names from only the first line of a CSV file."""
+    with open_trips_file(fpath) as f:
+        if isinstance(f, str):
+            with open(f, "rb") as fb:
+                first_line = fb.readline()
+        else:
+            first_line = f.readline()
+    return next(csv.reader([first_line.decode("cp1252").rstrip("\r\n")]))
+
+
+def get_trips_csv_columns(
+    fpath: str, dtypes_dict: Dict, date_cols: List[str]
+) -> Tuple[List[str], Dict[str, str], Dict, List[str]]:
+    """Get raw names, canonical names, dtypes and dates of wanted columns.
+
+    Dtypes and datetime columns may be given by any variant of a raw header
+    and are returned by the header found in the file. Raises ValueError if
+    any wanted column is missing from the header.
+    """
+    raw_cols = sniff_trips_header(fpath)
+    cols_map = {c: normalize_column_name(c) for c in raw_cols}
+    usecols = [c for c in raw_cols if cols_map[c] in trips_cols_wanted]
+    raw_names = {cols_map[c]: c for c in usecols}
+    missing_cols = [c for c in trips_cols_wanted if c not in raw_names]
+    if missing_cols:
+        raise ValueError(
+            f"Trips file {fpath} has no column for: {', '.join(missing_cols)}"
+        )
+    dtypes = {
+        raw_names[normalize_column_name(c)]: dtype
+        for c, dtype in dtypes_dict.items()
+        if normalize_column_name(c) in raw_names
+    }
+    parse_dates = [
+        raw_names[normalize_column_name(c)]
+        for c in date_cols
+        if normalize_column_name(c) in raw_names
+    ]
+    return usecols, cols_map, dtypes, parse_dates
+
+
+def read_data_chunks(
+    fpath: str,
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    nan_cols: List[str],
+    duplicated_cols: List[str],
+    chunksize: int = 250_000,
+    use_prefect: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Stream single month's ridership data in cleaned batches."""
+    log_prefect(f"Streaming ridership data from {fpath}...", True, use_prefect)
+    # Read only the header and normalize the column names once
+    usecols, cols_map, dtypes, parse_dates = get_trips_csv_columns(
+        fpath, dtypes_dict, date_cols
+    )
+    # Hashes of (TRIP_ID, START_TIME) seen in previous chunks, to drop
+    # duplicates spread across chunk boundaries
+    seen_keys = set()
+    with open_trips_file(fpath) as f:
+        reader = pd.read_csv(
+            f,
+            encoding="cp1252",
+            usecols=usecols,
+            parse_dates=parse_dates,
+            dtype=dtypes,
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            chunk = (
+                chunk.rename(columns=cols_map)[trips_cols_wanted]
+                .dropna(subset=nan_cols)
+                .drop_duplicates(subset=duplicated_cols, keep="first")
+            )
+            keys = pd.util.hash_pandas_object(
+                chunk[duplicated_cols], index=False
+            ).tolist()
+            is_new = np.fromiter(
+                (k not in seen_keys for k in keys), dtype=bool, count=len(keys)
+            )
+            seen_keys.update(keys)
+            if is_new.any():
+                yield chunk[is_new]
+    log_prefect("Done.", False, use_prefect)
+
+
+def get_empty_trips_data(
+    fpath: str, dtypes_dict: Dict, date_cols: List[str]
+) -> pd.DataFrame:
+    """Get ridership data without rows, with the dtypes of parsed data."""
+    _, cols_map, dtypes, parse_dates = get_trips_csv_columns(
+        fpath, dtypes_dict, date_cols
+    )
+    # Columns without a given dtype are inferred as the schema's dtype
+    cols_dtypes = {
+        **{c: dtype.type for c, dtype in raw_trips_schema.dtypes.items()},
+        **{cols_map[c]: dtype for c, dtype in dtypes.items()},
+        **{cols_map[c]: "datetime64[ns]" for c in parse_dates},
+    }
+    return pd.DataFrame(
+        {c: pd.Series(dtype=cols_dtypes[c]) for c in trips_cols_wanted}
+    )
+
+
+def read_data_pyarrow(
+    fpath: str,
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    timestamp_formats: List[str] = trips_timestamp_formats,
+) -> pd.DataFrame:
+    """Parse wanted ridership columns with the pyarrow CSV reader."""
+    usecols, cols_map, dtypes, parse_dates = get_trips_csv_columns(
+        fpath, dtypes_dict, date_cols
+    )
+    column_types = {c: pyarrow.timestamp("ns") for c in parse_dates}
+    with open_trips_file(fpath) as f:
+        table = pa_csv.read_csv(
+            f,
+            read_options=pa_csv.ReadOptions(encoding="cp1252"),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=usecols,
+                column_types=column_types,
+                timestamp_parsers=timestamp_formats,
+            ),
+        )
+    return table.to_pandas().astype(dtypes).rename(columns=cols_map)
+
+
+@profile_stage
 def read_data(
     fpath: str,
     dtypes_dict: Dict,
@@ -257,40 +543,68 @@ def read_data(
     nan_cols: List[str],
     duplicated_cols: List[str],
     use_prefect: bool = False,
+    chunksize: Optional[int] = None,
+    engine: str = "pandas",
+    compact: bool = False,
 ) -> pd.DataFrame:
     """Read single month's ridership data, drop NaNs and export to CSV."""
+    if chunksize and engine != "pandas":
+        raise ValueError(
+            f"Chunked reading is not supported by CSV reader engine: {engine}"
+        )
+    if chunksize:
+        chunks = list(
+            read_data_chunks(
+                fpath,
+                dtypes_dict,
+                date_cols,
+                nan_cols,
+                duplicated_cols,
+                chunksize,
+                use_prefect,
+            )
+        )
+        if not chunks:
+            df = get_empty_trips_data(fpath, dtypes_dict, date_cols)
+            return to_compact_dtypes(df) if compact else df
+        # Convert after concatenating, since categories differ by chunk
+        df = pd.concat(chunks)
+        return to_compact_dtypes(df) if compact else df
     log_prefect(f"Reading ridership data from {fpath}...", True, use_prefect)
-    df = pd.read_csv(
-        fpath,
-        encoding="cp1252",
-        parse_dates=date_cols,
-        dtype=dtypes_dict,
-    )
-    df.columns = [re.sub(r"[^A-Za-z0-9\s]+", "", c) for c in list(df)]
-    df.columns = [
-        re.sub(r"[^A-Za-z0-9\s]+", "", c).replace(" ", "_").upper()
-        for c in list(df)
-    ]
-    df.columns = df.columns.str.replace(" ", "_").str.upper()
+    if engine == "pyarrow":
+        df = read_data_pyarrow(fpath, dtypes_dict, date_cols)
+    elif engine == "pandas":
+        # Parse only the wanted columns, found from the header line alone
+        usecols, cols_map, dtypes, parse_dates = get_trips_csv_columns(
+            fpath, dtypes_dict, date_cols
+        )
+        with open_trips_file(fpath) as f:
+            df = pd.read_csv(
+                f,
+                encoding="cp1252",
+                usecols=usecols,
+                parse_dates=parse_dates,
+                dtype=dtypes,
+            ).rename(columns=cols_map)
+    else:
+        raise ValueError(f"Unsupported CSV reader engine: {engine}")
+    if df.empty:
+        # Header-only file, without values to infer dtypes from
+        df = get_empty_trips_data(fpath, dtypes_dict, date_cols)
     df = (
-        df[
-            [
-                "TRIP_ID",
-                "TRIP__DURATION",
-                "START_STATION_ID",
-                "START_STATION_NAME",
-                "START_TIME",
-                "USER_TYPE",
-            ]
-        ]
+        df[trips_cols_wanted]
         .dropna(subset=nan_cols)
         .drop_duplicates(subset=duplicated_cols, keep="first")
     )
+    if compact:
+        df = to_compact_dtypes(df)
     log_prefect("Done.", False, use_prefect)
     return df
 
 
-@pa.check_output(raw_trips_schema)
+@check_io(
+    compact_schemas={"out": raw_trips_schema_compact}, out=raw_trips_schema
+)
 def get_single_ridership_data_file(
     url: str,
     dtypes_dict: Dict,
@@ -298,6 +612,9 @@ def get_single_ridership_data_file(
     nan_cols: List[str],
     duplicated_cols: List[str],
     use_prefect: bool = False,
+    chunksize: Optional[int] = None,
+    engine: str = "pandas",
+    compact: bool = False,
 ) -> pd.DataFrame:
     """Get single month's ridership data."""
     log_prefect("Retrieving monthly trips data...", True, use_prefect)
@@ -305,9 +622,248 @@ def get_single_ridership_data_file(
     if not use_prefect:
         print(f"Loading data from {fname}...", end="")
     df_trips_data = read_data(
-        url, dtypes_dict, date_cols, nan_cols, duplicated_cols
+        url,
+        dtypes_dict,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+        chunksize=chunksize,
+        engine=engine,
+        compact=compact,
     )
     if not use_prefect:
         print("Done.")
     log_prefect("Done.", False, use_prefect)
     return df_trips_data
+
+
+def get_num_workers(
+    csvs: List[str],
+    max_workers: Optional[int] = None,
+    max_memory_mb: Optional[float] = None,
+) -> int:
+    """Get number of parallel workers for reading ridership data files."""
+    num_workers = min(max_workers or os.cpu_count() or 1, len(csvs))
+    if max_memory_mb and csvs:
+        largest_file_mb = max(get_trips_file_size(f) for f in csvs) / 1e6
+        # At least 1MB per worker, since files can be small or empty
+        max_workers_memory = int(
+            max_memory_mb // max(largest_file_mb * csv_memory_multiplier, 1)
+        )
+        num_workers = min(num_workers, max_workers_memory)
+    return max(num_workers, 1)
+
+
+def _read_single_ridership_data_file(
+    fpath: str, **kwargs
+) -> Tuple[pd.DataFrame, List[Dict]]:
+    """Get single month's ridership data and profiles in a worker process."""
+    return run_with_stage_profiles(
+        get_single_ridership_data_file, fpath, **kwargs
+    )
+
+
+def get_multiple_ridership_data_files(
+    csvs: List[str],
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    nan_cols: List[str],
+    duplicated_cols: List[str],
+    max_workers: Optional[int] = None,
+    max_memory_mb: Optional[float] = None,
+    use_prefect: bool = False,
+    engine: str = "pandas",
+    compact: bool = False,
+) -> List[pd.DataFrame]:
+    """Get multiple months' ridership data, in parallel if possible."""
+    num_workers = get_num_workers(csvs, max_workers, max_memory_mb)
+    log_prefect(
+        f"Retrieving {len(csvs)} files of trips data with {num_workers} "
+        "worker(s)...",
+        True,
+        use_prefect,
+    )
+    read_kwargs = dict(
+        dtypes_dict=dtypes_dict,
+        date_cols=date_cols,
+        nan_cols=nan_cols,
+        duplicated_cols=duplicated_cols,
+        engine=engine,
+        compact=compact,
+    )
+    if num_workers == 1:
+        dfs = [get_single_ridership_data_file(f, **read_kwargs) for f in csvs]
+    else:
+        read_file = partial(_read_single_ridership_data_file, **read_kwargs)
+        dfs = []
+        # map returns results in the same order as the input list of files
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for df, profiles in executor.map(read_file, csvs):
+                dfs.append(df)
+                # Profiles of stages run by the workers
+                add_stage_profiles(profiles)
+    log_prefect("Done.", False, use_prefect)
+    return dfs
+
+
+def get_trips_cache_filepath(
+    processed_data_dir: str, csv_filepath: str
+) -> str:
+    """Get path to year/month partitioned Parquet copy of a trips CSV."""
+    csv_name = os.path.splitext(os.path.basename(csv_filepath))[0]
+    year_month = re.search(r"(\d{4})-(\d{2})", csv_name)
+    year, month = year_month.groups() if year_month else ("unknown", "00")
+    return os.path.join(
+        processed_data_dir,
+        "trips",
+        f"year={year}",
+        f"month={month}",
+        f"{csv_name}.parquet",
+    )
+
+
+def get_trips_cache_last_modified(cache_filepath: str) -> pd.Timestamp:
+    """Get upstream modification time of the zip file a cache came from."""
+    if not os.path.exists(cache_filepath):
+        return pd.NaT
+    metadata = pq.read_schema(cache_filepath).metadata or {}
+    last_modified = metadata.get(b"last_modified_opendata")
+    return pd.Timestamp(last_modified.decode()) if last_modified else pd.NaT
+
+
+def write_trips_cache_file(
+    df: pd.DataFrame,
+    cache_filepath: str,
+    zip_file: str,
+    last_modified_timestamp: pd.Timestamp,
+) -> None:
+    """Export cleaned trips to Parquet, tagged with upstream zip file."""
+    os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            b"zip_file": zip_file.encode(),
+            b"last_modified_opendata": (
+                format_timestamp_utc(last_modified_timestamp).encode()
+            ),
+        }
+    )
+    pq.write_table(table, cache_filepath)
+
+
+@profile_stage
+@check_io(
+    compact_schemas={"out": raw_trips_schema_compact}, out=raw_trips_schema
+)
+def read_trips_cache_file(
+    cache_filepath: str, use_prefect: bool = False, compact: bool = False
+) -> pd.DataFrame:
+    """Load single month's cleaned trips from the Parquet cache."""
+    log_prefect(
+        f"Loading cached trips from {cache_filepath}...", True, use_prefect
+    )
+    df = pd.read_parquet(cache_filepath)
+    if compact:
+        df = to_compact_dtypes(df)
+    log_prefect("Done.", False, use_prefect)
+    return df
+
+
+def convert_csv_to_parquet_cache_file(
+    csv_filepath: str,
+    cache_filepath: str,
+    zip_file: str,
+    last_modified_timestamp: pd.Timestamp,
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    nan_cols: List[str],
+    duplicated_cols: List[str],
+    engine: str = "pandas",
+) -> str:
+    """Convert single month's trips CSV to a Parquet cache file."""
+    df = get_single_ridership_data_file(
+        csv_filepath,
+        dtypes_dict,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+        engine=engine,
+    )
+    write_trips_cache_file(
+        df, cache_filepath, zip_file, last_modified_timestamp
+    )
+    return cache_filepath
+
+
+def _convert_csv_to_parquet_cache_file(
+    filepaths: Tuple[str, str], **kwargs
+) -> List[Dict]:
+    """Convert single month's trips CSV to Parquet in a worker process."""
+    _, profiles = run_with_stage_profiles(
+        convert_csv_to_parquet_cache_file, *filepaths, **kwargs
+    )
+    return profiles
+
+
+def convert_csvs_to_parquet_cache(
+    csvs: List[str],
+    processed_data_dir: str,
+    zip_file: str,
+    last_modified_timestamp: pd.Timestamp,
+    dtypes_dict: Dict,
+    date_cols: List[str],
+    nan_cols: List[str],
+    duplicated_cols: List[str],
+    use_prefect: bool = False,
+    engine: str = "pandas",
+    max_workers: Optional[int] = 1,
+    max_memory_mb: Optional[float] = None,
+) -> List[str]:
+    """Convert monthly trips CSVs to Parquet, unless already up-to-date."""
+    log_prefect("Converting trips CSVs to Parquet...", True, use_prefect)
+    cache_filepaths = [
+        get_trips_cache_filepath(processed_data_dir, f) for f in csvs
+    ]
+    outdated = []
+    for csv_filepath, cache_filepath in zip(csvs, cache_filepaths):
+        cache_last_modified = get_trips_cache_last_modified(cache_filepath)
+        if (
+            pd.isna(cache_last_modified)
+            or cache_last_modified < last_modified_timestamp
+        ):
+            outdated.append((csv_filepath, cache_filepath))
+    num_workers = get_num_workers(
+        [f for f, _ in outdated], max_workers, max_memory_mb
+    )
+    log_prefect(
+        f"Converting {len(outdated)} outdated CSVs with {num_workers} "
+        "worker(s)...",
+        True,
+        use_prefect,
+    )
+    convert_kwargs = dict(
+        zip_file=zip_file,
+        last_modified_timestamp=last_modified_timestamp,
+        dtypes_dict=dtypes_dict,
+        date_cols=date_cols,
+        nan_cols=nan_cols,
+        duplicated_cols=duplicated_cols,
+        engine=engine,
+    )
+    if num_workers == 1:
+        for csv_filepath, cache_filepath in outdated:
+            convert_csv_to_parquet_cache_file(
+                csv_filepath, cache_filepath, **convert_kwargs
+            )
+    else:
+        # Each worker writes the Parquet file of the CSV it read, so that at
+        # most one month of trips per worker is held in memory
+        convert_file = partial(
+            _convert_csv_to_parquet_cache_file, **convert_kwargs
+        )
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for profiles in executor.map(convert_file, outdated):
+                add_stage_profiles(profiles)
+    log_prefect("Done.", False, use_prefect)
+    return cache_filepaths
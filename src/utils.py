@@ -8,10 +8,52 @@
 # pylint: disable=logging-fstring-interpolation
 
 
+import contextvars
+import inspect
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from time import monotonic, perf_counter, process_time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
 import pandas as pd
 import pandera as pa
+import psutil
+import pyarrow
 from IPython.display import display
 from prefect import get_run_logger
+from pyarrow import parquet as pq
+
+validation_modes = ["full", "sample", "head", "dtypes", "off"]
+# Validation mode of all stages, and of individual stages (function names),
+# e.g. BIKESHARE_VALIDATION_STAGES="merge_trips_neighbourhood_stats=sample"
+validation_config = {
+    "default": os.environ.get("BIKESHARE_VALIDATION_MODE", "full"),
+    "stages": dict(
+        pair.strip().split("=", 1)
+        for pair in os.environ.get("BIKESHARE_VALIDATION_STAGES", "").split(
+            ","
+        )
+        if pair.strip()
+    ),
+    # Number of rows validated in the sample and head modes
+    "num_rows": int(os.environ.get("BIKESHARE_VALIDATION_ROWS", 10_000)),
+}
+validation_timings: Dict[Tuple[str, str], Dict] = {}
+# Profile of each call to a profiled stage, in the current run, keeping only
+# the latest calls
+stage_profiles: Deque[Dict] = deque(
+    maxlen=int(os.environ.get("BIKESHARE_PROFILE_MAX_CALLS", 10_000))
+)
+# Profile of the running top-level stage, which nested stages (eg. called
+# per chunk) do not sample RSS for again
+active_stage_profile = contextvars.ContextVar(
+    "active_stage_profile", default=None
+)
 
 
 def summarize_df(df: pd.DataFrame) -> None:
@@ -57,6 +99,36 @@ def log_prefect(
         print(msg)
 
 
+def run_concurrently(
+    tasks: Dict[str, Tuple[Callable, Tuple]],
+    timeouts: Optional[Dict[str, float]] = None,
+    default_timeout: Optional[float] = 300,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run independent functions in threads, each with its own timeout."""
+    timeouts = timeouts or {}
+    executor = ThreadPoolExecutor(
+        max_workers=max(min(len(tasks), max_workers or len(tasks)), 1)
+    )
+    try:
+        # Copy the context (eg. Prefect run context) into each thread
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, f, *args)
+            for name, (f, args) in tasks.items()
+        }
+        start = monotonic()
+        results = {}
+        for name, future in futures.items():
+            timeout = timeouts.get(name, default_timeout)
+            if timeout is not None:
+                timeout = max(timeout - (monotonic() - start), 0)
+            results[name] = future.result(timeout=timeout)
+    finally:
+        # Do not wait for tasks that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
 def pandera_validate_data(
     df: pd.DataFrame,
     schema: pa.DataFrameSchema,
@@ -75,8 +147,393 @@ def pandera_validate_data(
     log_prefect(f"Done validating {ds_name}.", False, use_prefect)
 
 
+def set_validation_mode(mode: str, stage: Optional[str] = None) -> None:
+    """Set validation mode of all stages, or of one stage by function name."""
+    if mode not in validation_modes:
+        raise ValueError(f"Unsupported validation mode: {mode}")
+    if stage is None:
+        validation_config["default"] = mode
+    else:
+        validation_config["stages"][stage] = mode
+
+
+def get_validation_mode(stage: str) -> str:
+    """Get validation mode of a stage."""
+    mode = validation_config["stages"].get(stage, validation_config["default"])
+    if mode not in validation_modes:
+        raise ValueError(f"Unsupported validation mode: {mode}")
+    return mode
+
+
+def validate_df(
+    schema: pa.DataFrameSchema,
+    df: pd.DataFrame,
+    mode: str,
+    num_rows: Optional[int] = None,
+) -> pd.DataFrame:
+    """Validate a DataFrame against a pandera schema, in a validation mode."""
+    num_rows = num_rows or validation_config["num_rows"]
+    if mode == "off":
+        return df
+    if mode == "dtypes":
+        # Checks pass trivially with no rows, so only columns/dtypes are tested
+        schema.validate(df.head(0))
+        return df
+    if mode == "head":
+        schema.validate(df, head=num_rows)
+        return df
+    if mode == "sample":
+        schema.validate(df, sample=min(num_rows, len(df)), random_state=42)
+        return df
+    return schema.validate(df)
+
+
+def record_validation_time(
+    stage: str, mode: str, validation_seconds: float, stage_seconds: float
+) -> None:
+    """Add validation and overall run time of one call to a stage."""
+    timings = validation_timings.setdefault(
+        (stage, mode),
+        {"calls": 0, "validation_seconds": 0.0, "seconds": 0.0},
+    )
+    timings["calls"] += 1
+    timings["validation_seconds"] += validation_seconds
+    timings["seconds"] += stage_seconds
+
+
+def get_validation_report() -> pd.DataFrame:
+    """Get validation run time per stage, next to the stage's run time."""
+    report = pd.DataFrame.from_records(
+        [
+            {"stage": stage, "mode": mode, **timings}
+            for (stage, mode), timings in validation_timings.items()
+        ],
+        columns=["stage", "mode", "calls", "validation_seconds", "seconds"],
+    ).set_index(["stage", "mode"])
+    report["validation_share"] = report["validation_seconds"] / report[
+        "seconds"
+    ].where(report["seconds"] > 0)
+    return report.sort_values("validation_seconds", ascending=False).round(3)
+
+
+def check_io(
+    compact_schemas: Optional[Dict[str, pa.DataFrameSchema]] = None,
+    **schemas: pa.DataFrameSchema,
+) -> Callable:
+    """Validate inputs/output with pandera, in the stage's validation mode.
+
+    Keys of schemas are argument names, or out for the output, as with
+    pandera.check_io. If compact_schemas is given, functions wrapped by this
+    decorator accept a compact argument and, when it is True, are validated
+    against compact_schemas instead. The stage's validation mode (see
+    set_validation_mode) selects whether all rows, a sample, the first rows,
+    only dtypes or nothing is validated.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        stage = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            mode = get_validation_mode(stage)
+            if mode == "off":
+                return func(*args, **kwargs)
+            start = perf_counter()
+            bound = signature.bind(*args, **kwargs)
+            stage_schemas = schemas
+            if compact_schemas is not None and bound.arguments.get(
+                "compact", False
+            ):
+                stage_schemas = compact_schemas
+            for name, schema in stage_schemas.items():
+                if name != "out" and name in bound.arguments:
+                    bound.arguments[name] = validate_df(
+                        schema, bound.arguments[name], mode
+                    )
+            validation_seconds = perf_counter() - start
+            out = func(*bound.args, **bound.kwargs)
+            validation_start = perf_counter()
+            if "out" in stage_schemas:
+                validate_df(stage_schemas["out"], out, mode)
+            end = perf_counter()
+            record_validation_time(
+                stage,
+                mode,
+                validation_seconds + end - validation_start,
+                end - start,
+            )
+            return out
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def sample_peak_rss(interval: float = 0.01):
+    """Sample resident set size of the process on a thread, during a block.
+
+    The yielded dict holds the RSS at the start of the block and its peak
+    (in bytes), which is final once the block exits.
+    """
+    process = psutil.Process()
+    rss = {"start": process.memory_info().rss}
+    rss["peak"] = rss["start"]
+    stop = threading.Event()
+
+    def sample() -> None:
+        while not stop.wait(interval):
+            rss["peak"] = max(rss["peak"], process.memory_info().rss)
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield rss
+    finally:
+        stop.set()
+        thread.join()
+        rss["peak"] = max(rss["peak"], process.memory_info().rss)
+
+
+def get_num_rows(obj: Any) -> Optional[int]:
+    """Get number of rows of a DataFrame, or None for other objects."""
+    return len(obj) if isinstance(obj, pd.DataFrame) else None
+
+
+@contextmanager
+def profile_block(
+    stage: str, use_prefect: bool = False, rows_in: Optional[int] = None
+):
+    """Record wall time, CPU time, rows and peak RSS increase of a block.
+
+    The yielded profile can be updated inside the block, eg. with rows_out.
+    Peak RSS is sampled every 10ms, so shorter spikes can be missed. It is
+    only sampled for top-level blocks, not for blocks nested in them.
+    """
+    profile = {
+        "stage": stage,
+        "rows_in": rows_in,
+        "rows_out": None,
+        "max_rss_increase_mb": None,
+    }
+    nested = active_stage_profile.get() is not None
+    token = active_stage_profile.set(profile)
+    cpu_start = process_time()
+    wall_start = perf_counter()
+    try:
+        if nested:
+            yield profile
+        else:
+            with sample_peak_rss() as rss:
+                yield profile
+    finally:
+        active_stage_profile.reset(token)
+        profile["wall_seconds"] = perf_counter() - wall_start
+        # CPU time and RSS are process-wide, so they include any other
+        # running threads
+        profile["cpu_seconds"] = process_time() - cpu_start
+        rss_msg = ""
+        if not nested:
+            profile["max_rss_increase_mb"] = (rss["peak"] - rss["start"]) / 1e6
+            rss_msg = f", peak RSS +{profile['max_rss_increase_mb']:.1f}MB"
+        stage_profiles.append(profile)
+        log_prefect(
+            f"Profiled {stage}: {profile['wall_seconds']:.3f}s wall, "
+            f"{profile['cpu_seconds']:.3f}s CPU, rows "
+            f"{profile['rows_in']} -> {profile['rows_out']}{rss_msg}",
+            True,
+            use_prefect,
+        )
+
+
+def profile_stage(func: Callable) -> Callable:
+    """Profile each call to a pipeline stage (see profile_block).
+
+    Rows in are counted from the first DataFrame argument and rows out from
+    the returned DataFrame.
+    """
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        rows_in = next(
+            (
+                get_num_rows(arg)
+                for arg in bound.arguments.values()
+                if isinstance(arg, pd.DataFrame)
+            ),
+            None,
+        )
+        with profile_block(
+            func.__name__, bound.arguments.get("use_prefect", False), rows_in
+        ) as profile:
+            out = func(*args, **kwargs)
+            profile["rows_out"] = get_num_rows(out)
+        return out
+
+    return wrapper
+
+
+def run_with_stage_profiles(
+    func: Callable, *args, **kwargs
+) -> Tuple[Any, List[Dict]]:
+    """Run a function in a worker process, returning its stage profiles.
+
+    Profiles recorded in a worker process are otherwise lost, so the parent
+    process adds them to its own run profile (see add_stage_profiles).
+    """
+    stage_profiles.clear()
+    token = active_stage_profile.set(None)
+    try:
+        out = func(*args, **kwargs)
+    finally:
+        active_stage_profile.reset(token)
+    return out, list(stage_profiles)
+
+
+def add_stage_profiles(profiles: List[Dict]) -> None:
+    """Add profiles returned by a worker process to the run profile."""
+    stage_profiles.extend(profiles)
+
+
+def get_run_profile() -> pd.DataFrame:
+    """Get profiles of all calls to profiled stages in the current run."""
+    return pd.DataFrame.from_records(
+        list(stage_profiles),
+        columns=[
+            "stage",
+            "rows_in",
+            "rows_out",
+            "wall_seconds",
+            "cpu_seconds",
+            "max_rss_increase_mb",
+        ],
+    ).astype({"rows_in": pd.Int64Dtype(), "rows_out": pd.Int64Dtype()})
+
+
+def write_run_profile(filepath: str) -> None:
+    """Export run profile to a JSON (.json) or CSV file, to compare runs."""
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    df_profile = get_run_profile()
+    if filepath.endswith(".json"):
+        df_profile.to_json(filepath, orient="records", indent=2)
+    else:
+        df_profile.to_csv(filepath, index=False)
+
+
+def get_memory_report(
+    df_before: pd.DataFrame, df_after: pd.DataFrame
+) -> pd.DataFrame:
+    """Compare in-memory size of two DataFrames, in bytes per row."""
+    report = pd.DataFrame(
+        {
+            f"{name}_bytes_per_row": (
+                df.memory_usage(deep=True, index=False) / max(len(df), 1)
+            )
+            for name, df in zip(["before", "after"], [df_before, df_after])
+        }
+    ).rename_axis("column")
+    report.loc["TOTAL"] = report.sum()
+    report["ratio"] = (
+        report["before_bytes_per_row"] / report["after_bytes_per_row"]
+    )
+    return report.round(2)
+
+
 def save_data_to_parquet_file(
-    df: pd.DataFrame, filepath: str = "data/raw/myfile.parquet.gzip"
+    df: pd.DataFrame,
+    filepath: str = "data/raw/myfile.parquet.gzip",
+    metadata: Optional[Dict[str, str]] = None,
 ) -> None:
     """Export DataFrame to a parquet file."""
-    df.to_parquet(filepath, index=False, engine="auto")
+    if not metadata:
+        df.to_parquet(filepath, index=False, engine="auto")
+        return
+    # Add custom key-value metadata to the parquet file footer
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            **{k.encode(): v.encode() for k, v in metadata.items()},
+        }
+    )
+    pq.write_table(table, filepath)
+
+
+def format_timestamp_utc(timestamp: pd.Timestamp) -> str:
+    """Format timestamp as ISO-8601 string in UTC, with microseconds."""
+    timestamp = pd.Timestamp(timestamp)
+    if pd.isna(timestamp):
+        return "NaT"
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC").isoformat(timespec="microseconds")
+
+
+def get_freshness_metadata(df: pd.DataFrame) -> Dict[str, str]:
+    """Get latest upstream modification time per zip file as metadata."""
+    zips_last_mod = df.groupby("zip_file")["last_modified_timestamp"].max()
+    return {
+        "zip_files_last_modified": json.dumps(
+            {str(k): format_timestamp_utc(v) for k, v in zips_last_mod.items()}
+        )
+    }
+
+
+def get_zip_files_last_modified(
+    parquet_data_filepath: str,
+) -> Dict[str, pd.Timestamp]:
+    """Get upstream modification time per zip file of aggregated data."""
+    if os.path.isdir(parquet_data_filepath):
+        # Partitioned store, with its manifest of partitions
+        manifest_filepath = os.path.join(
+            parquet_data_filepath, "_manifest.json"
+        )
+        if not os.path.exists(manifest_filepath):
+            return {}
+        with open(manifest_filepath) as f:
+            partitions = pd.DataFrame.from_records(
+                list(json.load(f).values()),
+                columns=["zip_file", "last_modified_timestamp"],
+            )
+        # Compare timestamps, not strings, which can differ in UTC offset
+        # and precision
+        zips_last_mod = (
+            pd.to_datetime(
+                partitions["last_modified_timestamp"],
+                utc=True,
+                format="ISO8601",
+            )
+            .groupby(partitions["zip_file"])
+            .max()
+            .map(format_timestamp_utc)
+            .to_dict()
+        )
+    elif os.path.exists(parquet_data_filepath):
+        # Single file, with freshness stored in the footer metadata
+        metadata = pq.read_schema(parquet_data_filepath).metadata or {}
+        if b"zip_files_last_modified" in metadata:
+            zips_last_mod = json.loads(metadata[b"zip_files_last_modified"])
+        else:
+            # Files written without freshness metadata
+            zips_last_mod = json.loads(
+                get_freshness_metadata(
+                    pd.read_parquet(
+                        parquet_data_filepath,
+                        columns=["zip_file", "last_modified_timestamp"],
+                    )
+                )["zip_files_last_modified"]
+            )
+    else:
+        return {}
+    return (
+        pd.to_datetime(
+            pd.Series(zips_last_mod, dtype=pd.StringDtype()),
+            utc=True,
+            format="ISO8601",
+        )
+        .dt.tz_convert("America/Toronto")
+        .to_dict()
+    )
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test aggregation engines and the partitioned aggregated data store."""
+
+# pylint: disable=invalid-name
+
+
+import os
+
+import pandas as pd
+import pytest
+
+import src.aggregate_data as ad
+import src.trips as bt
+from benchmarks.synthetic_data import (
+    make_synthetic_stations_stats,
+    write_synthetic_month_trips_csv,
+)
+from src.process_trips import process_trips_data
+from tests.trips_fixtures import (
+    aggregate,
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    get_merged_trips,
+    last_mod,
+    nan_cols,
+)
+
+
+def groupby_agg_formatted(data: pd.DataFrame, engine: str) -> pd.DataFrame:
+    """Group and aggregate trips, with the dtypes of aggregated data."""
+    return ad.format_agg_data(
+        ad.groupby_agg(data, ad.agg_keys, ad.agg_funcs, engine),
+        "trips.zip",
+        True,
+        "trips.csv",
+        last_mod,
+    )
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["", "compact"])
+def merged_trips(request):
+    """Get synthetic trips merged with station stats, by compactness."""
+    return get_merged_trips(5_000, compact=request.param), request.param
+
+
+def test_aggregate_merged_data_engines_match(merged_trips):
+    data_merged, compact = merged_trips
+    pd.testing.assert_frame_equal(
+        aggregate(data_merged, compact=compact, engine="numpy"),
+        aggregate(data_merged, compact=compact, engine="pandas"),
+    )
+
+
+def test_aggregate_merged_data_single_group(merged_trips):
+    data_merged, compact = merged_trips
+    first_group = data_merged[ad.agg_keys].iloc[0]
+    data_merged = data_merged[
+        (data_merged[ad.agg_keys] == first_group).all(axis=1)
+    ]
+    df_agg = aggregate(data_merged, compact=compact, engine="numpy")
+    assert len(df_agg) == 1
+    assert df_agg["NUM_TRIPS"].iloc[0] == len(data_merged)
+    pd.testing.assert_frame_equal(
+        df_agg, aggregate(data_merged, compact=compact, engine="pandas")
+    )
+
+
+def test_groupby_agg_engines_match_with_nulls(merged_trips):
+    data_merged, _ = merged_trips
+    data_merged = data_merged.copy()
+    # Unknown station names are not counted as stations, unknown
+    # neighbourhoods drop their trips and unknown attributes sum as zero
+    data_merged.loc[data_merged.index[::7], "START_STATION_NAME"] = pd.NA
+    data_merged.loc[data_merged.index[::11], "AREA_NAME"] = pd.NA
+    data_merged.loc[data_merged.index[::13], "CAPACITY"] = pd.NA
+    df_agg = groupby_agg_formatted(data_merged, "numpy")
+    assert df_agg["NUM_TRIPS"].sum() == data_merged["AREA_NAME"].notna().sum()
+    pd.testing.assert_frame_equal(
+        df_agg, groupby_agg_formatted(data_merged, "pandas")
+    )
+
+
+def test_groupby_agg_engines_match_all_null_station_names(merged_trips):
+    data_merged, _ = merged_trips
+    data_merged = data_merged.head(100).copy()
+    data_merged["START_STATION_NAME"] = pd.NA
+    df_agg = groupby_agg_formatted(data_merged, "numpy")
+    assert (df_agg["NUM_STATIONS"] == 0).all()
+    pd.testing.assert_frame_equal(
+        df_agg, groupby_agg_formatted(data_merged, "pandas")
+    )
+
+
+def test_load_partitioned_parquet_data_empty_store(tmp_path):
+    df_agg = ad.load_partitioned_parquet_data(str(tmp_path / "agg_data"))
+    assert df_agg.empty
+    assert list(df_agg.columns) == list(ad.agg_schema.columns)
+
+
+def test_update_partitioned_parquet_data(merged_trips, tmp_path):
+    data_merged, _ = merged_trips
+    store_dir = str(tmp_path / "agg_data")
+    df_agg = groupby_agg_formatted(data_merged, "pandas")
+    df_other = df_agg.assign(csv_file="other.csv").astype(
+        {"csv_file": pd.StringDtype()}
+    )
+    assert (
+        len(
+            ad.update_partitioned_parquet_data(
+                pd.concat([df_agg, df_other], ignore_index=True), store_dir
+            )
+        )
+        == 2
+    )
+    # Up-to-date partitions are not re-written
+    assert ad.update_partitioned_parquet_data(df_agg, store_dir) == []
+    pd.testing.assert_frame_equal(
+        ad.load_partitioned_parquet_data(store_dir),
+        pd.concat([df_other, df_agg], ignore_index=True),
+    )
+
+
+def aggregate_in_memory(fpath: str, station_index: dict) -> pd.DataFrame:
+    """Aggregate trips file after loading all its trips."""
+    df = bt.get_single_ridership_data_file(
+        fpath, dtypes_dict_trips, date_cols, nan_cols, duplicated_cols
+    )
+    return ad.aggregate_keyed_trips_data(
+        ad.add_station_keys(process_trips_data(df), station_index),
+        station_index,
+        "trips.zip",
+        True,
+        os.path.basename(fpath),
+        last_mod,
+    )
+
+
+@pytest.mark.parametrize("num_trips", [0, 5_000], ids=["empty", "trips"])
+def test_aggregate_trips_file_in_chunks(tmp_path, num_trips):
+    station_index = ad.get_station_index(make_synthetic_stations_stats())
+    fpath = str(tmp_path / "Bike share ridership 2021-01.csv")
+    if num_trips:
+        write_synthetic_month_trips_csv(fpath, 2021, 1, num_trips)
+    else:
+        with open(fpath, "w") as f:
+            f.write(
+                "Trip Id,Trip  Duration,Start Station Id,Start Time,"
+                "Start Station Name,End Station Id,End Time,"
+                "End Station Name,Bike Id,User Type\n"
+            )
+    df_agg = ad.aggregate_trips_file_in_chunks(
+        fpath,
+        station_index,
+        dtypes_dict_trips,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+        "trips.zip",
+        True,
+        last_mod,
+        chunksize=1_000,
+    )
+    assert df_agg["NUM_TRIPS"].sum() <= num_trips
+    pd.testing.assert_frame_equal(
+        df_agg, aggregate_in_memory(fpath, station_index)
+    )
+
+
+@pytest.fixture(scope="module")
+def processed_trips(tmp_path_factory):
+    """Get processed synthetic trips of single month."""
+    fpath = str(tmp_path_factory.mktemp("trips") / "2021-01.csv")
+    write_synthetic_month_trips_csv(fpath, 2021, 1, 5_000)
+    df = bt.get_single_ridership_data_file(
+        fpath, dtypes_dict_trips, date_cols, nan_cols, duplicated_cols
+    )
+    return process_trips_data(df)
+
+
+def merge_on_station_names(
+    df_trips: pd.DataFrame, df_stations_stats: pd.DataFrame
+) -> pd.DataFrame:
+    """Merge trips with station stats on station names, as before keys."""
+    return df_trips.merge(
+        df_stations_stats.rename(columns={"NAME": "START_STATION_NAME"}),
+        on="START_STATION_NAME",
+        how="inner",
+    )
+
+
+def test_merge_trips_neighbourhood_stats_matches_name_merge(processed_trips):
+    df_stations_stats = make_synthetic_stations_stats()
+    df_merged = ad.merge_trips_neighbourhood_stats(
+        processed_trips, df_stations_stats
+    )
+    df_merged_names = merge_on_station_names(
+        processed_trips, df_stations_stats
+    )
+    assert len(df_merged) == len(df_merged_names) > 0
+    cols = ["TRIP_ID", "STATION_ID", "AREA_NAME", "CAPACITY", "PHONE"]
+    pd.testing.assert_frame_equal(
+        df_merged[cols].sort_values("TRIP_ID", ignore_index=True),
+        df_merged_names[cols]
+        .sort_values("TRIP_ID", ignore_index=True)
+        .astype(df_merged[cols].dtypes),
+    )
+
+
+def test_get_station_keys_renamed_station(processed_trips):
+    df_stations_stats = make_synthetic_stations_stats()
+    station = df_stations_stats.iloc[3]
+    df_trips = processed_trips.head(3).assign(
+        START_STATION_ID=pd.array([station["STATION_ID"], pd.NA, 1], "Int64"),
+        START_STATION_NAME=pd.array(
+            ["Unknown Name", "Old Name", "Old Name"], "string"
+        ),
+    )
+    # Trips with unknown IDs are only keyed by their station's old name if
+    # it is given as an alias
+    assert ad.get_station_keys(
+        df_trips, ad.get_station_index(df_stations_stats)
+    ).tolist() == [3, -1, -1]
+    station_index = ad.get_station_index(
+        df_stations_stats, {"Old Name": station["STATION_ID"]}
+    )
+    assert ad.get_station_keys(df_trips, station_index).tolist() == [3, 3, 3]
+
+
+def test_get_station_keys_sparse_ids(processed_trips):
+    df_stations_stats = make_synthetic_stations_stats().head(2)
+    df_stations_stats["STATION_ID"] = [2**40, 5]
+    df_trips = processed_trips.head(3).assign(
+        START_STATION_ID=pd.array([5, 2**40, 6], "Int64"),
+        START_STATION_NAME=pd.array(["a", "b", "c"], "string"),
+    )
+    station_index = ad.get_station_index(df_stations_stats)
+    assert ad.get_station_keys(df_trips, station_index).tolist() == [1, 0, -1]
+
+
+def test_add_station_keys_empty_stations(processed_trips):
+    station_index = ad.get_station_index(
+        make_synthetic_stations_stats().head(0)
+    )
+    assert ad.add_station_keys(processed_trips, station_index).empty
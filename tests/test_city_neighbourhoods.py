@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test cached, STRtree-indexed neighbourhood lookups of points."""
+
+# pylint: disable=invalid-name,redefined-outer-name
+
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+import src.city_neighbourhoods as cn
+
+
+def get_grid_neighbourhoods(num_cols: int = 3) -> gpd.GeoDataFrame:
+    """Get square neighbourhoods on a grid, sharing their edges."""
+    boxes = [
+        box(x, y, x + 1, y + 1)
+        for y in range(num_cols)
+        for x in range(num_cols)
+    ]
+    return gpd.GeoDataFrame(
+        {
+            "AREA_NAME": [f"Area {k}" for k in range(len(boxes))],
+            "Shape__Area": np.ones(len(boxes)),
+        },
+        geometry=boxes,
+        crs=4326,
+    )
+
+
+@pytest.fixture
+def df_points():
+    rng = np.random.default_rng(42)
+    num_points = 200
+    lons = rng.uniform(-0.5, 3.5, num_points)
+    lats = rng.uniform(-0.5, 3.5, num_points)
+    # Points on shared edges and corners are not contained by any polygon
+    lons[:3], lats[:3] = [1.0, 1.0, 2.0], [0.5, 1.0, 2.5]
+    return pd.DataFrame(
+        {"station_id": np.arange(num_points), "lat": lats, "lon": lons}
+    )
+
+
+def test_get_neighbourhood_codes_matches_contains(df_points):
+    gdf = get_grid_neighbourhoods()
+    codes = cn.get_neighbourhood_codes(
+        cn.get_neighbourhood_index(gdf),
+        df_points["lon"].to_numpy(),
+        df_points["lat"].to_numpy(),
+    )
+    # Test each point against each polygon
+    codes_contains = np.array(
+        [
+            next(
+                (
+                    k
+                    for k, polygon in enumerate(gdf["geometry"])
+                    if polygon.contains(gpd.points_from_xy([lon], [lat])[0])
+                ),
+                -1,
+            )
+            for lon, lat in zip(df_points["lon"], df_points["lat"])
+        ]
+    )
+    np.testing.assert_array_equal(codes, codes_contains)
+    assert (codes[:3] == -1).all()
+    assert (codes >= 0).any() and (codes == -1).any()
+
+
+def test_get_neighbourhood_codes_overlapping_polygons():
+    gdf = gpd.GeoDataFrame(
+        {"AREA_NAME": ["Big", "Small", "Other"]},
+        geometry=[box(0, 0, 2, 2), box(0, 0, 1, 1), box(5, 5, 6, 6)],
+        crs=4326,
+    )
+    index = cn.get_neighbourhood_index(gdf)
+    lons, lats = np.array([0.5, 1.5, 5.5, 9.0]), np.array([0.5, 1.5, 5.5, 9.0])
+    # Points in several polygons get the first one
+    np.testing.assert_array_equal(
+        cn.get_neighbourhood_codes(index, lons, lats), [0, 0, 2, -1]
+    )
+    np.testing.assert_array_equal(
+        cn.get_neighbourhood_codes(
+            cn.get_neighbourhood_index(gdf.iloc[[1, 0, 2]]), lons, lats
+        ),
+        [0, 1, 2, -1],
+    )
+
+
+def test_get_data_with_neighbourhood_cached_matches_sjoin(df_points, tmp_path):
+    gdf = get_grid_neighbourhoods()
+    cache_filepath = str(tmp_path / "neighbourhoods.parquet")
+    df_sjoin = cn.get_data_with_neighbourhood(
+        gdf, df_points, "lat", "lon", "station_id"
+    )
+    for _ in range(2):
+        df_cached = cn.get_data_with_neighbourhood(
+            gdf,
+            df_points,
+            "lat",
+            "lon",
+            "station_id",
+            cache_filepath=cache_filepath,
+        )
+        pd.testing.assert_frame_equal(
+            df_cached.sort_values("station_id", ignore_index=True),
+            df_sjoin.sort_values("station_id", ignore_index=True),
+            check_dtype=False,
+        )
+
+
+def test_get_cached_neighbourhoods_invalidation(df_points, tmp_path, capsys):
+    gdf = get_grid_neighbourhoods()
+    cache_filepath = str(tmp_path / "neighbourhoods.parquet")
+    args = ["lat", "lon", "station_id", cache_filepath]
+
+    cn.get_cached_neighbourhoods(gdf, df_points, *args)
+    assert "Looked up 200 new or moved points, 0 from cache" in (
+        capsys.readouterr().out
+    )
+    cn.get_cached_neighbourhoods(gdf, df_points, *args)
+    assert "Looked up 0 new or moved points, 200 from cache" in (
+        capsys.readouterr().out
+    )
+
+    # Moved stations are looked up again
+    df_moved = df_points.copy()
+    df_moved.loc[:9, "lon"] = 0.5
+    df_moved.loc[:9, "lat"] = 0.5
+    df_check = cn.get_cached_neighbourhoods(gdf, df_moved, *args)
+    assert "Looked up 10 new or moved points, 190 from cache" in (
+        capsys.readouterr().out
+    )
+    assert (
+        df_check.set_index("station_id").loc[range(10), "AREA_NAME"]
+        == "Area 0"
+    ).all()
+
+    # New boundaries invalidate all cached points, which are dropped
+    gdf_renamed = gdf.assign(AREA_NAME=gdf["AREA_NAME"] + " (2022)")
+    df_check = cn.get_cached_neighbourhoods(gdf_renamed, df_moved, *args)
+    assert "Looked up 200 new or moved points, 0 from cache" in (
+        capsys.readouterr().out
+    )
+    assert df_check["AREA_NAME"].str.endswith(" (2022)").all()
+    df_cache = pd.read_parquet(cache_filepath)
+    assert df_cache["boundary_version"].unique().tolist() == [
+        cn.get_boundary_version(gdf_renamed)
+    ]
+    assert len(df_cache) == len(df_moved)
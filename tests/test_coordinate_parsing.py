@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test regex parsing of points of interest coordinates."""
+
+# pylint: disable=invalid-name
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from v1.src.city_pub_data import extract_coordinates
+
+
+def extract_coordinates_eval(geometry: pd.Series) -> pd.DataFrame:
+    """Get longitude and latitude as get_poi_data did, with eval."""
+    return pd.DataFrame(
+        geometry.apply(eval).apply(lambda g: g["coordinates"]).tolist(),
+        columns=["lon", "lat"],
+    )
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        "{'type': 'Point', 'coordinates': (-79.3832, 43.6532)}",
+        '{"type": "Point", "coordinates": [-79.3832, 43.6532]}',
+        "{'type': 'Point', 'coordinates': (79.3832, -43.6532)}",
+        "{'type': 'Point', 'coordinates': (+79.5, -4.36532e1)}",
+        "{ 'type' : 'Point' ,\n 'coordinates' :  (  -79.3832 ,\t43.6532 ) }",
+        "{'coordinates': [-79.3832, 43.6532], 'type': 'Point'}",
+    ],
+)
+def test_extract_coordinates_matches_eval(geometry):
+    geometries = pd.Series([geometry] * 2)
+    pd.testing.assert_frame_equal(
+        extract_coordinates(geometries),
+        extract_coordinates_eval(geometries),
+    )
+
+
+def test_extract_coordinates_missing_and_malformed():
+    geometries = pd.Series(
+        [
+            "{'type': 'Point', 'coordinates': (-79.3832, 43.6532)}",
+            None,
+            np.nan,
+            "",
+            "{'type': 'Point'}",
+            "{'type': 'Point', 'coordinates': ()}",
+            "{'type': 'Point', 'coordinates': (-79.3832)}",
+            "{'type': 'Point', 'coordinates': (-79.38.32, 43.6532)}",
+            "{'type': 'Point', 'coordinates': (west, north)}",
+            "POINT (-79.3832 43.6532)",
+        ]
+    )
+    df = extract_coordinates(geometries)
+    assert df.dtypes.tolist() == [np.float64, np.float64]
+    assert df.iloc[0].tolist() == [-79.3832, 43.6532]
+    # Unparseable rows become missing values instead of raising
+    assert df.iloc[1:].isna().all(axis=None)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test resumable downloads against a local HTTP server."""
+
+# pylint: disable=invalid-name,redefined-outer-name
+
+
+import hashlib
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.downloads import download_file, download_files
+
+file_contents = bytes(range(256)) * 400
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serve a file supporting byte ranges, optionally cutting responses.
+
+    Byte ranges are ignored if If-Range does not match the file's ETag. The
+    first server.num_drops responses close the connection after half of
+    the body. With server.short_responses, responses honestly announce and
+    send only half of the requested bytes.
+    """
+
+    def do_GET(self) -> None:
+        body = self.server.files[self.path]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.server.range_headers.append(self.headers.get("Range"))
+        byte_range = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range != etag:
+            byte_range = None
+        offset = int(byte_range.group(1)) if byte_range else 0
+        if offset >= len(body):
+            self.send_response(416)
+            if not self.server.omit_content_range:
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        end = len(body)
+        if self.server.short_responses:
+            end = offset + max((len(body) - offset) // 2, 1)
+        self.send_response(206 if byte_range else 200)
+        if byte_range or self.server.short_responses:
+            self.send_header(
+                "Content-Range", f"bytes {offset}-{end - 1}/{len(body)}"
+            )
+        self.send_header("Content-Length", str(end - offset))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        data = body[offset:end]
+        if self.server.num_drops > 0:
+            # Drop the connection part-way through the body
+            self.server.num_drops -= 1
+            data = data[: len(data) // 2]
+            self.close_connection = True
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    """Start HTTP server on a free local port, in a thread."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    httpd.files = {"/trips.zip": file_contents}
+    httpd.range_headers = []
+    httpd.num_drops = 0
+    httpd.short_responses = False
+    httpd.omit_content_range = False
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get_url(server: ThreadingHTTPServer, path: str = "/trips.zip") -> str:
+    """Get URL of a file on the local server."""
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_download_file(server, tmp_path):
+    filepath = str(tmp_path / "trips.zip")
+    assert download_file(get_url(server), filepath) == filepath
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    assert server.range_headers == [None]
+    assert not os.path.exists(f"{filepath}.part")
+
+
+def test_download_file_resumes_dropped_connection(server, tmp_path):
+    server.num_drops = 2
+    filepath = str(tmp_path / "trips.zip")
+    download_file(
+        get_url(server), filepath, chunk_size=1024, session=requests.Session()
+    )
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    # Each retry asks only for the bytes missing from the partial file
+    half = len(file_contents) // 2
+    quarter = half + (len(file_contents) - half) // 2
+    assert server.range_headers == [
+        None,
+        f"bytes={half}-",
+        f"bytes={quarter}-",
+    ]
+    assert not os.path.exists(f"{filepath}.part")
+
+
+def test_download_file_keeps_partial_file_after_last_retry(server, tmp_path):
+    server.num_drops = 2
+    filepath = str(tmp_path / "trips.zip")
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        download_file(
+            get_url(server),
+            filepath,
+            chunk_size=1024,
+            num_retries=1,
+            session=requests.Session(),
+        )
+    assert not os.path.exists(filepath)
+    assert os.path.getsize(f"{filepath}.part") > 0
+    # Next download resumes from the partial file
+    download_file(get_url(server), filepath, session=requests.Session())
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    assert not os.path.exists(f"{filepath}.part")
+
+
+def test_download_file_checks_size(server, tmp_path):
+    server.short_responses = True
+    filepath = str(tmp_path / "trips.zip")
+    with pytest.raises(IOError, match="Could not download all"):
+        download_file(
+            get_url(server),
+            filepath,
+            num_retries=1,
+            session=requests.Session(),
+        )
+    assert not os.path.exists(filepath)
+
+
+def write_partial_file(filepath: str, contents: bytes) -> None:
+    """Write partial download, validated by ETag of the served file."""
+    with open(f"{filepath}.part", "wb") as f:
+        f.write(contents)
+    with open(f"{filepath}.part.validator", "w") as f:
+        f.write(f'"{hashlib.md5(file_contents).hexdigest()}"')
+
+
+def test_download_file_restarts_changed_upstream_file(server, tmp_path):
+    server.num_drops = 1
+    filepath = str(tmp_path / "trips.zip")
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        download_file(
+            get_url(server),
+            filepath,
+            chunk_size=1024,
+            num_retries=0,
+            session=requests.Session(),
+        )
+    # File is republished with the same size, before resuming
+    server.files["/trips.zip"] = file_contents[::-1]
+    download_file(get_url(server), filepath, session=requests.Session())
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents[::-1]
+    assert server.range_headers == [None, f"bytes={len(file_contents) // 2}-"]
+    assert not os.path.exists(f"{filepath}.part.validator")
+
+
+def test_download_file_restarts_without_validator(server, tmp_path):
+    filepath = str(tmp_path / "trips.zip")
+    with open(f"{filepath}.part", "wb") as f:
+        f.write(file_contents[::-1][:100])
+    download_file(get_url(server), filepath, session=requests.Session())
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    assert server.range_headers == [None]
+
+
+def test_download_file_complete_partial_file(server, tmp_path):
+    filepath = str(tmp_path / "trips.zip")
+    write_partial_file(filepath, file_contents)
+    download_file(get_url(server), filepath, session=requests.Session())
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    assert server.range_headers == [f"bytes={len(file_contents)}-"]
+
+
+def test_download_file_416_without_content_range(server, tmp_path):
+    server.omit_content_range = True
+    filepath = str(tmp_path / "trips.zip")
+    write_partial_file(filepath, file_contents)
+    download_file(get_url(server), filepath, session=requests.Session())
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    # Size of the partial file can not be confirmed, so it is re-downloaded
+    assert server.range_headers == [f"bytes={len(file_contents)}-", None]
+
+
+def test_download_file_discards_oversized_partial_file(server, tmp_path):
+    filepath = str(tmp_path / "trips.zip")
+    write_partial_file(filepath, file_contents + b"stale")
+    download_file(get_url(server), filepath, session=requests.Session())
+    with open(filepath, "rb") as f:
+        assert f.read() == file_contents
+    assert server.range_headers == [f"bytes={len(file_contents) + 5}-", None]
+    assert not os.path.exists(f"{filepath}.part")
+
+
+def test_download_files(server, tmp_path):
+    server.files["/other.zip"] = file_contents[::-1]
+    server.num_drops = 1
+    filepaths = [str(tmp_path / "trips.zip"), str(tmp_path / "other.zip")]
+    downloaded = download_files(
+        [get_url(server), get_url(server, "/other.zip")],
+        filepaths,
+        max_workers=2,
+        session=requests.Session(),
+    )
+    assert downloaded == filepaths
+    for filepath, path in zip(filepaths, ["/trips.zip", "/other.zip"]):
+        with open(filepath, "rb") as f:
+            assert f.read() == server.files[path]
+        assert not os.path.exists(f"{filepath}.part")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test serving recorded HTTP responses from fixture files."""
+
+# pylint: disable=invalid-name,redefined-outer-name
+
+
+import json
+import zipfile
+from io import BytesIO
+from time import perf_counter
+
+import pytest
+import requests
+
+from src.http_fixtures import mount_fixtures, record_fixture
+
+base_url = "https://ckan0.cf.opendata.inter.prod-toronto.ca"
+zip_url = f"{base_url}/download/bikeshare-ridership-2021.zip"
+geojson_url = f"{base_url}/api/3/action/datastore_search"
+geojson_params = {"resource_id": "neighbourhoods", "limit": 5}
+geojson = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"AREA_NAME": "Annex"},
+            "geometry": {"type": "Point", "coordinates": [-79.4, 43.67]},
+        }
+    ],
+}
+
+
+def get_zip_contents() -> bytes:
+    """Get contents of a zip file with one CSV file."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zfile:
+        zfile.writestr(
+            "Bike share ridership 2021-01.csv", "Trip Id\n1\n" * 500
+        )
+    return buffer.getvalue()
+
+
+zip_contents = get_zip_contents()
+
+
+@pytest.fixture
+def fixtures_dir(tmp_path):
+    fixtures_dir = str(tmp_path / "fixtures")
+    record_fixture(fixtures_dir, zip_url, zip_contents, filename="trips.zip")
+    record_fixture(
+        fixtures_dir,
+        geojson_url,
+        json.dumps(geojson).encode(),
+        geojson_params,
+        {"Content-Type": "application/geo+json"},
+    )
+    return fixtures_dir
+
+
+def get_fixtures_session(fixtures_dir: str, **kwargs) -> requests.Session:
+    """Get session answering all requests from fixtures."""
+    session = requests.Session()
+    mount_fixtures(session, fixtures_dir, **kwargs)
+    return session
+
+
+def test_zip_fixture(fixtures_dir):
+    session = get_fixtures_session(fixtures_dir)
+    r = session.get(zip_url)
+    assert r.status_code == 200
+    assert r.headers["Content-Length"] == str(len(zip_contents))
+    with zipfile.ZipFile(BytesIO(r.content)) as zfile:
+        assert zfile.namelist() == ["Bike share ridership 2021-01.csv"]
+    assert r.raw.f.closed
+
+
+def test_zip_fixture_byte_ranges(fixtures_dir):
+    session = get_fixtures_session(fixtures_dir)
+    size = len(zip_contents)
+    etag = session.head(zip_url).headers["ETag"]
+    r = session.get(zip_url, headers={"Range": "bytes=100-", "If-Range": etag})
+    assert r.status_code == 206
+    assert r.headers["Content-Range"] == f"bytes 100-{size - 1}/{size}"
+    assert r.content == zip_contents[100:]
+
+    r = session.get(
+        zip_url, headers={"Range": "bytes=100-", "If-Range": '"changed"'}
+    )
+    assert r.status_code == 200
+    assert r.content == zip_contents
+
+    r = session.get(zip_url, headers={"Range": f"bytes={size}-"})
+    assert r.status_code == 416
+    assert r.headers["Content-Range"] == f"bytes */{size}"
+
+
+def test_geojson_fixture(fixtures_dir):
+    session = get_fixtures_session(fixtures_dir)
+    # Query parameters are matched regardless of their order
+    r = session.get(geojson_url, params=dict(reversed(geojson_params.items())))
+    assert r.status_code == 200
+    assert r.headers["Content-Type"] == "application/geo+json"
+    assert r.json() == geojson
+    assert session.get(geojson_url).status_code == 404
+
+
+def test_conditional_requests(fixtures_dir):
+    session = get_fixtures_session(fixtures_dir)
+    headers = session.get(zip_url).headers
+    conditions = {
+        "If-None-Match": "ETag",
+        "If-Modified-Since": "Last-Modified",
+    }
+    for condition, validator in conditions.items():
+        r = session.get(zip_url, headers={condition: headers[validator]})
+        assert r.status_code == 304
+        assert not r.content
+    r = session.get(zip_url, headers={"If-None-Match": '"changed"'})
+    assert r.status_code == 200
+    assert r.content == zip_contents
+
+
+def test_streamed_response_closes_fixture_file(fixtures_dir):
+    session = get_fixtures_session(fixtures_dir)
+    r = session.get(zip_url, stream=True)
+    assert not r.raw.f.closed
+    r.close()
+    assert r.raw.f.closed
+
+
+def test_latency_and_bandwidth(fixtures_dir):
+    start = perf_counter()
+    get_fixtures_session(fixtures_dir).get(zip_url)
+    duration = perf_counter() - start
+
+    latency, bandwidth = 0.05, len(zip_contents) / 0.1
+    session = get_fixtures_session(
+        fixtures_dir, latency=latency, bandwidth=bandwidth
+    )
+    start = perf_counter()
+    r = session.get(zip_url)
+    duration_throttled = perf_counter() - start
+    assert r.content == zip_contents
+    assert duration_throttled >= latency + len(zip_contents) / bandwidth
+    assert duration_throttled > duration
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test reading trips CSVs, from zip files, into the Parquet cache."""
+
+# pylint: disable=invalid-name
+
+
+import os
+from zipfile import ZipFile
+
+import pandas as pd
+import pytest
+from pyarrow import parquet as pq
+
+import src.trips as bt
+from benchmarks.synthetic_data import write_synthetic_month_trips_csv
+from src.utils import format_timestamp_utc, get_run_profile, stage_profiles
+from tests.trips_fixtures import (
+    date_cols,
+    dtypes_dict_trips,
+    duplicated_cols,
+    last_mod,
+    nan_cols,
+)
+
+
+def test_get_num_workers_small_files(tmp_path):
+    csvs = [str(tmp_path / "empty.csv"), str(tmp_path / "small.csv")]
+    for fpath, contents in zip(csvs, ["", "TRIP_ID\n1\n"]):
+        with open(fpath, "w") as f:
+            f.write(contents)
+    assert bt.get_num_workers(csvs[:1], 4, 2) == 1
+    assert bt.get_num_workers(csvs, 4, 2) == 2
+    assert bt.get_num_workers(csvs, 4, 100) == 2
+
+
+def write_trips_csvs(data_dir) -> list:
+    """Write 3 months of synthetic trips CSVs."""
+    return [
+        write_synthetic_month_trips_csv(
+            str(data_dir / f"Bike share ridership 2021-{month:02d}.csv"),
+            2021,
+            month,
+            1_000,
+            first_trip_id=month * 1_000,
+        )
+        for month in range(1, 4)
+    ]
+
+
+def test_convert_csvs_to_parquet_cache_workers(tmp_path):
+    csvs = write_trips_csvs(tmp_path)
+    dfs = {}
+    for max_workers in [1, 2]:
+        stage_profiles.clear()
+        cache_filepaths = bt.convert_csvs_to_parquet_cache(
+            csvs,
+            str(tmp_path / f"processed_{max_workers}"),
+            "trips.zip",
+            last_mod,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            max_workers=max_workers,
+        )
+        assert [f.split("month=")[1][:2] for f in cache_filepaths] == [
+            "01",
+            "02",
+            "03",
+        ]
+        dfs[max_workers] = [pd.read_parquet(f) for f in cache_filepaths]
+        # Stages run by worker processes are profiled in the parent process
+        assert get_run_profile()["stage"].tolist() == ["read_data"] * 3
+        assert bt.get_trips_cache_last_modified(cache_filepaths[0]) == last_mod
+        assert (
+            pq.read_schema(cache_filepaths[0]).metadata[
+                b"last_modified_opendata"
+            ]
+            == format_timestamp_utc(last_mod).encode()
+        )
+    for df_serial, df_parallel in zip(dfs[1], dfs[2]):
+        pd.testing.assert_frame_equal(df_serial, df_parallel)
+
+
+def test_get_multiple_ridership_data_files_worker_profiles(tmp_path):
+    csvs = write_trips_csvs(tmp_path)
+    df_profiles = {}
+    for max_workers in [1, 2]:
+        stage_profiles.clear()
+        bt.get_multiple_ridership_data_files(
+            csvs,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            max_workers=max_workers,
+        )
+        df_profiles[max_workers] = get_run_profile()
+    # Stages run by worker processes are profiled in the parent process
+    for df_profile in df_profiles.values():
+        assert df_profile["stage"].tolist() == ["read_data"] * len(csvs)
+        assert df_profile["max_rss_increase_mb"].notna().all()
+    pd.testing.assert_series_equal(
+        df_profiles[1]["rows_out"], df_profiles[2]["rows_out"]
+    )
+
+
+def test_convert_zipped_csvs_to_parquet_cache(tmp_path):
+    csvs = write_trips_csvs(tmp_path)
+    raw_data_dir = tmp_path / "raw"
+    raw_data_dir.mkdir()
+    with ZipFile(raw_data_dir / "bikeshare-ridership-2021.zip", "w") as z:
+        for fpath in csvs:
+            z.write(
+                fpath,
+                f"bikeshare-ridership-2021/{os.path.basename(fpath)}",
+            )
+    zipped_csvs = bt.get_zip_csv_list(str(raw_data_dir), [2021])
+    assert [os.path.basename(f) for f in zipped_csvs] == [
+        os.path.basename(f) for f in csvs
+    ]
+    cache_filepaths = bt.convert_csvs_to_parquet_cache(
+        zipped_csvs,
+        str(tmp_path / "processed"),
+        "bikeshare-ridership-2021.zip",
+        last_mod,
+        dtypes_dict_trips,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+        max_workers=2,
+    )
+    # Zip files are read without extracting their CSVs
+    assert os.listdir(raw_data_dir) == ["bikeshare-ridership-2021.zip"]
+    for fpath, cache_filepath in zip(csvs, cache_filepaths):
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(cache_filepath),
+            bt.get_single_ridership_data_file(
+                fpath, dtypes_dict_trips, date_cols, nan_cols, duplicated_cols
+            ).reset_index(drop=True),
+        )
+
+
+def write_header_only_csv(fpath: str) -> str:
+    """Write trips CSV with a header, but no trips."""
+    with open(fpath, "w") as f:
+        f.write(
+            "Trip Id,Trip  Duration,Start Station Id,Start Time,"
+            "Start Station Name,End Station Id,End Time,End Station Name,"
+            "Bike Id,User Type\n"
+        )
+    return fpath
+
+
+@pytest.mark.parametrize("chunksize", [None, 100], ids=["", "chunked"])
+@pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+def test_get_single_ridership_data_file_header_only(
+    tmp_path, engine, chunksize
+):
+    if engine == "pyarrow" and chunksize:
+        pytest.skip("Chunks are only read by the pandas engine")
+    fpath = write_header_only_csv(str(tmp_path / "empty.csv"))
+    df = bt.get_single_ridership_data_file(
+        fpath,
+        dtypes_dict_trips,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+        chunksize=chunksize,
+        engine=engine,
+    )
+    assert df.empty
+    df_trips = bt.get_single_ridership_data_file(
+        write_trips_csvs(tmp_path)[0],
+        dtypes_dict_trips,
+        date_cols,
+        nan_cols,
+        duplicated_cols,
+    )
+    pd.testing.assert_series_equal(df.dtypes, df_trips.dtypes)
+
+
+def test_read_data_chunks_drops_duplicates_across_chunks(tmp_path):
+    fpath = write_trips_csvs(tmp_path)[0]
+    df = pd.read_csv(fpath, encoding="cp1252")
+    # Repeat trips of the first chunk in the last chunk
+    pd.concat([df, df.head(150)]).to_csv(fpath, index=False)
+    dfs = [
+        bt.get_single_ridership_data_file(
+            fpath,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            chunksize=chunksize,
+        )
+        for chunksize in [None, 100]
+    ]
+    assert len(dfs[0]) <= len(df)
+    pd.testing.assert_frame_equal(dfs[0], dfs[1])
+
+
+def test_read_data_chunks_unsupported_engine(tmp_path):
+    fpath = write_header_only_csv(str(tmp_path / "empty.csv"))
+    with pytest.raises(ValueError, match="Chunked reading"):
+        bt.read_data(
+            fpath,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            chunksize=100,
+            engine="pyarrow",
+        )
+
+
+def rewrite_header(fpath: str, new_fpath: str, header_variant) -> str:
+    """Copy trips CSV with each column of its header changed."""
+    with open(fpath, encoding="cp1252") as f:
+        header, body = f.read().split("\n", 1)
+    header = ",".join(header_variant(c) for c in header.split(","))
+    with open(new_fpath, "w", encoding="cp1252") as f:
+        f.write(f"{header}\n{body}")
+    return new_fpath
+
+
+@pytest.mark.parametrize(
+    "header_variant",
+    [
+        lambda c: c.upper(),
+        lambda c: c.lower(),
+        lambda c: f" {'   '.join(c.split())} ",
+        lambda c: "_".join(c.lower().split()),
+    ],
+    ids=["upper", "lower", "spaces", "snake_case"],
+)
+@pytest.mark.parametrize(
+    "engine,chunksize", [("pandas", None), ("pyarrow", None), ("pandas", 100)]
+)
+def test_read_data_header_variants(
+    tmp_path, header_variant, engine, chunksize
+):
+    fpath = write_trips_csvs(tmp_path)[0]
+    fpath_variant = rewrite_header(
+        fpath, str(tmp_path / "variant.csv"), header_variant
+    )
+    dfs = [
+        bt.read_data(
+            f,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            chunksize=chunksize,
+            engine=engine,
+        )
+        for f in [fpath, fpath_variant]
+    ]
+    pd.testing.assert_frame_equal(dfs[0], dfs[1])
+
+
+@pytest.mark.parametrize(
+    "engine,chunksize", [("pandas", None), ("pyarrow", None), ("pandas", 100)]
+)
+def test_read_data_header_with_bom(tmp_path, engine, chunksize):
+    fpath = write_trips_csvs(tmp_path)[0]
+    fpath_bom = str(tmp_path / "bom.csv")
+    with open(fpath, "rb") as f, open(fpath_bom, "wb") as f_bom:
+        f_bom.write(b"\xef\xbb\xbf" + f.read())
+    usecols, cols_map, dtypes, _ = bt.get_trips_csv_columns(
+        fpath_bom, dtypes_dict_trips, date_cols
+    )
+    # Parsed by the raw (BOM-prefixed) name, renamed to the canonical name
+    assert usecols[0] == "\xef\xbb\xbfTrip Id"
+    assert cols_map[usecols[0]] == "TRIP_ID"
+    assert dtypes[usecols[0]] == pd.Int64Dtype()
+    dfs = [
+        bt.read_data(
+            f,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            chunksize=chunksize,
+            engine=engine,
+        )
+        for f in [fpath, fpath_bom]
+    ]
+    pd.testing.assert_frame_equal(dfs[0], dfs[1])
+
+
+@pytest.mark.parametrize(
+    "engine,chunksize", [("pandas", None), ("pyarrow", None), ("pandas", 100)]
+)
+def test_read_data_missing_wanted_column(tmp_path, engine, chunksize):
+    fpath = write_trips_csvs(tmp_path)[0]
+    fpath_missing = str(tmp_path / "missing.csv")
+    pd.read_csv(fpath, encoding="cp1252").drop(columns=["User Type"]).to_csv(
+        fpath_missing, index=False, encoding="cp1252"
+    )
+    with pytest.raises(ValueError, match="no column for: USER_TYPE"):
+        bt.read_data(
+            fpath_missing,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            chunksize=chunksize,
+            engine=engine,
+        )
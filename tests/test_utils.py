@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test freshness of the aggregated data store and stage profiles."""
+
+# pylint: disable=invalid-name
+
+
+import json
+from collections import deque
+from time import sleep
+
+import numpy as np
+import pandas as pd
+
+import src.utils as utils
+from src.utils import (
+    format_timestamp_utc,
+    get_zip_files_last_modified,
+    profile_block,
+)
+
+
+def test_get_zip_files_last_modified_mixed_formats(tmp_path):
+    # Manifest written with differing UTC offsets and precision
+    manifest = {
+        "a/1": ("a.zip", "2022-01-20T14:00:01Z"),
+        "a/2": ("a.zip", "2022-01-20T10:00:00.5-05:00"),
+        "a/3": ("a.zip", "2022-01-20T14:00:00+00:00"),
+        "b/1": ("b.zip", "2021-01-20T14:00:00.123456+00:00"),
+    }
+    with open(tmp_path / "_manifest.json", "w") as f:
+        json.dump(
+            {
+                k: {"zip_file": z, "last_modified_timestamp": ts}
+                for k, (z, ts) in manifest.items()
+            },
+            f,
+        )
+    assert get_zip_files_last_modified(str(tmp_path)) == {
+        "a.zip": pd.Timestamp("2022-01-20T15:00:00.5Z").tz_convert(
+            "America/Toronto"
+        ),
+        "b.zip": pd.Timestamp("2021-01-20T14:00:00.123456Z").tz_convert(
+            "America/Toronto"
+        ),
+    }
+
+
+def test_get_zip_files_last_modified_missing_store(tmp_path):
+    assert get_zip_files_last_modified(str(tmp_path / "agg_data")) == {}
+
+
+def test_format_timestamp_utc():
+    assert (
+        format_timestamp_utc(
+            pd.Timestamp("2022-01-20 09:00", tz="America/Toronto")
+        )
+        == "2022-01-20T14:00:00.000000+00:00"
+    )
+
+
+def test_profile_block_peak_rss_per_stage():
+    profiles = []
+    # A later stage staying under the peak of an earlier stage still reports
+    # its own peak. Arrays over 32MB are allocated with (and freed by) mmap,
+    # so their memory is returned to the OS once deleted.
+    for stage, num_bytes in [("big", 80e6), ("small", 40e6)]:
+        with profile_block(stage) as profile:
+            data = np.ones(int(num_bytes // 8))
+            sleep(0.05)
+            del data
+        profiles.append(profile)
+    assert profiles[1]["max_rss_increase_mb"] > 20
+    assert (
+        profiles[0]["max_rss_increase_mb"] > profiles[1]["max_rss_increase_mb"]
+    )
+
+
+def test_profile_block_samples_rss_once_per_top_level_stage(monkeypatch):
+    num_samplers = []
+    sample_peak_rss = utils.sample_peak_rss
+
+    def count_samplers(*args, **kwargs):
+        num_samplers.append(1)
+        return sample_peak_rss(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "sample_peak_rss", count_samplers)
+    with profile_block("aggregate") as profile:
+        for _ in range(3):
+            with profile_block("read_chunk") as chunk_profile:
+                pass
+    assert len(num_samplers) == 1
+    assert profile["max_rss_increase_mb"] is not None
+    assert chunk_profile["max_rss_increase_mb"] is None
+    assert chunk_profile["wall_seconds"] <= profile["wall_seconds"]
+
+
+def test_stage_profiles_bounded(monkeypatch):
+    monkeypatch.setattr(utils, "stage_profiles", deque(maxlen=2))
+    for stage in ["a", "b", "c"]:
+        with profile_block(stage):
+            pass
+    assert utils.get_run_profile()["stage"].tolist() == ["b", "c"]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Test pandera validation modes of pipeline stages and their timing."""
+
+# pylint: disable=invalid-name,redefined-outer-name
+
+
+from typing import Optional
+
+import pandas as pd
+import pandera as pa
+import pytest
+
+import src.utils as utils
+from src.utils import check_io, get_validation_report, validate_df
+
+num_rows = 1_000
+schema = pa.DataFrameSchema(
+    columns={"TRIP_ID": pa.Column(pa.Int64, checks=pa.Check.ge(0))}
+)
+
+
+def get_trips(bad_row: Optional[int] = None) -> pd.DataFrame:
+    """Get trips with valid IDs, except at one row."""
+    df = pd.DataFrame({"TRIP_ID": range(num_rows)}, dtype="int64")
+    if bad_row is not None:
+        df.loc[bad_row, "TRIP_ID"] = -1
+    return df
+
+
+# Row outside of the 10 rows validated in the sample mode
+sampled_rows = get_trips().sample(10, random_state=42).index
+unsampled_row = max(set(range(num_rows)) - set(sampled_rows))
+
+
+@pytest.mark.parametrize(
+    "mode,bad_row,catches",
+    [
+        ("full", num_rows - 1, True),
+        ("sample", unsampled_row, False),
+        ("head", 0, True),
+        ("head", num_rows - 1, False),
+        ("dtypes", 0, False),
+        ("off", 0, False),
+    ],
+)
+def test_validate_df_modes(mode, bad_row, catches):
+    df = get_trips(bad_row)
+    if catches:
+        with pytest.raises(pa.errors.SchemaError):
+            validate_df(schema, df, mode, num_rows=10)
+    else:
+        assert validate_df(schema, df, mode, num_rows=10) is df
+
+
+def test_validate_df_sample_mode_catches_sampled_row():
+    with pytest.raises(pa.errors.SchemaError):
+        validate_df(schema, get_trips(sampled_rows[0]), "sample", 10)
+    # Frames shorter than the sample size are validated in full
+    with pytest.raises(pa.errors.SchemaError):
+        validate_df(schema, get_trips(num_rows - 1), "sample", 2 * num_rows)
+
+
+@pytest.mark.parametrize("mode", ["full", "sample", "head", "dtypes"])
+def test_validate_df_modes_check_dtypes(mode):
+    with pytest.raises(pa.errors.SchemaError):
+        validate_df(schema, get_trips().astype(float), mode, num_rows=10)
+
+
+@pytest.fixture
+def count_trips(monkeypatch):
+    """Stage validated by check_io, with its own validation mode."""
+    monkeypatch.setattr(utils, "validation_timings", {})
+    monkeypatch.setitem(utils.validation_config, "num_rows", 10)
+
+    @check_io(df=schema, out=schema)
+    def count_trips(df: pd.DataFrame) -> pd.DataFrame:
+        return df
+
+    def set_mode(mode: str) -> None:
+        monkeypatch.setitem(
+            utils.validation_config["stages"], "count_trips", mode
+        )
+
+    return count_trips, set_mode
+
+
+def test_check_io_modes(count_trips):
+    stage, set_mode = count_trips
+    for mode, bad_row, catches in [
+        ("full", num_rows - 1, True),
+        ("head", num_rows - 1, False),
+        ("sample", unsampled_row, False),
+        ("off", num_rows - 1, False),
+    ]:
+        set_mode(mode)
+        if catches:
+            with pytest.raises(pa.errors.SchemaError):
+                stage(get_trips(bad_row))
+        else:
+            stage(get_trips(bad_row))
+
+
+def test_check_io_off_does_no_validation_work(count_trips, monkeypatch):
+    stage, set_mode = count_trips
+    set_mode("off")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("validated in the off mode")
+
+    monkeypatch.setattr(utils, "validate_df", fail)
+    monkeypatch.setattr(schema, "validate", fail)
+    stage(get_trips())
+    # Not even timed
+    assert utils.validation_timings == {}
+
+
+def test_check_io_validation_timing(count_trips):
+    stage, set_mode = count_trips
+    for mode in ["full", "head"]:
+        set_mode(mode)
+        for _ in range(2):
+            stage(get_trips())
+    report = get_validation_report()
+    assert set(report.index) == {
+        ("count_trips", "full"),
+        ("count_trips", "head"),
+    }
+    assert (report["calls"] == 2).all()
+    assert (report["validation_seconds"] > 0).all()
+    assert (report["validation_seconds"] <= report["seconds"]).all()
+    assert report["validation_share"].between(0, 1).all()
+
+
+def test_validation_mode_unsupported():
+    with pytest.raises(ValueError):
+        utils.set_validation_mode("most")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Column settings and helpers shared by tests on synthetic trips data."""
+
+# pylint: disable=invalid-name
+
+
+import os
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+import src.aggregate_data as ad
+import src.trips as bt
+from benchmarks.synthetic_data import (
+    make_synthetic_month_trips,
+    make_synthetic_stations_stats,
+)
+from src.process_trips import process_trips_data
+
+dtypes_dict_trips = {
+    "Trip Id": pd.Int64Dtype(),
+    "Trip Duration": pd.Int64Dtype(),
+    "Start Station Id": pd.Int64Dtype(),
+    "Start Station Name": pd.StringDtype(),
+    "User Type": pd.StringDtype(),
+}
+date_cols = ["Start Time", "End Time"]
+nan_cols = ["START_STATION_ID", "START_STATION_NAME"]
+duplicated_cols = ["TRIP_ID", "START_TIME"]
+# Upstream modification time of the synthetic trips zip files
+last_mod = pd.Timestamp("2022-01-01", tz="America/Toronto").as_unit("ns")
+
+
+def get_merged_trips(
+    num_trips: int, compact: bool, year: int = 2021
+) -> pd.DataFrame:
+    """Get single month of synthetic trips merged with station stats."""
+    with TemporaryDirectory() as data_dir:
+        csv_filepath = os.path.join(data_dir, f"{year}-01.csv")
+        make_synthetic_month_trips(year, 1, num_trips).to_csv(
+            csv_filepath, index=False, encoding="cp1252"
+        )
+        df = bt.get_single_ridership_data_file(
+            csv_filepath,
+            dtypes_dict_trips,
+            date_cols,
+            nan_cols,
+            duplicated_cols,
+            False,
+            compact=compact,
+        )
+    df = process_trips_data(df, False, compact=compact)
+    return ad.merge_trips_neighbourhood_stats(
+        df, make_synthetic_stations_stats(), False, compact=compact
+    )
+
+
+def aggregate(data_merged: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """Aggregate merged trips from single synthetic CSV file."""
+    return ad.aggregate_merged_data(
+        data_merged, "trips.zip", True, "trips.csv", last_mod, **kwargs
+    )
@@ -12,6 +12,7 @@ import os
 from typing import Dict, List
 
 from prefect import Flow
+from prefect.executors import LocalDaskExecutor
 
 import src.data_pipe_db_utils as dpdu
 import src.data_pipe_utils as dpu
@@ -42,6 +43,7 @@ def create_cloud_resources(
         dpdu.create_db_tables(
             trips_db_name,
             True,
+            upstream_tasks=[create_dbs],
         )
     return flow
 
@@ -120,18 +122,21 @@ def get_add_data(
             nrows_per_staged_csv_file,
         )
 
-        dpdu.add_gzip_compressed_csv_files_to_stage(
+        stage_csvs = dpdu.add_gzip_compressed_csv_files_to_stage(
             trips_stage_name,
             trips_db_name,
             "data/processed/local_stage_*.csv.gz",
             True,
             upstream_tasks=[agg_data_csvs],
         )
+        # Only takes constants, so it must wait for the staged files
+        # explicitly when tasks run concurrently
         dpdu.add_data_to_trips_table(
             trips_table_name,
             trips_stage_name,
             trips_db_name,
             True,
+            upstream_tasks=[stage_csvs],
         )
         dpdu.add_dataframe_to_stations_table(
             df_stations_new,
@@ -293,6 +298,9 @@ if __name__ == "__main__":
             trips_table_name,
             station_stats_table_name,
         )
+        # Independent tasks (eg. retrieving supplementary datasets) run
+        # concurrently in threads
+        flow.run(executor=LocalDaskExecutor(scheduler="threads"))
     else:
         flow = delete_resources(
             trips_table_name,
@@ -302,4 +310,4 @@ if __name__ == "__main__":
             trips_db_name,
             stations_db_name,
         )
-    flow.run()
+        flow.run()
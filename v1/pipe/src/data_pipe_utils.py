@@ -22,8 +22,19 @@ from src.process_trips import process_trips_data
 from src.stations_metadata import get_stations_metadata, transform_metadata
 from src.utils import export_df_to_multiple_csv_files
 
-
-@task
+# Per-source timeouts (seconds) for retrieving supplementary datasets
+fetch_timeouts = {
+    "stations": 120,
+    "cultural_hotspots": 300,
+    "points_of_interest": 300,
+    "neighbourhood_boundaries": 300,
+    "public_transit": 600,
+    "colleges_univs": 120,
+    "neighbourhood_profiles": 300,
+}
+
+
+@task(timeout=fetch_timeouts["stations"])
 def get_bikeshare_stations_metadata(
     open_tor_data_url: str,
     stations_params: Dict[str, str],
@@ -51,7 +62,7 @@ def get_bikeshare_trips_data(
     return df
 
 
-@task
+@task(timeout=fetch_timeouts["cultural_hotspots"])
 def get_city_cultural_hotspots_data(
     open_tor_data_url: str, ch_params: Dict[str, str]
 ) -> pd.DataFrame:
@@ -64,7 +75,7 @@ def get_city_cultural_hotspots_data(
     return df
 
 
-@task
+@task(timeout=fetch_timeouts["points_of_interest"])
 def get_city_points_of_interest_data(
     open_tor_data_url: str, poi_params: Dict[str, str]
 ) -> pd.DataFrame:
@@ -77,7 +88,7 @@ def get_city_points_of_interest_data(
     return df
 
 
-@task
+@task(timeout=fetch_timeouts["neighbourhood_boundaries"])
 def get_city_neighbourhood_boundary_data(
     open_tor_data_url: str,
     neigh_boundary_params: Dict[str, str],
@@ -94,7 +105,7 @@ def get_city_neighbourhood_boundary_data(
     return gdf
 
 
-@task
+@task(timeout=fetch_timeouts["public_transit"])
 def get_city_public_transit_locations_data(
     open_tor_data_url: str, pt_params: Dict[str, str]
 ) -> pd.DataFrame:
@@ -107,7 +118,7 @@ def get_city_public_transit_locations_data(
     return df
 
 
-@task
+@task(timeout=fetch_timeouts["colleges_univs"])
 def get_city_college_university_locations_data() -> pd.DataFrame:
     """Retrieve city college and university location data."""
     logger = prefect.context.get("logger")
@@ -118,7 +129,7 @@ def get_city_college_university_locations_data() -> pd.DataFrame:
     return df
 
 
-@task
+@task(timeout=fetch_timeouts["neighbourhood_profiles"])
 def get_neighbourhood_profile_data(
     open_tor_data_url: str, neigh_profile_params: Dict[str, str]
 ) -> pd.DataFrame:
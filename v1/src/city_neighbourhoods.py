@@ -14,7 +14,8 @@ import geopandas as gpd
 import pandas as pd
 import pandera as pa
 import prefect
-import requests
+
+from src.http_client import get_json
 
 neigh_demog_schema = pa.DataFrameSchema(
     columns={
@@ -33,7 +34,7 @@ def get_toronto_open_data(
     url: str, params: Dict, col_rename_dict: Dict = {}
 ) -> pd.DataFrame:
     """Download a dataset from Toronto Open Data portal."""
-    package = requests.get(url, params=params).json()
+    package = get_json(url, params)
     datastore_url = (
         "https://ckan0.cf.opendata.inter.prod-toronto.ca/api/3/"
         "action/datastore_search"
@@ -42,7 +43,7 @@ def get_toronto_open_data(
         if resource["datastore_active"]:
             url = datastore_url
             p = {"id": resource["id"]}
-            data = requests.get(url, params=p).json()
+            data = get_json(url, p)
             df = pd.DataFrame(data["result"]["records"])
             break
     if col_rename_dict:
@@ -9,13 +9,13 @@
 
 from io import BytesIO
 from typing import Dict, List
-from urllib.request import urlopen
 from zipfile import ZipFile
 
 import geopandas as gpd
 import pandas as pd
 import pandera as pa
-import requests
+
+from src.http_client import get_json, get_with_cache
 
 ch_essentials_schema = pa.DataFrameSchema(
     columns={
@@ -111,9 +111,25 @@ coll_univ_schema = pa.DataFrameSchema(
 )
 
 
-def get_lat_long(row):
-    """Get latitude and longitude."""
-    return row["coordinates"]
+# First (longitude, latitude) pair after "coordinates" in a GeoJSON-like
+# geometry string, written with either JSON or Python quotes/brackets
+coordinates_regex = (
+    r"""coordinates['"]?\s*:\s*[\[\(\s]*"""
+    r"(?P<lon>[-+]?[\d.]+(?:[eE][-+]?\d+)?)\s*,\s*"
+    r"(?P<lat>[-+]?[\d.]+(?:[eE][-+]?\d+)?)"
+)
+
+
+def extract_coordinates(geometry: pd.Series) -> pd.DataFrame:
+    """Get longitude and latitude from geometry strings, or NaN."""
+    df = (
+        geometry.astype(str)
+        .str.extract(coordinates_regex, expand=True)
+        .apply(pd.to_numeric, errors="coerce")
+        .astype(float)
+    )
+    # Pairs with an unparseable value are missing as a whole
+    return df.where(df.notna().all(axis=1))
 
 
 @pa.check_output(poi_schema)
@@ -140,14 +156,14 @@ def get_poi_data(url: str, poi_params: Dict) -> pd.DataFrame:
         ATTRACTION=pd.StringDtype(),
         MAP_ACCESS=pd.StringDtype(),
     )
-    package = requests.get(url, params=poi_params).json()
+    package = get_json(url, poi_params)
     poi_url = package["result"]["resources"][0]["url"]
-    df = pd.read_csv(poi_url)
+    df = pd.read_csv(BytesIO(get_with_cache(poi_url)))
     df = df.rename(columns={list(df)[0]: "ID"})
 
-    df[["POI_LONGITUDE", "POI_LATITUDE"]] = pd.DataFrame(
-        df["geometry"].apply(eval).apply(get_lat_long).tolist()
-    )
+    df[["POI_LONGITUDE", "POI_LATITUDE"]] = extract_coordinates(
+        df["geometry"]
+    ).to_numpy()
     # Verify no duplicates (by name) are in the data
     assert df[df.duplicated(subset=["NAME"], keep=False)].empty
     df = df.astype(poi_dtypes_dict)
@@ -157,12 +173,11 @@ def get_poi_data(url: str, poi_params: Dict) -> pd.DataFrame:
 @pa.check_output(ch_essentials_schema)
 def get_cultural_hotspots(url: str, params: Dict) -> pd.DataFrame:
     """Get cultural hotspots within city boundaries."""
-    package = requests.get(url, params=params).json()
+    package = get_json(url, params)
     ch_locations = package["result"]["resources"][0]["url"]
     ch_locs_dir_path = "data/raw/cultural-hotspot-points-of-interest-wgs84"
-    with urlopen(ch_locations) as zipresp:
-        with ZipFile(BytesIO(zipresp.read())) as zfile:
-            zfile.extractall(ch_locs_dir_path)
+    with ZipFile(BytesIO(get_with_cache(ch_locations))) as zfile:
+        zfile.extractall(ch_locs_dir_path)
     df = gpd.read_file(f"{ch_locs_dir_path}/CULTURAL_HOTSPOT_WGS84.shp")
     df = (
         df.drop_duplicates(
@@ -202,10 +217,10 @@ def get_neighbourhood_boundary_land_area_data(
     url: str, params: Dict, cols_to_keep: List[str]
 ) -> pd.DataFrame:
     """Get citywide neighbourhood boundaries."""
-    package = requests.get(url, params=params).json()
+    package = get_json(url, params)
     files = package["result"]["resources"]
     n_url = [f["url"] for f in files if f["url"].endswith("4326.geojson")][0]
-    gdf = gpd.read_file(n_url)
+    gdf = gpd.read_file(BytesIO(get_with_cache(n_url)))
     # print(gdf.head(2))
     gdf["centroid"] = (
         gdf["geometry"].to_crs(epsg=3395).centroid.to_crs(epsg=4326)
@@ -230,12 +245,11 @@ def get_neighbourhood_boundary_land_area_data(
 @pa.check_output(pub_trans_locations_schema)
 def get_public_transit_locations(url: str, params: Dict) -> pd.DataFrame:
     """Get public transit locations within city boundaries."""
-    package = requests.get(url, params=params).json()
+    package = get_json(url, params)
     pt_locations = package["result"]["resources"][0]["url"]
     pt_locs_dir_path = "data/raw/opendata_ttc_schedules"
-    with urlopen(pt_locations) as zipresp:
-        with ZipFile(BytesIO(zipresp.read())) as zfile:
-            zfile.extractall(pt_locs_dir_path)
+    with ZipFile(BytesIO(get_with_cache(pt_locations))) as zfile:
+        zfile.extractall(pt_locs_dir_path)
     df_pt = pd.read_csv(f"{pt_locs_dir_path}/stops.txt").astype(
         {
             "stop_name": pd.StringDtype(),
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Serve recorded HTTP responses from disk, to run the pipeline offline."""
+
+# pylint: disable=invalid-name,too-many-arguments
+
+
+import hashlib
+import json
+import os
+import re
+from email.utils import formatdate
+from http.client import responses
+from time import perf_counter, sleep
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+fixtures_manifest_filename = "fixtures.json"
+
+
+def get_fixture_key(url: str, params: Optional[Dict] = None) -> str:
+    """Get key of a GET request, with its query parameters sorted."""
+    url = requests.Request("GET", url, params=params).prepare().url
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(parts._replace(query=query, fragment=""))
+
+
+def read_fixtures_manifest(fixtures_dir: str) -> Dict[str, Dict]:
+    """Load recorded responses, by request key."""
+    manifest_filepath = os.path.join(fixtures_dir, fixtures_manifest_filename)
+    if not os.path.exists(manifest_filepath):
+        return {}
+    with open(manifest_filepath) as f:
+        return json.load(f)
+
+
+def record_fixture(
+    fixtures_dir: str,
+    url: str,
+    body: bytes,
+    params: Optional[Dict] = None,
+    headers: Optional[Dict[str, str]] = None,
+    filename: Optional[str] = None,
+) -> str:
+    """Store response body of a GET request as a fixture file."""
+    key = get_fixture_key(url, params)
+    filename = filename or hashlib.sha256(key.encode()).hexdigest()
+    os.makedirs(fixtures_dir, exist_ok=True)
+    with open(os.path.join(fixtures_dir, filename), "wb") as f:
+        f.write(body)
+    fixtures = read_fixtures_manifest(fixtures_dir)
+    fixtures[key] = {"file": filename, "headers": headers or {}}
+    with open(
+        os.path.join(fixtures_dir, fixtures_manifest_filename), "w"
+    ) as f:
+        json.dump(fixtures, f, indent=2, sort_keys=True)
+    return os.path.join(fixtures_dir, filename)
+
+
+def record_live_fixture(
+    fixtures_dir: str,
+    url: str,
+    params: Optional[Dict] = None,
+    filename: Optional[str] = None,
+    timeout: float = 60,
+) -> str:
+    """Get response from a live endpoint and store it as a fixture."""
+    r = requests.get(url, params=params, timeout=timeout)
+    r.raise_for_status()
+    headers = {
+        k: r.headers[k]
+        for k in ["Content-Type", "ETag", "Last-Modified"]
+        if k in r.headers
+    }
+    return record_fixture(
+        fixtures_dir, url, r.content, params, headers, filename
+    )
+
+
+class ThrottledBody:
+    """File-like response body, read no faster than a bandwidth.
+
+    The fixture file is closed once the body is read to its end, or when
+    the response is closed.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        offset: int = 0,
+        length: int = 0,
+        bandwidth: Optional[float] = None,
+    ) -> None:
+        self.f = open(filepath, "rb")
+        self.f.seek(offset)
+        self.remaining = length
+        self.bandwidth = bandwidth
+        self.num_bytes_read = 0
+        self.start = perf_counter()
+
+    def read(self, amt: Optional[int] = None, **kwargs) -> bytes:
+        if self.f.closed:
+            return b""
+        if amt is None or amt > self.remaining:
+            amt = self.remaining
+        data = self.f.read(amt)
+        self.remaining -= len(data)
+        self.num_bytes_read += len(data)
+        if not data or not self.remaining:
+            self.close()
+        if self.bandwidth:
+            # Wait until the bytes read so far would have arrived
+            delay = self.num_bytes_read / self.bandwidth
+            sleep(max(0.0, delay - (perf_counter() - self.start)))
+        return data
+
+    def close(self) -> None:
+        self.f.close()
+
+    def release_conn(self) -> None:
+        self.close()
+
+
+class FixtureAdapter(BaseAdapter):
+    """Transport adapter answering GET requests from recorded fixtures.
+
+    Fixture files are served with ETag/Last-Modified headers, conditional
+    (304) and byte range (206, or 200 if If-Range does not match)
+    responses, after latency seconds and at up to bandwidth bytes per
+    second. Requests without a fixture get a 404.
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: str,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.fixtures = read_fixtures_manifest(fixtures_dir)
+
+    def get_headers(self, fixture: Dict, filepath: str) -> Dict[str, str]:
+        """Get response headers of a fixture file."""
+        stat = os.stat(filepath)
+        return {
+            "ETag": f'"{stat.st_size:x}-{int(stat.st_mtime):x}"',
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            **fixture.get("headers", {}),
+        }
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        if self.latency:
+            sleep(self.latency)
+        fixture = self.fixtures.get(get_fixture_key(request.url))
+        if request.method not in ["GET", "HEAD"] or fixture is None:
+            return self.build_fixture_response(request, 404, {})
+        filepath = os.path.join(self.fixtures_dir, fixture["file"])
+        size = os.path.getsize(filepath)
+        headers = self.get_headers(fixture, filepath)
+        if (
+            request.headers.get("If-None-Match") == headers["ETag"]
+            or request.headers.get("If-Modified-Since")
+            == headers["Last-Modified"]
+        ):
+            return self.build_fixture_response(request, 304, headers)
+        status, offset = 200, 0
+        byte_range = re.match(
+            r"bytes=(\d+)-$", request.headers.get("Range", "")
+        )
+        if_range = request.headers.get("If-Range")
+        if byte_range and (
+            not if_range
+            or if_range in [headers["ETag"], headers["Last-Modified"]]
+        ):
+            offset = int(byte_range.group(1))
+            if offset >= size:
+                headers["Content-Range"] = f"bytes */{size}"
+                return self.build_fixture_response(request, 416, headers)
+            status = 206
+            headers["Content-Range"] = f"bytes {offset}-{size - 1}/{size}"
+        headers["Content-Length"] = str(size - offset)
+        body = None
+        if request.method == "GET":
+            body = ThrottledBody(
+                filepath, offset, size - offset, self.bandwidth
+            )
+        return self.build_fixture_response(request, status, headers, body)
+
+    def build_fixture_response(
+        self,
+        request: requests.PreparedRequest,
+        status: int,
+        headers: Dict[str, str],
+        body: Optional[ThrottledBody] = None,
+    ) -> requests.Response:
+        """Build response to a request, with a file-like body."""
+        response = requests.Response()
+        response.status_code = status
+        response.reason = responses.get(status, "")
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = body
+        if body is None:
+            response._content = b""  # pylint: disable=protected-access
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def mount_fixtures(
+    session: requests.Session,
+    fixtures_dir: str,
+    latency: float = 0.0,
+    bandwidth: Optional[float] = None,
+) -> FixtureAdapter:
+    """Answer all HTTP(S) requests of a session from recorded fixtures."""
+    adapter = FixtureAdapter(fixtures_dir, latency, bandwidth)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
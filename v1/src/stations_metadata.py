@@ -11,7 +11,8 @@ from typing import Dict, List
 
 import pandas as pd
 import pandera as pa
-import requests
+
+from src.http_client import get_json
 
 stations_schema = pa.DataFrameSchema(
     columns={
@@ -36,13 +37,13 @@ def get_stations_metadata(
     stations_url: str, stations_params: Dict
 ) -> pd.DataFrame:
     """Get bikeshare stations metadata from JSON feed."""
-    package = requests.get(stations_url, params=stations_params).json()
+    package = get_json(stations_url, stations_params)
     resources = package["result"]["resources"]
     df_about = pd.DataFrame.from_records(resources)
-    r = requests.get(df_about["url"].tolist()[0]).json()
+    r = get_json(df_about["url"].tolist()[0])
     url_stations = r["data"]["en"]["feeds"][2]["url"]
     df_stations = pd.DataFrame.from_records(
-        requests.get(url_stations).json()["data"]["stations"]
+        get_json(url_stations)["data"]["stations"]
     )
     df_stations = df_stations.astype(
         {
@@ -15,8 +15,11 @@ from typing import Dict, List, Union
 
 import pandas as pd
 import pandera as pa
-import requests
+import pyarrow
 from joblib import Parallel, delayed
+from pyarrow import csv as pa_csv
+
+from src.http_client import get_json
 
 # station_ids = df_stations["station_id"].unique().tolist()
 trips_schema = pa.DataFrameSchema(
@@ -71,7 +74,7 @@ def get_file_urls(
     main_dataset_url: str, dataset_params: Dict, years_wanted: Dict[int, List]
 ) -> List:
     """Get list of ridership file URLs."""
-    package = requests.get(main_dataset_url, params=dataset_params).json()
+    package = get_json(main_dataset_url, dataset_params)
     resources = package["result"]["resources"]
     df = pd.DataFrame.from_records(resources)
     years_wanted_str = "|".join([str(year) for year in years_wanted])
@@ -161,7 +164,7 @@ def get_all_data_files(
         executor = Parallel(n_jobs=cpu_count(), backend="multiprocessing")
         tasks = (
             delayed(get_single_ridership_data_file)(
-                url, dtypes_dict, date_cols, nan_cols
+                url, dtypes_dict, date_cols, nan_cols, duplicated_cols
             )
             for url in urls_list
         )
@@ -176,12 +179,35 @@ def get_all_data_files(
     return cols_dicts
 
 
+def read_trips_csv_pyarrow(
+    fpath: str, dtypes_dict: Dict, date_cols: List[str]
+) -> pd.DataFrame:
+    """Read transformed ridership CSV with the pyarrow CSV reader."""
+    # Arrow types of all wanted columns, so none of them are inferred
+    schema = pyarrow.Schema.from_pandas(
+        pd.DataFrame({c: pd.Series(dtype=t) for c, t in dtypes_dict.items()}),
+        preserve_index=False,
+    )
+    column_types = {f.name: f.type for f in schema}
+    column_types.update({c: pyarrow.timestamp("ns") for c in date_cols})
+    table = pa_csv.read_csv(
+        fpath,
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            timestamp_parsers=[pa_csv.ISO8601],
+        ),
+    )
+    return table.to_pandas().astype(
+        {k: v for k, v in dtypes_dict.items() if k in table.column_names}
+    )
+
+
 @pa.check_output(trips_schema)
-def load_trips_data(glob_str: str) -> pd.DataFrame:
+def load_trips_data(glob_str: str, engine: str = "pandas") -> pd.DataFrame:
     """Load all ridership CSVs into single DataFrame."""
     dtypes_dict_trips_transformed = {
         "TRIP_ID": pd.Int64Dtype(),
-        "TRIP _DURATION": pd.Int64Dtype(),
+        "TRIP__DURATION": pd.Int64Dtype(),
         "START_STATION_ID": pd.Int64Dtype(),
         "START_STATION_NAME": pd.StringDtype(),
         "END_STATION_ID": pd.Int64Dtype(),
@@ -189,13 +215,22 @@ def load_trips_data(glob_str: str) -> pd.DataFrame:
         "BIKE_ID": pd.Int64Dtype(),
         "USER_TYPE": pd.StringDtype(),
     }
-    dfs = [
-        pd.read_csv(
-            f,
-            dtype=dtypes_dict_trips_transformed,
-            parse_dates=["START_TIME", "END_TIME"],
-        )
-        for f in glob(glob_str)
-    ]
+    date_cols = ["START_TIME", "END_TIME"]
+    if engine == "pyarrow":
+        dfs = [
+            read_trips_csv_pyarrow(f, dtypes_dict_trips_transformed, date_cols)
+            for f in glob(glob_str)
+        ]
+    elif engine == "pandas":
+        dfs = [
+            pd.read_csv(
+                f,
+                dtype=dtypes_dict_trips_transformed,
+                parse_dates=date_cols,
+            )
+            for f in glob(glob_str)
+        ]
+    else:
+        raise ValueError(f"Unsupported CSV reader engine: {engine}")
     df = pd.concat(dfs, ignore_index=True)
     return df